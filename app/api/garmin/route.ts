@@ -1,51 +1,139 @@
 import { NextResponse } from 'next/server';
+import crypto from 'crypto';
 import fs from 'fs';
 import path from 'path';
 
-// Type definition for Garmin summary data
-interface GarminData {
-  generated_at: string;
-  stats: {
-    total_runs: number;
-    total_distance: number;
-    total_time: string;
-    total_time_seconds: number;
-    avg_pace: string;
-    avg_distance: number;
-    marathon_progress: number;
-  };
-  latest_run?: Record<string, unknown>;
-  this_week?: Record<string, unknown>;
-  recent_runs?: Array<Record<string, unknown>>;
-  activities?: Array<Record<string, unknown>>;
-}
-
-// Simple in-memory cache with timestamp
-let cache: { data: GarminData; timestamp: number } | null = null;
-const CACHE_DURATION = 5 * 60 * 1000; // 5 minutes
-
-export async function GET() {
+// Respostas pré-calculadas pelo pipeline Python (scripts/api_slices.py):
+//   GET /api/garmin                      garmin_summary.json completo
+//   GET /api/garmin?slice=latest         latest | this_week | windows | stats | recent
+//   GET /api/garmin?slice=month/2025-11  totais + atividades do mês
+//   GET /api/garmin?slice=year/2025      totais + série mensal do ano
+// O SHA-256 de cada ficheiro (manifest.json) é o ETag forte e a chave da cache:
+// a cache só muda quando o conteúdo muda, sem expirar por tempo.
+
+const DATA_DIR = path.join(process.cwd(), 'public', 'data');
+const SUMMARY_FILE = path.join(DATA_DIR, 'garmin_summary.json');
+const API_DIR = path.join(DATA_DIR, 'garmin', 'api');
+const MANIFEST_FILE = path.join(API_DIR, 'manifest.json');
+const MAX_CACHED_BODIES = 64;
+
+interface SliceEntry {
+  file: string;
+  sha256: string;
+  bytes: number;
+}
+
+interface SliceManifest {
+  version: number;
+  generated_at?: string;
+  summary?: { sha256: string; bytes: number };
+  slices: Record<string, SliceEntry>;
+}
+
+// Manifest em memória, recarregado quando o ficheiro muda (mtime)
+let manifestCache: { mtimeMs: number; manifest: SliceManifest } | null = null;
+// Hash do resumo completo quando o manifest não o tem (ou é mais antigo que o resumo)
+let summaryHashCache: { mtimeMs: number; size: number; sha256: string } | null = null;
+// Corpos das respostas por SHA-256 (conteúdo novo = chave nova)
+const bodies = new Map<string, string>();
+
+function sha256(content: string): string {
+  return crypto.createHash('sha256').update(content, 'utf8').digest('hex');
+}
+
+function loadManifest(): { manifest: SliceManifest; mtimeMs: number } | null {
+  if (!fs.existsSync(MANIFEST_FILE)) {
+    manifestCache = null;
+    return null;
+  }
+  const { mtimeMs } = fs.statSync(MANIFEST_FILE);
+  if (!manifestCache || manifestCache.mtimeMs !== mtimeMs) {
+    const manifest = JSON.parse(fs.readFileSync(MANIFEST_FILE, 'utf8')) as SliceManifest;
+    manifestCache = { mtimeMs, manifest };
+  }
+  return manifestCache;
+}
+
+function summaryHash(manifest: { manifest: SliceManifest; mtimeMs: number } | null): string {
+  const { mtimeMs, size } = fs.statSync(SUMMARY_FILE);
+  // O manifest só vale se foi escrito depois do resumo (ex.: não depois de um restore manual)
+  if (manifest?.manifest.summary && manifest.mtimeMs >= mtimeMs && manifest.manifest.summary.bytes === size) {
+    return manifest.manifest.summary.sha256;
+  }
+  if (!summaryHashCache || summaryHashCache.mtimeMs !== mtimeMs || summaryHashCache.size !== size) {
+    summaryHashCache = { mtimeMs, size, sha256: sha256(fs.readFileSync(SUMMARY_FILE, 'utf8')) };
+  }
+  return summaryHashCache.sha256;
+}
+
+function readBody(file: string, expectedHash: string): { body: string; hash: string } {
+  const cached = bodies.get(expectedHash);
+  if (cached !== undefined) {
+    // Menos usado recentemente sai primeiro: volta para o fim do Map
+    bodies.delete(expectedHash);
+    bodies.set(expectedHash, cached);
+    return { body: cached, hash: expectedHash };
+  }
+  const body = fs.readFileSync(file, 'utf8');
+  // Ficheiro reescrito entre o manifest e a leitura: o ETag segue o conteúdo servido
+  const hash = sha256(body);
+  bodies.set(hash, body);
+  if (bodies.size > MAX_CACHED_BODIES) {
+    bodies.delete(bodies.keys().next().value as string);
+  }
+  return { body, hash };
+}
+
+function matchesEtag(ifNoneMatch: string | null, etag: string): boolean {
+  if (!ifNoneMatch) return false;
+  return ifNoneMatch
+    .split(',')
+    .map((tag) => tag.trim().replace(/^W\//, ''))
+    .some((tag) => tag === '*' || tag === etag);
+}
+
+export async function GET(request: Request) {
   try {
-    // Check cache first
-    if (cache && Date.now() - cache.timestamp < CACHE_DURATION) {
-      return NextResponse.json(cache.data);
+    const slice = new URL(request.url).searchParams.get('slice');
+    const manifest = loadManifest();
+
+    let file: string;
+    let expectedHash: string;
+    if (slice) {
+      // Só chaves próprias: ?slice=constructor ou __proto__ não são slices
+      const slices = manifest?.manifest.slices;
+      const entry = slices && Object.hasOwn(slices, slice) ? slices[slice] : undefined;
+      if (!entry) {
+        return NextResponse.json({ error: `Unknown slice: ${slice}` }, { status: 404 });
+      }
+      file = path.join(API_DIR, entry.file);
+      if (!file.startsWith(API_DIR + path.sep)) {
+        return NextResponse.json({ error: `Unknown slice: ${slice}` }, { status: 404 });
+      }
+      expectedHash = entry.sha256;
+    } else {
+      // Verificar se o ficheiro existe
+      if (!fs.existsSync(SUMMARY_FILE)) {
+        // Retornar array vazio se ainda não houver dados
+        return NextResponse.json([]);
+      }
+      file = SUMMARY_FILE;
+      expectedHash = summaryHash(manifest);
     }
 
-    const filePath = path.join(process.cwd(), 'public', 'data', 'garmin_summary.json');
-    
-    // Verificar se o ficheiro existe
-    if (!fs.existsSync(filePath)) {
-      // Retornar array vazio se ainda não houver dados
-      return NextResponse.json([]);
+    const headers = {
+      ETag: `"${expectedHash}"`,
+      'Cache-Control': 'public, max-age=0, must-revalidate',
+    };
+    if (matchesEtag(request.headers.get('if-none-match'), headers.ETag)) {
+      return new NextResponse(null, { status: 304, headers });
     }
-    
-    const fileContents = fs.readFileSync(filePath, 'utf8');
-    const data = JSON.parse(fileContents) as GarminData;
-    
-    // Update cache
-    cache = { data, timestamp: Date.now() };
-    
-    return NextResponse.json(data);
+
+    const { body, hash } = readBody(file, expectedHash);
+    return new NextResponse(body, {
+      status: 200,
+      headers: { ...headers, ETag: `"${hash}"`, 'Content-Type': 'application/json; charset=utf-8' },
+    });
   } catch (error) {
     console.error('Error reading Garmin data:', error);
     return NextResponse.json({ error: 'Failed to load Garmin data' }, { status: 500 });
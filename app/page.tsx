@@ -3,6 +3,7 @@
 import { useEffect, useMemo, useState, lazy, Suspense } from "react";
 import HeroSection from "../components/HeroSection";
 import StatsOverview from "../components/StatsOverview";
+import { fetchSummaryHeader } from "../lib/garminData";
 
 // Lazy load componentes abaixo do fold para melhorar a performance inicial
 const LatestRunCard = lazy(() => import("../components/LatestRunCard"));
@@ -74,8 +75,7 @@ export default function HomePage() {
   };
 
   useEffect(() => {
-    fetch("/data/garmin_summary.json")
-      .then((res) => res.json())
+    fetchSummaryHeader()
       .then((data) => {
         // Consolidate data sources
         const statsSource = data.stats ?? {};
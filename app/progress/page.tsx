@@ -2,10 +2,22 @@
 
 import { useEffect, useState, useMemo, useCallback } from "react";
 import PageWrapper from "../../components/PageWrapper";
-import HorizontalProgressChart from "../../components/HorizontalProgressChart";
+import HorizontalProgressChart, {
+  type MonthlyRollup,
+} from "../../components/HorizontalProgressChart";
 import { Activity, BarChart3, Clock, Zap, Target, Calendar } from "lucide-react";
 import styles from "./dashboard.module.css";
 import { useTranslation } from "../../components/TranslationProvider";
+import {
+  SUMMARY_URL,
+  type ShardManifest,
+  fetchHeader,
+  fetchManifest,
+  fetchSection,
+  fetchShards,
+  mergeShards,
+  monthsToLoad,
+} from "../../lib/garminData";
 
 interface ActivityData {
   date: string;
@@ -35,8 +47,20 @@ export default function ProgressoPage() {
   // 👇 novo: filtro por mês (formato: "YYYY-MM" ou "all")
   const [selectedMonth, setSelectedMonth] = useState<string>("current");
 
+  // Dados particionados por mês (só os shards necessários são pedidos)
+  const [manifest, setManifest] = useState<ShardManifest | null>(null);
+  const [loadedShards, setLoadedShards] = useState<Record<string, any[]>>({});
+
+  // Série mensal pré-calculada pelo pipeline (summary.rollups.monthly)
+  const [monthlySeries, setMonthlySeries] = useState<MonthlyRollup[] | undefined>();
+
   // Gerar lista de meses disponíveis
   const availableMonths = useMemo(() => {
+    if (manifest) {
+      return manifest.shards
+        .map((shard) => shard.month)
+        .filter((month) => /^\d{4}-\d{2}$/.test(month));
+    }
     if (activities.length === 0) return [];
 
     const monthsSet = new Set<string>();
@@ -49,7 +73,7 @@ export default function ProgressoPage() {
     });
 
     return Array.from(monthsSet).sort().reverse(); // Mais recente primeiro
-  }, [activities]);
+  }, [activities, manifest]);
 
   // Mês atual no formato "YYYY-MM" - computed once
   const currentMonthKey = useMemo(() => {
@@ -146,117 +170,175 @@ export default function ProgressoPage() {
     return Number(value) || 0;
   };
 
-  useEffect(() => {
-    console.log("🔄 Carregando dados do Garmin...");
+  const formatActivities = (activitiesData: any[]): ActivityData[] =>
+    activitiesData.map((act: any) => {
+      const distance = Number(act.distance ?? act.distance_km ?? 0);
+      const seconds = Number(
+        act.time_seconds ??
+        act.total_time_seconds ??
+        act.moving_time ??
+        act.total_time ?? // 👈 NOVO: usa o total_time em segundos
+        (typeof act.total_time === "string"
+          ? parseTimeStringToSeconds(act.total_time)
+          : 0)
+      );
 
-    fetch("/data/garmin_summary.json")
-      .then((res) => {
-        console.log("📡 Response recebida:", res.status);
-        return res.json();
-      })
-      .then((data) => {
-        console.log("📊 Dados carregados:", data);
-
-        const activitiesData = Array.isArray(data)
-          ? data
-          : data.activities || data.recent_runs || [];
-        console.log("📋 Activities encontradas:", activitiesData.length);
-
-        const formattedActivities = activitiesData.map((act: any) => {
-          const distance = Number(act.distance ?? act.distance_km ?? 0);
-          const seconds = Number(
-            act.time_seconds ??
-            act.total_time_seconds ??
-            act.moving_time ??
-            act.total_time ?? // 👈 NOVO: usa o total_time em segundos
-            (typeof act.total_time === "string"
-              ? parseTimeStringToSeconds(act.total_time)
-              : 0)
+      const parsedPace = (() => {
+        if (act.pace && typeof act.pace === "string") {
+          return act.pace.includes("/") ? act.pace : `${act.pace}/km`;
+        }
+        if (act.avg_pace && typeof act.avg_pace === "string") {
+          return act.avg_pace.includes("/") ? act.avg_pace : `${act.avg_pace}/km`;
+        }
+        if (act.average_pace) {
+          return formatPace(Number(act.average_pace));
+        }
+        return "0:00/km";
+      })();
+
+      const avgHr =
+        act.avg_heart_rate ??
+        act.average_heartrate ??
+        act.avg_hr ??
+        act.avg_hr_value;
+      const maxHr =
+        act.max_heart_rate ?? act.max_heartrate ?? act.max_hr;
+
+      return {
+        date: act.date || act.iso_date,
+        distance,
+        moving_time: seconds,
+        pace: parsedPace,
+        elevation_gain: act.elevation_gain,
+        avg_heart_rate: avgHr ? Number(avgHr) : undefined,
+        max_heart_rate: maxHr ? Number(maxHr) : undefined,
+        calories: act.calories ? Number(act.calories) : undefined,
+      } as ActivityData;
+    });
+
+  const applySummaryStats = (data: any, formattedActivities: ActivityData[]) => {
+    if (Array.isArray(data.rollups?.monthly)) {
+      setMonthlySeries(data.rollups.monthly);
+    }
+
+    if (data.stats) {
+      const totalDistance = Number(data.stats.total_distance ?? 0);
+      const totalRuns = Number(
+        data.stats.total_runs ?? formattedActivities.length
+      );
+
+      const totalTimeMinutes = (() => {
+        if (data.stats.total_time_seconds) {
+          return Math.round(Number(data.stats.total_time_seconds) / 60);
+        }
+        if (
+          data.stats.total_time &&
+          typeof data.stats.total_time === "string"
+        ) {
+          return Math.round(
+            parseTimeStringToSeconds(data.stats.total_time) / 60
           );
+        }
+        return 0;
+      })();
+
+      const avgPaceRaw = data.stats.avg_pace ?? data.stats.average_pace;
+      const avgPace =
+        typeof avgPaceRaw === "string"
+          ? avgPaceRaw.includes("/")
+            ? avgPaceRaw
+            : `${avgPaceRaw}/km`
+          : formatPace(Number(avgPaceRaw));
+
+      setStats({
+        totalDistance: Math.round(totalDistance * 100) / 100,
+        totalTime: totalTimeMinutes,
+        avgPace,
+        totalRuns,
+      });
+    } else {
+      calculateStats(formattedActivities);
+    }
+  };
 
-          const parsedPace = (() => {
-            if (act.pace && typeof act.pace === "string") {
-              return act.pace.includes("/") ? act.pace : `${act.pace}/km`;
-            }
-            if (act.avg_pace && typeof act.avg_pace === "string") {
-              return act.avg_pace.includes("/") ? act.avg_pace : `${act.avg_pace}/km`;
-            }
-            if (act.average_pace) {
-              return formatPace(Number(act.average_pace));
-            }
-            return "0:00/km";
-          })();
-
-          const avgHr =
-            act.avg_heart_rate ??
-            act.average_heartrate ??
-            act.avg_hr ??
-            act.avg_hr_value;
-          const maxHr =
-            act.max_heart_rate ?? act.max_heartrate ?? act.max_hr;
-
-          return {
-            date: act.date || act.iso_date,
-            distance,
-            moving_time: seconds,
-            pace: parsedPace,
-            elevation_gain: act.elevation_gain,
-            avg_heart_rate: avgHr ? Number(avgHr) : undefined,
-            max_heart_rate: maxHr ? Number(maxHr) : undefined,
-            calories: act.calories ? Number(act.calories) : undefined,
-          } as ActivityData;
-        });
+  useEffect(() => {
+    console.log("🔄 Carregando dados do Garmin...");
+
+    const loadFullSummary = () =>
+      fetch(SUMMARY_URL)
+        .then((res) => {
+          console.log("📡 Response recebida:", res.status);
+          return res.json();
+        })
+        .then((data) => {
+          console.log("📊 Dados carregados:", data);
 
-        console.log("✅ Activities formatadas:", formattedActivities);
+          const activitiesData = Array.isArray(data)
+            ? data
+            : data.activities || data.recent_runs || [];
+          console.log("📋 Activities encontradas:", activitiesData.length);
 
-        setActivities(formattedActivities);
+          const formattedActivities = formatActivities(activitiesData);
+          console.log("✅ Activities formatadas:", formattedActivities);
 
-        if (data.stats) {
-          const totalDistance = Number(data.stats.total_distance ?? 0);
-          const totalRuns = Number(
-            data.stats.total_runs ?? formattedActivities.length
-          );
+          setActivities(formattedActivities);
+          applySummaryStats(data, formattedActivities);
+        });
 
-          const totalTimeMinutes = (() => {
-            if (data.stats.total_time_seconds) {
-              return Math.round(Number(data.stats.total_time_seconds) / 60);
-            }
-            if (
-              data.stats.total_time &&
-              typeof data.stats.total_time === "string"
-            ) {
-              return Math.round(
-                parseTimeStringToSeconds(data.stats.total_time) / 60
-              );
-            }
-            return 0;
-          })();
-
-          const avgPaceRaw = data.stats.avg_pace ?? data.stats.average_pace;
-          const avgPace =
-            typeof avgPaceRaw === "string"
-              ? avgPaceRaw.includes("/")
-                ? avgPaceRaw
-                : `${avgPaceRaw}/km`
-              : formatPace(Number(avgPaceRaw));
-
-          setStats({
-            totalDistance: Math.round(totalDistance * 100) / 100,
-            totalTime: totalTimeMinutes,
-            avgPace,
-            totalRuns,
-          });
-        } else {
-          calculateStats(formattedActivities);
+    // Preferir header + shards do mês atual; sem manifest, JSON completo
+    fetchManifest()
+      .then(async (shardManifest) => {
+        if (!shardManifest) {
+          await loadFullSummary();
+          return;
         }
-        setLoading(false);
+        const [header, rollups, shards] = await Promise.all([
+          fetchHeader(shardManifest),
+          fetchSection(shardManifest, "rollups"),
+          fetchShards(shardManifest, monthsToLoad(shardManifest, currentMonthKey)),
+        ]);
+        console.log("🧩 Shards carregados:", Object.keys(shards));
+
+        setManifest(shardManifest);
+        setLoadedShards(shards);
+        applySummaryStats({ ...header, rollups }, formatActivities(mergeShards(shardManifest, shards)));
       })
+      .then(() => setLoading(false))
       .catch((err) => {
         console.error("❌ Error loading activities:", err);
         setLoading(false);
       });
   }, []);
 
+  // Atividades = shards já carregados (ordem do manifest, mais recente primeiro)
+  useEffect(() => {
+    if (!manifest) return;
+    setActivities(formatActivities(mergeShards(manifest, loadedShards)));
+  }, [manifest, loadedShards]);
+
+  // Pede os shards que a vista atual precisa e ainda não estão carregados
+  useEffect(() => {
+    if (!manifest) return;
+    // Com a série mensal pré-calculada, o modo "Mês" não precisa de todos os shards
+    const needsAllMonths =
+      selectedMonth === "all" || (chartMode === "month" && !monthlySeries);
+    const target = needsAllMonths
+        ? "all"
+        : selectedMonth === "current"
+          ? currentMonthKey
+          : selectedMonth;
+    const missing = monthsToLoad(manifest, target).filter(
+      (month) => !(month in loadedShards)
+    );
+    if (missing.length === 0) return;
+
+    fetchShards(manifest, missing)
+      .then((shards) => setLoadedShards((prev) => ({ ...prev, ...shards })))
+      .catch((err) => console.error("❌ Error loading shards:", err));
+  }, [manifest, loadedShards, selectedMonth, chartMode, currentMonthKey, monthlySeries]);
+
+  const hasData = manifest ? manifest.shards.length > 0 : activities.length > 0;
+
   return (
     <PageWrapper>
       <section className="max-w-7xl mx-auto mt-8 px-6 min-h-screen pb-20">
@@ -288,7 +370,7 @@ export default function ProgressoPage() {
         )}
 
         {/* Empty State */}
-        {!loading && activities.length === 0 && (
+        {!loading && !hasData && (
           <div className="text-center py-20 bg-white/5 rounded-2xl border border-white/10">
             <div className="text-6xl mb-4">📊</div>
             <p className="text-gray-400 text-lg mb-2">{t("progress.noData")}</p>
@@ -299,7 +381,7 @@ export default function ProgressoPage() {
         )}
 
         {/* Dashboard Content */}
-        {!loading && activities.length > 0 && (
+        {!loading && hasData && (
           <div className="space-y-6">
             {/* Row 1: Key Metrics */}
             <div className={styles.metricsGrid}>
@@ -449,6 +531,7 @@ export default function ProgressoPage() {
                 <HorizontalProgressChart
                   activities={chartMode === "month" ? activities : filteredActivities}
                   mode={chartMode}
+                  monthlySeries={monthlySeries}
                 />
               </div>
 
@@ -19,9 +19,20 @@ interface Activity {
   pace?: string;
 }
 
+// Bucket mensal pré-calculado pelo pipeline Python (summary.rollups.monthly)
+export interface MonthlyRollup {
+  period: string;
+  start: string;
+  runs: number;
+  distance: number;
+  time_seconds?: number;
+  pace?: string;
+}
+
 interface HorizontalProgressChartProps {
   activities: Activity[];
   mode?: "run" | "month";
+  monthlySeries?: MonthlyRollup[];
 }
 
 type ChartDatum = {
@@ -42,6 +53,7 @@ function formatPace(paceInMinutes: number): string {
 export default function HorizontalProgressChart({
   activities,
   mode = "run",
+  monthlySeries,
 }: Readonly<HorizontalProgressChartProps>) {
   const scrollAreaRef = useRef<HTMLDivElement | null>(null);
   const rafIdRef = useRef<number | null>(null);
@@ -51,6 +63,23 @@ export default function HorizontalProgressChart({
   const minBarWidthPx = 56;
 
   const chartData = useMemo<ChartDatum[]>(() => {
+    // Série mensal já agregada: não é preciso percorrer as atividades
+    if (mode === "month" && monthlySeries && monthlySeries.length > 0) {
+      const maxDistance = Math.max(...monthlySeries.map((m) => m.distance), 0);
+
+      return monthlySeries.map((m) => {
+        const [year, month] = m.period.split("-").map(Number);
+        const date = new Date(year, month - 1, 1);
+        return {
+          date: m.start,
+          distance: m.distance,
+          label: date.toLocaleDateString("pt-PT", { month: "short" }),
+          heightPercentage:
+            maxDistance > 0 ? (m.distance / maxDistance) * 100 : 0,
+        };
+      });
+    }
+
     if (!activities || activities.length === 0) {
       return [];
     }
@@ -110,7 +139,7 @@ export default function HorizontalProgressChart({
         heightPercentage,
       } satisfies ChartDatum;
     });
-  }, [activities, mode]);
+  }, [activities, mode, monthlySeries]);
 
   const updateScrollState = useCallback(() => {
     const el = scrollAreaRef.current;
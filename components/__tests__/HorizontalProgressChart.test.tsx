@@ -97,6 +97,42 @@ describe("HorizontalProgressChart", () => {
     }
   });
 
+  it("uses the precomputed monthly series in month mode", () => {
+    const localeSpy = vi.spyOn(Date.prototype, "toLocaleDateString");
+
+    localeSpy.mockImplementation(function (this: Date) {
+      return `${this.getMonth() + 1}/${this.getFullYear()}`;
+    });
+
+    try {
+      const { container } = render(
+        <HorizontalProgressChart
+          mode="month"
+          activities={[]}
+          monthlySeries={[
+            { period: "2025-11", start: "2025-11-01", runs: 12, distance: 80 },
+            { period: "2025-12", start: "2025-12-01", runs: 3, distance: 20 },
+          ]}
+        />
+      );
+
+      expect(screen.queryByText(/Sem dados/i)).not.toBeInTheDocument();
+
+      const labels = screen
+        .getAllByText(/\d{1,2}\/2025/)
+        .map((node) => node.textContent || "");
+      const uniqueLabels = labels.filter((label, index, arr) => arr.indexOf(label) === index);
+      expect(uniqueLabels).toEqual(["11/2025", "12/2025"]);
+
+      const bars = container.querySelectorAll("[style*='linear-gradient']");
+      expect(bars).toHaveLength(2);
+      expect(bars[0]).toHaveStyle({ height: "100%" });
+      expect(bars[1]).toHaveStyle({ height: "25%" });
+    } finally {
+      localeSpy.mockRestore();
+    }
+  });
+
   it("handles zero-distance runs and missing pace gracefully", () => {
     const { container } = render(
       <HorizontalProgressChart
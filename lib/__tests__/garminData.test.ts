@@ -0,0 +1,91 @@
+import { afterEach, describe, expect, it, vi } from "vitest";
+import {
+  fetchHeader,
+  fetchSection,
+  mergeShards,
+  monthsToLoad,
+  previousMonthKey,
+  shardUrl,
+  type ShardManifest,
+} from "../garminData";
+
+const manifest: ShardManifest = {
+  version: 1,
+  header: { file: "header.json", sha256: "aaaa" },
+  sections: { rollups: { file: "sections/rollups.json", sha256: "d".repeat(64) } },
+  shards: [
+    { month: "2026-01", file: "activities/2026-01.json", sha256: "c".repeat(64), count: 2 },
+    { month: "2025-12", file: "activities/2025-12.json", sha256: "b".repeat(64), count: 1 },
+    { month: "2025-10", file: "activities/2025-10.json", sha256: "a".repeat(64), count: 3 },
+  ],
+};
+
+describe("previousMonthKey", () => {
+  it("wraps around the year boundary", () => {
+    expect(previousMonthKey("2026-01")).toBe("2025-12");
+    expect(previousMonthKey("2025-11")).toBe("2025-10");
+  });
+});
+
+describe("monthsToLoad", () => {
+  it("loads the target month and the one before it", () => {
+    expect(monthsToLoad(manifest, "2026-01")).toEqual(["2026-01", "2025-12"]);
+  });
+
+  it("skips months without a shard", () => {
+    expect(monthsToLoad(manifest, "2025-11")).toEqual(["2025-10"]);
+  });
+
+  it("loads every shard for the all view", () => {
+    expect(monthsToLoad(manifest, "all")).toEqual(["2026-01", "2025-12", "2025-10"]);
+  });
+});
+
+describe("shardUrl", () => {
+  it("versions shard URLs with the content hash", () => {
+    expect(shardUrl("activities/2025-12.json", "b".repeat(64))).toBe(
+      "/data/garmin/activities/2025-12.json?v=bbbbbbbbbbbb"
+    );
+  });
+});
+
+describe("mergeShards", () => {
+  it("keeps manifest order and ignores shards that are not loaded", () => {
+    const merged = mergeShards(manifest, {
+      "2025-10": [{ date: "2025-10-02" }],
+      "2026-01": [{ date: "2026-01-05" }, { date: "2026-01-02" }],
+    });
+    expect(merged.map((act) => act.date)).toEqual(["2026-01-05", "2026-01-02", "2025-10-02"]);
+  });
+});
+
+describe("fetchHeader / fetchSection", () => {
+  afterEach(() => {
+    vi.unstubAllGlobals();
+  });
+
+  const stubFetch = (status: number, body: unknown) => {
+    const fetchMock = vi.fn().mockResolvedValue(
+      new Response(JSON.stringify(body), { status })
+    );
+    vi.stubGlobal("fetch", fetchMock);
+    return fetchMock;
+  };
+
+  it("throws a clear error when the header request fails", async () => {
+    stubFetch(404, { error: "not found" });
+    await expect(fetchHeader(manifest)).rejects.toThrow("header.json: HTTP 404");
+  });
+
+  it("loads a section by its hashed URL", async () => {
+    const fetchMock = stubFetch(200, { monthly: [] });
+    await expect(fetchSection(manifest, "rollups")).resolves.toEqual({ monthly: [] });
+    expect(fetchMock).toHaveBeenCalledWith("/data/garmin/sections/rollups.json?v=dddddddddddd");
+  });
+
+  it("returns null for sections the manifest does not list", async () => {
+    const fetchMock = stubFetch(200, {});
+    await expect(fetchSection(manifest, "fitness")).resolves.toBeNull();
+    expect(fetchMock).not.toHaveBeenCalled();
+  });
+});
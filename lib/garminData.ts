@@ -0,0 +1,128 @@
+// Acesso aos dados Garmin gerados pelos scripts Python.
+// Preferimos a saída particionada (public/data/garmin/) e caímos para o
+// garmin_summary.json completo quando o manifest não existe.
+
+export const SUMMARY_URL = "/data/garmin_summary.json";
+export const SHARDS_BASE_URL = "/data/garmin";
+
+export interface ShardEntry {
+  month: string;
+  file: string;
+  sha256: string;
+  count: number;
+}
+
+export interface FileEntry {
+  file: string;
+  sha256: string;
+}
+
+export interface ShardManifest {
+  version: number;
+  total_activities?: number;
+  header: FileEntry;
+  // rollups, windows, fitness, personal_bests, routes (um ficheiro cada)
+  sections?: Record<string, FileEntry>;
+  shards: ShardEntry[];
+}
+
+type RawActivity = Record<string, any>;
+
+// O hash no query string deixa o browser/CDN guardar cada shard para sempre
+export const shardUrl = (file: string, sha256?: string) =>
+  `${SHARDS_BASE_URL}/${file}${sha256 ? `?v=${sha256.slice(0, 12)}` : ""}`;
+
+export const monthKeyOf = (year: number, monthIndex: number) =>
+  `${year}-${String(monthIndex + 1).padStart(2, "0")}`;
+
+export const previousMonthKey = (monthKey: string) => {
+  const [year, month] = monthKey.split("-").map(Number);
+  const prev = new Date(year, month - 2, 1);
+  return monthKeyOf(prev.getFullYear(), prev.getMonth());
+};
+
+/**
+ * Meses que uma vista precisa: "all" precisa de tudo; um mês concreto
+ * precisa dele e do anterior (a vista completa com as últimas do mês anterior).
+ */
+export const monthsToLoad = (
+  manifest: ShardManifest,
+  targetMonth: string | "all"
+): string[] => {
+  const available = manifest.shards.map((shard) => shard.month);
+  if (targetMonth === "all") return available;
+  const wanted = new Set([targetMonth, previousMonthKey(targetMonth)]);
+  return available.filter((month) => wanted.has(month));
+};
+
+export async function fetchManifest(): Promise<ShardManifest | null> {
+  try {
+    const res = await fetch(`${SHARDS_BASE_URL}/manifest.json`, { cache: "no-cache" });
+    if (!res.ok) return null;
+    const manifest = (await res.json()) as ShardManifest;
+    return Array.isArray(manifest?.shards) ? manifest : null;
+  } catch {
+    return null;
+  }
+}
+
+async function fetchJson(file: string, sha256?: string): Promise<any> {
+  const res = await fetch(shardUrl(file, sha256));
+  if (!res.ok) {
+    throw new Error(`Falha ao carregar ${file}: HTTP ${res.status}`);
+  }
+  return res.json();
+}
+
+/** stats, this_week e latest_run (o que os cartões da página inicial leem). */
+export async function fetchHeader(manifest: ShardManifest): Promise<RawActivity> {
+  return fetchJson(manifest.header.file, manifest.header.sha256);
+}
+
+/** Uma secção grande do resumo (ex.: "rollups"), ou null se o manifest não a tiver. */
+export async function fetchSection(manifest: ShardManifest, name: string): Promise<any> {
+  const entry = manifest.sections?.[name];
+  return entry ? fetchJson(entry.file, entry.sha256) : null;
+}
+
+const shardCache = new Map<string, Promise<RawActivity[]>>();
+
+/** Carrega os shards pedidos (cada hash só é pedido uma vez por sessão). */
+export async function fetchShards(
+  manifest: ShardManifest,
+  months: string[]
+): Promise<Record<string, RawActivity[]>> {
+  const entries = manifest.shards.filter((shard) => months.includes(shard.month));
+  const loaded = await Promise.all(
+    entries.map((shard) => {
+      let pending = shardCache.get(shard.sha256);
+      if (!pending) {
+        pending = fetchJson(shard.file, shard.sha256) as Promise<RawActivity[]>;
+        shardCache.set(shard.sha256, pending);
+        pending.catch(() => shardCache.delete(shard.sha256));
+      }
+      return pending.then((activities) => [shard.month, activities] as const);
+    })
+  );
+  return Object.fromEntries(loaded);
+}
+
+/** Junta shards pela ordem do manifest (mês mais recente primeiro). */
+export const mergeShards = (
+  manifest: ShardManifest,
+  shards: Record<string, RawActivity[]>
+): RawActivity[] =>
+  manifest.shards.flatMap((shard) => shards[shard.month] ?? []);
+
+/** Só o resumo (stats, this_week, latest_run): header.json ou o JSON completo. */
+export async function fetchSummaryHeader(): Promise<RawActivity> {
+  const manifest = await fetchManifest();
+  if (manifest) {
+    return fetchHeader(manifest);
+  }
+  const res = await fetch(SUMMARY_URL);
+  if (!res.ok) {
+    throw new Error(`Falha ao carregar ${SUMMARY_URL}: HTTP ${res.status}`);
+  }
+  return res.json();
+}
@@ -0,0 +1,164 @@
+"""
+Armazenamento local das atividades em SQLite (fonte de verdade do update_training_data)
+
+- Índice único na assinatura (iso_date, distância arredondada a 3 casas, time_seconds)
+  → detetar duplicados custa uma procura no índice, não um set de todo o histórico
+- Índices secundários por data para ordenar e filtrar sem carregar tudo
+  (também para procurar a mesma corrida vinda de outra fonte, ver
+  duplicate_index.py: uma procura por intervalo de sort_ts)
+- O garmin_summary.json é gerado a partir daqui
+
+O ficheiro fica em data/ (fora do Git). Se não existir, é criado a partir
+do garmin_summary.json atual na primeira execução; é recarregado do JSON
+sempre que outro importador o reescrever (hash guardado na tabela meta).
+"""
+
+import json
+import sqlite3
+from pathlib import Path
+from typing import Iterator, Optional
+
+from duplicate_index import DAY_S, MAX_UTC_OFFSET_S, START_TOLERANCE_S, run_key, same_run
+
+STORE_FILE = "data/activities.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS activities (
+    id INTEGER PRIMARY KEY,
+    iso_date TEXT NOT NULL,
+    distance_key INTEGER NOT NULL,
+    time_seconds INTEGER NOT NULL,
+    sort_ts REAL NOT NULL DEFAULT 0,
+    payload TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_activities_signature
+    ON activities(iso_date, distance_key, time_seconds);
+CREATE INDEX IF NOT EXISTS idx_activities_iso_date ON activities(iso_date);
+CREATE INDEX IF NOT EXISTS idx_activities_sort ON activities(sort_ts, time_seconds);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def signature_columns(activity: dict) -> tuple:
+    """Colunas do índice único — equivalente a _activity_signature()."""
+    return (
+        activity.get("iso_date") or "",
+        int(round(float(activity.get("distance") or 0) * 1000)),
+        int(activity.get("time_seconds") or 0),
+    )
+
+
+class ActivityStore:
+    """Tabela de atividades normalizadas com dedup por índice único."""
+
+    def __init__(self, path: str = STORE_FILE):
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self._conn.commit()
+        else:
+            self._conn.rollback()
+        self.close()
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def commit(self) -> None:
+        self._conn.commit()
+
+    def count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM activities").fetchone()[0]
+
+    def is_empty(self) -> bool:
+        return self._conn.execute("SELECT 1 FROM activities LIMIT 1").fetchone() is None
+
+    def reset(self) -> None:
+        """Apaga todas as atividades (para reconstruir a partir do JSON)."""
+        self._conn.execute("DELETE FROM activities")
+        self._conn.execute("DELETE FROM meta")
+
+    def upsert(self, activity: dict, sort_ts: float = 0) -> bool:
+        """
+        Insere a atividade se a assinatura ainda não existir.
+        Devolve True se foi inserida, False se já existia.
+        """
+        cursor = self._conn.execute(
+            "INSERT INTO activities (iso_date, distance_key, time_seconds, sort_ts, payload) "
+            "VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(iso_date, distance_key, time_seconds) DO NOTHING",
+            (*signature_columns(activity), sort_ts, json.dumps(activity, ensure_ascii=False)),
+        )
+        return cursor.rowcount == 1
+
+    def iter_window(self, since_ts: float, until_ts: float) -> Iterator[tuple[int, dict]]:
+        """(id, atividade) com sort_ts entre os dois valores (índice idx_activities_sort)."""
+        rows = self._conn.execute(
+            "SELECT id, payload FROM activities WHERE sort_ts BETWEEN ? AND ?", (since_ts, until_ts)
+        )
+        for row_id, payload in rows:
+            yield row_id, json.loads(payload)
+
+    def find_duplicate(self, activity: dict, sort_ts: float) -> Optional[tuple[int, dict]]:
+        """(id, atividade) já guardada que é a mesma corrida vinda de outra fonte, ou None."""
+        key = run_key(activity)
+        if key is None:
+            return None
+        # sort_ts é a meia-noite local do dia; as chaves estão em UTC
+        margin = MAX_UTC_OFFSET_S + START_TOLERANCE_S + DAY_S
+        for row_id, existing in self.iter_window(sort_ts - margin, sort_ts + margin):
+            other = run_key(existing)
+            if other is not None and same_run(key, other):
+                return row_id, existing
+        return None
+
+    def replace(self, row_id: int, activity: dict, sort_ts: float = 0) -> bool:
+        """
+        Substitui a atividade `row_id` (ex.: pela versão de uma fonte mais rica).
+        Devolve False se a nova assinatura já pertencer a outra atividade.
+        """
+        try:
+            self._conn.execute(
+                "UPDATE activities SET iso_date = ?, distance_key = ?, time_seconds = ?, "
+                "sort_ts = ?, payload = ? WHERE id = ?",
+                (*signature_columns(activity), sort_ts,
+                 json.dumps(activity, ensure_ascii=False), row_id),
+            )
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def iter_activities(self, newest_first: bool = True,
+                        since_iso: Optional[str] = None) -> Iterator[dict]:
+        """Percorre as atividades pela ordem do índice de data."""
+        order = "DESC" if newest_first else "ASC"
+        query = "SELECT payload FROM activities"
+        params: tuple = ()
+        if since_iso:
+            query += " WHERE iso_date >= ?"
+            params = (since_iso,)
+        query += f" ORDER BY sort_ts {order}, time_seconds {order}"
+        for (payload,) in self._conn.execute(query, params):
+            yield json.loads(payload)
+
+    def get_meta(self, key: str, default=None):
+        """Valor JSON guardado na tabela meta (ex.: agregados incrementais)."""
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_meta(self, key: str, value) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            (key, json.dumps(value, ensure_ascii=False)),
+        )
@@ -0,0 +1,140 @@
+"""
+Respostas pré-calculadas para /api/garmin (uma por consulta)
+
+    public/data/garmin/api/latest.json          última corrida
+    public/data/garmin/api/this_week.json       semana ISO atual (com objetivo)
+    public/data/garmin/api/windows.json         janelas de datas (date_windows.py)
+    public/data/garmin/api/stats.json           estatísticas globais
+    public/data/garmin/api/recent.json          10 corridas mais recentes
+    public/data/garmin/api/months/YYYY-MM.json  totais do mês (rollups) + atividades
+    public/data/garmin/api/years/YYYY.json      totais do ano + série mensal
+    public/data/garmin/api/manifest.json        slice -> {"file", "sha256", "bytes"}
+
+O route (app/api/garmin/route.ts, ?slice=latest, ?slice=month/2025-11...)
+lê o manifest e devolve o ficheiro tal como está, sem fazer JSON.parse do
+resumo inteiro. O SHA-256 de cada ficheiro é o ETag forte (If-None-Match →
+304) e a chave da cache em memória do route: a cache muda exatamente quando
+o conteúdo muda, sem expirar por tempo. O manifest guarda também o hash do
+garmin_summary.json (resposta sem ?slice).
+
+Slices cujo conteúdo não mudou não são reescritos; os que deixaram de
+existir são apagados. As atividades podem vir de um iterável (StreamedList
+do store): os meses são escritos pelo mesmo escritor em streaming dos shards
+(summary_shards.write_month_files).
+"""
+
+import hashlib
+import json
+from pathlib import Path
+
+from summary_shards import UNKNOWN_MONTH, dumps_compact, write_if_changed, write_month_files
+
+API_DIR = "public/data/garmin/api"
+MANIFEST_VERSION = 1
+RECENT_RUNS = 10
+# Estatísticas no topo do JSON (import_garmin_incremental não tem "stats")
+_TOP_LEVEL_STATS = ("total_runs", "total_distance", "total_time", "avg_distance", "avg_pace")
+
+
+def file_sha256(path) -> tuple[str, int]:
+    """(sha256, bytes) de um ficheiro, lido por blocos."""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def _stats(summary: dict) -> dict:
+    stats = summary.get("stats")
+    if stats:
+        return stats
+    return {key: summary[key] for key in _TOP_LEVEL_STATS if key in summary}
+
+
+def _rollup_index(summary: dict, period: str) -> dict:
+    return {bucket["period"]: bucket for bucket in (summary.get("rollups") or {}).get(period, [])}
+
+
+def load_manifest(out_dir: str = API_DIR) -> dict:
+    path = Path(out_dir) / "manifest.json"
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_api_slices(summary: dict, summary_file: str | None = None, out_dir: str = API_DIR) -> dict:
+    """
+    Escreve os slices e o manifest (depois de `summary_file` estar escrito,
+    para guardar o hash dele). Devolve {"written": n, "unchanged": n, "removed": n}.
+    """
+    root = Path(out_dir)
+    previous = load_manifest(out_dir).get("slices", {})
+    counts = {"written": 0, "unchanged": 0, "removed": 0}
+    slices: dict[str, dict] = {}
+
+    def write(name: str, rel_file: str, data) -> None:
+        content = dumps_compact(data)
+        digest, written = write_if_changed(
+            root / rel_file, content, (previous.get(name) or {}).get("sha256")
+        )
+        counts["written" if written else "unchanged"] += 1
+        slices[name] = {"file": rel_file, "sha256": digest, "bytes": len(content)}
+
+    recent = summary.get("recent_runs") or []
+    write("latest", "latest.json", summary.get("latest_run") or (recent[0] if recent else None))
+    write("this_week", "this_week.json", summary.get("this_week") or {})
+    write("windows", "windows.json", summary.get("windows") or {})
+    write("stats", "stats.json", _stats(summary))
+    write("recent", "recent.json", recent[:RECENT_RUNS])
+
+    monthly = _rollup_index(summary, "monthly")
+    months = write_month_files(
+        summary.get("activities") or [], root,
+        rel_file=lambda month: f"months/{month}.json",
+        known={entry["file"]: entry["sha256"] for entry in previous.values()},
+        payload=lambda month, items: {"month": month, "totals": monthly.get(month), "activities": items},
+        unwrap=lambda data: data["activities"],
+        skip=(UNKNOWN_MONTH,),
+    )
+    for month, entry in months.items():
+        counts["written" if entry["written"] else "unchanged"] += 1
+        slices[f"month/{month}"] = {"file": entry["file"], "sha256": entry["sha256"], "bytes": entry["bytes"]}
+
+    for year, totals in _rollup_index(summary, "yearly").items():
+        months = [bucket for key, bucket in monthly.items() if key.startswith(f"{year}-")]
+        write(f"year/{year}", f"years/{year}.json",
+              {"year": year, "totals": totals, "months": sorted(months, key=lambda bucket: bucket["period"])})
+
+    for name in set(previous) - set(slices):
+        stale = root / previous[name]["file"]
+        if stale.exists():
+            stale.unlink()
+            counts["removed"] += 1
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "generated_at": summary.get("generated_at") or summary.get("last_updated"),
+        "slices": dict(sorted(slices.items())),
+    }
+    if summary_file and Path(summary_file).exists():
+        digest, size = file_sha256(summary_file)
+        manifest["summary"] = {"sha256": digest, "bytes": size}
+    write_if_changed(root / "manifest.json", json.dumps(manifest, indent=2, ensure_ascii=False).encode("utf-8"), None)
+    return counts
+
+
+def print_slice_report(counts: dict, out_dir: str = API_DIR) -> None:
+    print(
+        f"🔌 Slices da API em {out_dir}: {counts['written']} reescrito(s), "
+        f"{counts['unchanged']} inalterado(s), {counts['removed']} removido(s)"
+    )
+
+
+if __name__ == "__main__":
+    data_file = "public/data/garmin_summary.json"
+    with open(data_file, "r", encoding="utf-8") as f:
+        print_slice_report(write_api_slices(json.load(f), data_file))
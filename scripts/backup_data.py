@@ -1,44 +1,97 @@
 """
 Script para fazer backup dos dados de treino
-Cria cópias com timestamp para histórico
+Guarda snapshots deduplicados (por hash do conteúdo) e comprimidos
 """
 
+import argparse
 import json
-import shutil
-from datetime import datetime
 from pathlib import Path
 
+from api_slices import print_slice_report, write_api_slices
+from backup_store import BACKUP_DIR, BackupStore
+
 DATA_FILE = "public/data/garmin_summary.json"
-BACKUP_DIR = "data/backups"
 
 
 def backup_training_data():
-    """Cria backup com timestamp"""
-    
+    """Cria backup com timestamp (só escreve se o conteúdo mudou)"""
+
     if not Path(DATA_FILE).exists():
         print("⚠️  Nenhum ficheiro de dados encontrado!")
         return
-    
-    # Cria pasta de backups
-    Path(BACKUP_DIR).mkdir(parents=True, exist_ok=True)
-    
-    # Nome do backup com data
-    timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
-    backup_file = f"{BACKUP_DIR}/garmin_backup_{timestamp}.json"
-    
-    # Copia ficheiro
-    shutil.copy2(DATA_FILE, backup_file)
-    
+
+    entry = BackupStore(BACKUP_DIR).snapshot(DATA_FILE)
+
     # Lê stats
     with open(DATA_FILE, 'r', encoding='utf-8') as f:
         data = json.load(f)
-    
-    print(f"✅ Backup criado com sucesso!")
-    print(f"📁 Ficheiro: {backup_file}")
-    print(f"📊 Dados: {data['total_runs']} corridas | {data['total_distance']}km")
-    print(f"📅 Data do backup: {timestamp}")
+    stats = data.get("stats", data)
+
+    if entry["status"] == "unchanged":
+        print("ℹ️  Dados iguais ao último backup — nada a guardar.")
+    else:
+        print(f"✅ Backup criado com sucesso!")
+    print(f"🔑 Snapshot: {entry['sha256'][:12]} ({entry['status']})")
+    print(f"📊 Dados: {stats.get('total_runs', 0)} corridas | {stats.get('total_distance', 0)}km")
+    print(f"📅 Data do backup: {entry['timestamp']}")
+
+
+def list_backups():
+    """Lista os snapshots do índice"""
+    snapshots = BackupStore(BACKUP_DIR).load_index()
+    if not snapshots:
+        print("⚠️  Nenhum backup encontrado.")
+        return
+    for entry in snapshots:
+        print(f"📅 {entry['timestamp']}  🔑 {entry['sha256'][:12]}  {entry['size']} bytes")
+
+
+def restore_backup(ref):
+    """Repõe um snapshot (timestamp ou prefixo do hash) em DATA_FILE"""
+    entry = BackupStore(BACKUP_DIR).restore(ref, DATA_FILE)
+    if entry is None:
+        print(f"⚠️  Backup '{ref}' não encontrado.")
+        return
+    print(f"✅ Restaurado {entry['timestamp']} ({entry['sha256'][:12]}) → {DATA_FILE}")
+    # A API serve slices pré-calculados: têm de voltar a bater com o ficheiro reposto
+    with open(DATA_FILE, 'r', encoding='utf-8') as f:
+        print_slice_report(write_api_slices(json.load(f), DATA_FILE))
+
+
+def migrate_legacy_backups(remove=False):
+    """Converte os antigos garmin_backup_*.json para o formato deduplicado"""
+    migrated = BackupStore(BACKUP_DIR).migrate_legacy(remove=remove)
+    if not migrated:
+        print("ℹ️  Nenhum backup antigo para migrar.")
+        return
+    unique = sum(1 for item in migrated if item["new_object"])
+    print(f"✅ {len(migrated)} backup(s) migrado(s) → {unique} snapshot(s) único(s)")
+    if remove:
+        print("🗑️  Ficheiros antigos apagados.")
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backup de dados de treino")
+    parser.add_argument("--list", action="store_true", help="lista os backups existentes")
+    parser.add_argument("--restore", metavar="REF", help="timestamp ou hash do backup a repor")
+    parser.add_argument(
+        "--migrate",
+        action="store_true",
+        help="converte os antigos garmin_backup_*.json para o formato deduplicado",
+    )
+    parser.add_argument(
+        "--remove-legacy",
+        action="store_true",
+        help="com --migrate, apaga os ficheiros antigos depois de migrados",
+    )
+    args = parser.parse_args()
+
     print("💾 Backup de Dados de Treino\n")
-    backup_training_data()
+    if args.list:
+        list_backups()
+    elif args.restore:
+        restore_backup(args.restore)
+    elif args.migrate:
+        migrate_legacy_backups(remove=args.remove_legacy)
+    else:
+        backup_training_data()
@@ -0,0 +1,132 @@
+"""
+Backups endereçados por conteúdo em data/backups/
+
+- Cada snapshot é guardado uma única vez em objects/<sha256>.json.gz (gzip)
+- index.json mapeia timestamps → hash do snapshot
+- Se o conteúdo não mudou desde o último backup, nada é escrito
+  (o disco e o repositório Git não crescem)
+
+Restaurar:
+    python scripts/backup_data.py --restore 2025-12-11_17-04-29
+"""
+
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+BACKUP_DIR = "data/backups"
+OBJECTS_DIRNAME = "objects"
+INDEX_FILENAME = "index.json"
+LEGACY_PATTERN = "garmin_backup_*.json"
+
+
+class BackupStore:
+    """Snapshots comprimidos e deduplicados de garmin_summary.json."""
+
+    def __init__(self, backup_dir: str = BACKUP_DIR):
+        self.root = Path(backup_dir)
+        self.objects_dir = self.root / OBJECTS_DIRNAME
+        self.index_path = self.root / INDEX_FILENAME
+
+    def load_index(self) -> list[dict]:
+        if not self.index_path.exists():
+            return []
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            return json.load(f).get("snapshots", [])
+
+    def _save_index(self, snapshots: list[dict]) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"snapshots": snapshots}, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        os.replace(tmp_path, self.index_path)
+
+    def object_path(self, digest: str) -> Path:
+        return self.objects_dir / f"{digest}.json.gz"
+
+    def _write_object(self, digest: str, content: bytes) -> bool:
+        """Escreve o objeto se ainda não existir. Devolve True se escreveu."""
+        path = self.object_path(digest)
+        if path.exists():
+            return False
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        # mtime=0 → o mesmo conteúdo gera sempre os mesmos bytes comprimidos
+        with open(path, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as f:
+            f.write(content)
+        return True
+
+    def snapshot(self, source_path: str, timestamp: str | None = None) -> dict:
+        """
+        Guarda um snapshot do ficheiro. Devolve a entrada do índice com
+        `status`: "new" (objeto novo), "reused" (objeto já existia) ou
+        "unchanged" (igual ao último backup — índice não é alterado).
+        """
+        content = Path(source_path).read_bytes()
+        digest = hashlib.sha256(content).hexdigest()
+        snapshots = self.load_index()
+
+        if snapshots and snapshots[-1]["sha256"] == digest:
+            return {**snapshots[-1], "status": "unchanged"}
+
+        written = self._write_object(digest, content)
+        entry = {
+            "timestamp": timestamp or datetime.now().strftime("%Y-%m-%d_%H-%M-%S"),
+            "sha256": digest,
+            "size": len(content),
+        }
+        snapshots.append(entry)
+        self._save_index(snapshots)
+        return {**entry, "status": "new" if written else "reused"}
+
+    def find(self, ref: str | None = None) -> dict | None:
+        """Entrada por timestamp ou prefixo de hash (None → último backup)."""
+        snapshots = self.load_index()
+        if not snapshots:
+            return None
+        if ref is None:
+            return snapshots[-1]
+        for entry in reversed(snapshots):
+            if entry["timestamp"] == ref or entry["sha256"].startswith(ref):
+                return entry
+        return None
+
+    def read(self, ref: str | None = None) -> bytes | None:
+        entry = self.find(ref)
+        if entry is None:
+            return None
+        with gzip.open(self.object_path(entry["sha256"]), "rb") as f:
+            return f.read()
+
+    def restore(self, ref: str | None, dest_path: str) -> dict | None:
+        """Repõe um snapshot em dest_path. Devolve a entrada restaurada."""
+        content = self.read(ref)
+        if content is None:
+            return None
+        Path(dest_path).parent.mkdir(parents=True, exist_ok=True)
+        Path(dest_path).write_bytes(content)
+        return self.find(ref)
+
+    def migrate_legacy(self, remove: bool = False) -> list[dict]:
+        """
+        Importa os antigos garmin_backup_<timestamp>.json para o store,
+        por ordem cronológica. Com remove=True apaga os ficheiros originais.
+        """
+        migrated = []
+        for legacy in sorted(self.root.glob(LEGACY_PATTERN)):
+            timestamp = legacy.stem.replace("garmin_backup_", "")
+            content = legacy.read_bytes()
+            digest = hashlib.sha256(content).hexdigest()
+            written = self._write_object(digest, content)
+            snapshots = self.load_index()
+            if not any(s["timestamp"] == timestamp for s in snapshots):
+                snapshots.append({"timestamp": timestamp, "sha256": digest, "size": len(content)})
+                snapshots.sort(key=lambda s: s["timestamp"])
+                self._save_index(snapshots)
+            migrated.append({"file": legacy.name, "sha256": digest, "new_object": written})
+            if remove:
+                legacy.unlink()
+        return migrated
@@ -0,0 +1,115 @@
+"""
+Benchmark do parse de CSV do Garmin
+Compara o parse_csv_file atual (plano de colunas + csv.reader) com a versão
+anterior (csv.DictReader + procura de aliases em cada linha)
+
+Como usar:
+    python scripts/benchmark_csv_parse.py                 # 100k linhas sintéticas
+    python scripts/benchmark_csv_parse.py --rows 20000 --language pt
+    python scripts/benchmark_csv_parse.py --source data/garmin_exports/Activities.csv
+"""
+
+import argparse
+import csv
+import os
+import tempfile
+import time
+
+import import_garmin_exports
+import import_garmin_incremental
+import update_training_data
+from synthetic_garmin import CSV_HEADERS, write_csv_export
+
+
+def _first_value(row, keys):
+    for key in keys:
+        if key in row and row[key] not in (None, ""):
+            return row[key]
+    return None
+
+
+def dictreader_parse_csv_file(file_path):
+    """Versão anterior de update_training_data.parse_csv_file (referência)."""
+    parse_float = update_training_data._parse_float
+    parse_int = update_training_data._parse_int
+    parse_time = update_training_data._parse_time_to_seconds
+    activities = []
+
+    with open(file_path, 'r', encoding='utf-8') as csvfile:
+        reader = csv.DictReader(csvfile)
+
+        for row in reader:
+            distance = parse_float(_first_value(row, ['Distance', 'Distância', 'Distância (km)']))
+            date = _first_value(row, ['Date', 'Data'])
+            if distance <= 0 or not date:
+                continue
+
+            total_seconds = parse_time(_first_value(row, ['Time', 'Tempo']))
+            average_pace = (total_seconds / 60) / distance if distance > 0 else 0
+
+            activities.append({
+                "date": date,
+                "distance": distance,
+                "total_time": total_seconds,
+                "calories": parse_int(_first_value(row, ['Calories', 'Calorias'])) or 0,
+                "average_heartrate": parse_int(_first_value(row, ['Avg HR', 'FC Média'])),
+                "average_pace": average_pace,
+                "average_speed": (distance / total_seconds) * 3600 if total_seconds > 0 else 0,
+                "title": _first_value(row, ['Title', 'Título']) or 'Corrida',
+            })
+
+    return activities
+
+
+PARSERS = [
+    ("DictReader (anterior)", dictreader_parse_csv_file),
+    ("update_training_data", update_training_data.parse_csv_file),
+    ("import_garmin_incremental", import_garmin_incremental.parse_csv_file),
+    ("import_garmin_exports", import_garmin_exports.parse_csv_file),
+]
+
+
+def best_time(parser, path, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = parser(path)
+        timings.append(time.perf_counter() - started)
+    return min(timings), len(result)
+
+
+def check_equivalent(path):
+    """O parse novo tem de dar exatamente o mesmo que o DictReader."""
+    return dictreader_parse_csv_file(path) == update_training_data.parse_csv_file(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do parse de CSV do Garmin")
+    parser.add_argument("--source", help="CSV real a medir (em vez do sintético)")
+    parser.add_argument("--rows", type=int, default=100_000, help="linhas do CSV sintético")
+    parser.add_argument("--language", choices=sorted(CSV_HEADERS), default="en")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.source:
+            path = args.source
+        else:
+            print(f"🧪 A gerar CSV sintético com {args.rows} linhas ({args.language})...")
+            path = write_csv_export(os.path.join(tmp, "Activities.csv"), args.rows, language=args.language)
+
+        size_mb = os.path.getsize(path) / 1024 / 1024
+        print(f"⏱️  {path} ({size_mb:.1f} MB) | repetições: {args.repeat}")
+        print("✅ Resultado idêntico ao DictReader" if check_equivalent(path) else "❌ Resultado difere do DictReader!")
+
+        baseline = None
+        print(f"\n{'parser':<28} {'tempo (s)':>10} {'linhas/s':>12} {'speedup':>8}")
+        for name, parse in PARSERS:
+            elapsed, rows = best_time(parse, path, args.repeat)
+            baseline = baseline or elapsed
+            rate = rows / elapsed if elapsed else 0
+            print(f"{name:<28} {elapsed:>10.3f} {rate:>12.0f} {baseline / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
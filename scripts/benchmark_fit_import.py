@@ -0,0 +1,85 @@
+"""
+Benchmark do parse paralelo de ficheiros .FIT
+Mede o tempo de iter_fit_results() para vários nº de workers
+
+Como usar:
+    python scripts/benchmark_fit_import.py --files 500 --workers 1,2,4,8
+    python scripts/benchmark_fit_import.py --source data/garmin_exports
+"""
+
+import argparse
+import glob
+import os
+import tempfile
+import time
+
+from import_garmin_exports import iter_fit_results
+from synthetic_garmin import write_fit_folder
+
+
+def run_once(fit_files, workers):
+    started = time.perf_counter()
+    errors = 0
+    for _, data, error in iter_fit_results(fit_files, workers):
+        if error or not data:
+            errors += 1
+    return time.perf_counter() - started, errors
+
+
+def benchmark(fit_files, worker_counts, repeat=3):
+    """Devolve [(workers, melhor tempo, erros)] para cada nº de workers."""
+    results = []
+    for workers in worker_counts:
+        timings = [run_once(fit_files, workers) for _ in range(repeat)]
+        best, errors = min(timings)
+        results.append((workers, best, errors))
+    return results
+
+
+def print_report(results, total_files):
+    baseline = results[0][1] if results else 0
+    print(f"\n{'workers':>8} {'tempo (s)':>10} {'ficheiros/s':>12} {'speedup':>8} {'erros':>6}")
+    for workers, elapsed, errors in results:
+        rate = total_files / elapsed if elapsed else 0
+        speedup = baseline / elapsed if elapsed else 0
+        print(f"{workers:>8} {elapsed:>10.3f} {rate:>12.1f} {speedup:>7.2f}x {errors:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do parse paralelo de .FIT")
+    parser.add_argument("--source", help="pasta com ficheiros .fit reais")
+    parser.add_argument("--files", type=int, default=200, help="nº de .FIT sintéticos (sem --source)")
+    parser.add_argument(
+        "--session-only",
+        action="store_true",
+        help="sintéticos sem mensagens record (ficheiros muito mais leves que os reais)",
+    )
+    parser.add_argument("--workers", default=None, help="lista de workers, ex: 1,2,4,8")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.workers:
+        worker_counts = [int(w) for w in args.workers.split(",")]
+    else:
+        cpus = os.cpu_count() or 1
+        worker_counts = sorted({1, 2, 4, cpus} & set(range(1, cpus + 1)))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.source:
+            fit_files = sorted(glob.glob(os.path.join(args.source, "*.fit")))
+        else:
+            print(f"🧪 A gerar {args.files} ficheiros .FIT sintéticos...")
+            fit_files = [
+                str(p) for p in write_fit_folder(tmp, args.files, records=not args.session_only)
+            ]
+
+        if not fit_files:
+            print("⚠️  Nenhum ficheiro .FIT para medir.")
+            return
+
+        print(f"⏱️  {len(fit_files)} ficheiros | workers: {worker_counts} | repetições: {args.repeat}")
+        print_report(benchmark(fit_files, worker_counts, args.repeat), len(fit_files))
+
+
+if __name__ == "__main__":
+    main()
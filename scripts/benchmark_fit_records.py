@@ -0,0 +1,106 @@
+"""
+Benchmark da leitura do stream por segundo (mensagens record) dos .FIT
+Compara o decoder rápido (binário FIT + NumPy) com o fitparse, em records/s,
+e confirma que os dois dão os mesmos arrays. Mede também as análises sobre
+os blocos já lidos (melhores marcas, zonas de FC e TRIMP, trajetos GPS).
+
+Como usar:
+    python scripts/benchmark_fit_records.py --files 20
+    python scripts/benchmark_fit_records.py --source data/garmin_exports --decoders fast
+    python scripts/benchmark_fit_records.py --files 2000 --decoders fast   # milhares de corridas
+"""
+
+import argparse
+import glob
+import os
+import tempfile
+import time
+
+from best_efforts import best_efforts
+from fit_records import DECODERS
+from gps_tracks import simplify_track
+from training_load import stream_loads
+from synthetic_garmin import write_fit_folder
+
+
+def run_decoder(fit_files, decoder):
+    """Devolve (segundos, nº de records, blocos) de decodificar todos os ficheiros."""
+    decode = DECODERS[decoder]
+    started = time.perf_counter()
+    blocks = [decode(fit_file) for fit_file in fit_files]
+    return time.perf_counter() - started, sum(len(block) for block in blocks), blocks
+
+
+def benchmark(fit_files, decoders, repeat=3):
+    """Devolve {decoder: (melhor tempo, records, blocos)}."""
+    results = {}
+    for decoder in decoders:
+        # O fitparse é lento demais para repetir em lotes grandes
+        runs = 1 if decoder == "fitparse" else repeat
+        timings = [run_decoder(fit_files, decoder) for _ in range(runs)]
+        results[decoder] = min(timings, key=lambda result: result[0])
+    return results
+
+
+def print_report(results):
+    baseline = results.get("fitparse")
+    print(f"\n{'decoder':<10} {'tempo (s)':>10} {'records':>10} {'records/s':>12} {'speedup':>8}")
+    for decoder, (elapsed, records, _) in results.items():
+        rate = records / elapsed if elapsed else 0
+        speedup = baseline[0] / elapsed if baseline and elapsed else 1.0
+        print(f"{decoder:<10} {elapsed:>10.3f} {records:>10} {rate:>12,.0f} {speedup:>7.1f}x")
+
+    if len(results) > 1:
+        reference, *others = results.values()
+        same = all(
+            len(reference[2]) == len(other[2])
+            and all(a.equals(b) for a, b in zip(reference[2], other[2]))
+            for other in others
+        )
+        print("✅ Decoders dão arrays iguais" if same else "❌ Decoders dão arrays diferentes!")
+
+
+def print_analytics_report(blocks):
+    """Tempo das análises por corrida sobre blocos já decodificados."""
+    analyses = {
+        "best_efforts": lambda blocks: [best_efforts(block) for block in blocks],
+        "training_load": stream_loads,
+        "gps_tracks": lambda blocks: [simplify_track(block) for block in blocks],
+    }
+    print(f"\n{'análise':<14} {'atividades':>10} {'tempo (s)':>10} {'ms/atividade':>13}")
+    for name, analyze in analyses.items():
+        started = time.perf_counter()
+        analyze(blocks)
+        elapsed = time.perf_counter() - started
+        print(f"{name:<14} {len(blocks):>10} {elapsed:>10.3f} {elapsed / len(blocks) * 1000:>13.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos records por segundo dos .FIT")
+    parser.add_argument("--files", type=int, default=20, help="nº de ficheiros sintéticos")
+    parser.add_argument("--source", help="pasta com .FIT reais (em vez de sintéticos)")
+    parser.add_argument("--decoders", default="fast,fitparse", help="ex.: fast,fitparse")
+    parser.add_argument("--missing-rate", type=float, default=0.02,
+                        help="fração de records sintéticos sem FC/GPS")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    decoders = [name.strip() for name in args.decoders.split(",") if name.strip()]
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.source:
+            fit_files = sorted(glob.glob(os.path.join(args.source, "*.fit")))
+        else:
+            print(f"🧪 A gerar {args.files} ficheiros .FIT com records...")
+            fit_files = write_fit_folder(tmp, args.files, records=True, missing_rate=args.missing_rate)
+        if not fit_files:
+            print("⚠️  Nenhum ficheiro .FIT encontrado")
+            return
+
+        print(f"⏱️  {len(fit_files)} ficheiros, decoders: {', '.join(decoders)}")
+        results = benchmark(fit_files, decoders, args.repeat)
+        print_report(results)
+        print_analytics_report(next(iter(results.values()))[2])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Pico de memória (RSS) do import_new_data() com um export grande
+Compara a versão atual dos scripts com outra revisão do Git (por omissão a
+anterior), cada uma num processo novo e numa pasta de trabalho limpa.
+
+Como usar:
+    python scripts/benchmark_import_memory.py                    # 1M linhas vs HEAD~1
+    python scripts/benchmark_import_memory.py --rows 100000 --baseline-rev v1.0
+    python scripts/benchmark_import_memory.py --no-baseline      # só a versão atual
+"""
+
+import argparse
+import io
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+# O CSV cobre ~10 anos, independentemente do nº de linhas
+HISTORY_DAYS = 10 * 365
+
+# Corre num processo novo: ru_maxrss é o pico do processo inteiro
+_CHILD = """
+import contextlib, os, resource, sys, time
+sys.path.insert(0, sys.argv[1])
+start_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+import update_training_data
+with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+    started = time.perf_counter()
+    update_training_data.import_new_data()
+    elapsed = time.perf_counter() - started
+print(start_rss, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, elapsed)
+"""
+
+
+def export_scripts(rev: str, dest: Path) -> Path:
+    """Extrai a pasta scripts/ de uma revisão do Git para dest."""
+    archive = subprocess.run(
+        ["git", "archive", rev, "scripts"],
+        cwd=SCRIPTS_DIR.parent, capture_output=True, check=True,
+    ).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(dest)
+    return dest / "scripts"
+
+
+def run_import(scripts_dir: Path, csv_path: Path, workdir: Path) -> dict:
+    exports_dir = workdir / "data" / "garmin_exports"
+    exports_dir.mkdir(parents=True, exist_ok=True)
+    target = exports_dir / "Activities.csv"
+    if not target.exists():
+        os.link(csv_path, target)
+
+    result = subprocess.run(
+        [sys.executable, "-c", _CHILD, str(scripts_dir)],
+        cwd=workdir, capture_output=True, text=True, check=True,
+    )
+    start_kb, peak_kb, elapsed = result.stdout.split()[-3:]
+    return {"start_mb": int(start_kb) / 1024, "peak_mb": int(peak_kb) / 1024, "seconds": float(elapsed)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pico de RSS do import_new_data()")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--baseline-rev", default="HEAD~1", help="revisão do Git para comparar")
+    parser.add_argument("--no-baseline", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        print(f"🧪 A gerar CSV sintético com {args.rows} linhas...")
+        # Noutro processo, para o pico de RSS deste não passar para os filhos
+        subprocess.run(
+            [sys.executable, str(SCRIPTS_DIR / "synthetic_garmin.py"), "--fit", "0",
+             "--csv-rows", str(args.rows), "--per-day", str(max(1.0, args.rows / HISTORY_DAYS)),
+             "--out", str(tmp)],
+            check=True, stdout=subprocess.DEVNULL,
+        )
+        csv_path = tmp / "Activities.csv"
+
+        versions = [("atual", SCRIPTS_DIR)]
+        if not args.no_baseline:
+            versions.insert(0, (args.baseline_rev, export_scripts(args.baseline_rev, tmp / "baseline")))
+
+        print(f"\n{'versão':<12} {'execução':<22} {'RSS inicial':>12} {'RSS pico':>10} {'tempo (s)':>10}")
+        for label, scripts_dir in versions:
+            workdir = tmp / f"work_{label.replace('/', '_').replace('~', '_')}"
+            # 1ª execução: tudo novo; 2ª: mesmo ficheiro outra vez (nada novo)
+            for run in ("import inicial", "reimport (sem novas)"):
+                stats = run_import(scripts_dir, csv_path, workdir)
+                print(
+                    f"{label:<12} {run:<22} {stats['start_mb']:>10.1f}MB "
+                    f"{stats['peak_mb']:>8.1f}MB {stats['seconds']:>10.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
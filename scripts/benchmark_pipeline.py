@@ -0,0 +1,226 @@
+"""
+Benchmark das fases do pipeline de importação
+Gera exports sintéticos (CSV PT/EN com "--" e sessões .FIT já parseadas) de
+vários tamanhos e mede tempo, CPU e pico de memória de cada fase.
+
+Fases:
+    parse_csv        update_training_data.parse_csv_file
+    normalize        update_training_data._normalize_activity
+    build_summary    import_garmin_exports.build_summary (sessões .FIT)
+    json_write       json.dump do resumo
+    import_new_data  update_training_data.import_new_data (pasta temporária)
+
+Os resultados vão para um JSON comparável entre versões:
+    python scripts/benchmark_pipeline.py --sizes 1000,10000 --out data/benchmarks/base.json
+    python scripts/benchmark_pipeline.py --sizes 1000,10000 --compare data/benchmarks/base.json
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import import_garmin_exports
+import update_training_data
+from synthetic_garmin import CSV_HEADERS, iter_fit_session_records, write_csv_export
+
+RESULTS_FORMAT = 1
+RESULTS_DIR = "data/benchmarks"
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+# Diferença de tempo (relativa) a partir da qual se assinala regressão
+DEFAULT_THRESHOLD = 0.20
+
+
+def _stage_parse_csv(ctx):
+    ctx["parsed"] = update_training_data.parse_csv_file(ctx["csv"])
+    return len(ctx["parsed"])
+
+
+def _stage_normalize(ctx):
+    normalize = update_training_data._normalize_activity
+    return len([normalize(activity) for activity in ctx["parsed"]])
+
+
+def _stage_build_summary(ctx):
+    # build_summary altera os dicts recebidos → cópia rasa por execução
+    ctx["summary"] = import_garmin_exports.build_summary([dict(r) for r in ctx["fit_records"]])
+    return ctx["summary"]["stats"]["total_runs"]
+
+
+def _stage_json_write(ctx):
+    path = Path(ctx["tmp"]) / "garmin_summary.json"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(ctx["summary"], f, indent=2, ensure_ascii=False)
+    ctx["bytes_written"] = path.stat().st_size
+    return len(ctx["summary"]["activities"])
+
+
+def _stage_import_new_data(ctx):
+    workdir = Path(tempfile.mkdtemp(dir=ctx["tmp"]))
+    exports_dir = workdir / update_training_data.GARMIN_EXPORTS_DIR
+    exports_dir.mkdir(parents=True)
+    os.link(ctx["csv"], exports_dir / "Activities.csv")
+
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            update_training_data.import_new_data()
+        with open(update_training_data.DATA_FILE, encoding="utf-8") as f:
+            return json.load(f)["stats"]["total_runs"]
+    finally:
+        os.chdir(cwd)
+
+
+STAGES = {
+    "parse_csv": _stage_parse_csv,
+    "normalize": _stage_normalize,
+    "build_summary": _stage_build_summary,
+    "json_write": _stage_json_write,
+    "import_new_data": _stage_import_new_data,
+}
+
+
+def measure(stage, ctx, memory: bool = True) -> dict:
+    """Tempo (wall + CPU) numa execução limpa; pico de memória numa segunda, com tracemalloc."""
+    gc.collect()
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    items = stage(ctx)
+    wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+
+    peak_mb = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            stage(ctx)
+            peak_mb = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "items": items,
+        "wall_s": round(wall, 4),
+        "cpu_s": round(cpu, 4),
+        "peak_mb": round(peak_mb, 2) if peak_mb is not None else None,
+        "items_per_s": round(items / wall, 1) if wall else None,
+    }
+
+
+def run_size(size: int, stages, language: str, memory: bool, seed: int) -> list[dict]:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        ctx = {
+            "tmp": tmp,
+            "csv": str(write_csv_export(Path(tmp) / "Activities.csv", size, seed, language)),
+            "fit_records": list(iter_fit_session_records(size, seed)),
+        }
+        # As fases dependem das anteriores (parse → normalize, build_summary → json_write)
+        if "normalize" in stages and "parse_csv" not in stages:
+            _stage_parse_csv(ctx)
+        if "json_write" in stages and "build_summary" not in stages:
+            _stage_build_summary(ctx)
+
+        for name in STAGES:
+            if name not in stages:
+                continue
+            result = {"stage": name, "activities": size, **measure(STAGES[name], ctx, memory)}
+            if name == "json_write":
+                result["bytes_written"] = ctx["bytes_written"]
+            results.append(result)
+            peak = f"{result['peak_mb']:>9.1f}" if result["peak_mb"] is not None else f"{'-':>9}"
+            print(
+                f"{name:<16} {size:>9} {result['wall_s']:>9.3f} {result['cpu_s']:>9.3f} "
+                f"{peak} {result['items_per_s'] or 0:>12.0f}"
+            )
+    return results
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> list[dict]:
+    """Fases cujo tempo piorou mais que `threshold` face ao baseline."""
+    base = {(r["stage"], r["activities"]): r for r in baseline.get("results", [])}
+    regressions = []
+    print(f"\n📊 Comparação com {baseline.get('git') or '?'} ({baseline.get('generated_at', '?')})")
+    for result in results["results"]:
+        previous = base.get((result["stage"], result["activities"]))
+        if not previous or not previous["wall_s"]:
+            continue
+        ratio = result["wall_s"] / previous["wall_s"]
+        flag = "❌" if ratio > 1 + threshold else "✅"
+        print(f"   {flag} {result['stage']:<16} {result['activities']:>9}  {ratio:>6.2f}x")
+        if ratio > 1 + threshold:
+            regressions.append({**result, "baseline_wall_s": previous["wall_s"], "ratio": round(ratio, 3)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das fases do pipeline de importação")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="nº de atividades, ex: 1000,10000,100000,1000000")
+    parser.add_argument("--stages", default=",".join(STAGES), help="fases a medir")
+    parser.add_argument("--language", choices=sorted(CSV_HEADERS), default="pt")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-memory", action="store_true", help="não mede pico de memória (mais rápido)")
+    parser.add_argument("--out", help=f"ficheiro JSON de resultados (por omissão em {RESULTS_DIR}/)")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON de uma execução anterior")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    stages = [stage for stage in args.stages.split(",") if stage]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"fases desconhecidas: {', '.join(sorted(unknown))}")
+
+    print(f"⏱️  Tamanhos: {sizes} | fases: {', '.join(stages)}")
+    print(f"\n{'fase':<16} {'atividades':>9} {'wall (s)':>9} {'cpu (s)':>9} {'pico (MB)':>9} {'itens/s':>12}")
+    results = {
+        "format": RESULTS_FORMAT,
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "git": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "language": args.language,
+        "seed": args.seed,
+        "results": [],
+    }
+    for size in sizes:
+        results["results"].extend(run_size(size, stages, args.language, not args.no_memory, args.seed))
+
+    out = Path(args.out or Path(RESULTS_DIR) / f"pipeline_{datetime.now():%Y-%m-%d_%H-%M-%S}.json")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Resultados em {out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n⚠️  {len(regressions)} fase(s) mais lenta(s) que o baseline (>{args.threshold:.0%})")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark da importação de GPX/TCX (xml_activities.py)
+Mede records/s de cada formato (1 processo e com vários workers) e o pico
+de memória ao ler uma ultra: leitura incremental (iterparse, pontos
+removidos da árvore) vs. a árvore XML inteira em memória (ElementTree.parse).
+
+Como usar:
+    python scripts/benchmark_xml_import.py --files 20 --workers 1,2,4
+    python scripts/benchmark_xml_import.py --ultra-hours 24
+    python scripts/benchmark_xml_import.py --source data/garmin_exports
+"""
+
+import argparse
+import glob
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from xml.etree import ElementTree
+
+from import_garmin_exports import iter_fit_results
+from synthetic_garmin import random_run, write_xml_folder
+from xml_activities import XML_SUFFIXES, parse_xml_activity
+
+
+def records_per_second(files):
+    """(segundos, records) de ler atividade + stream de cada ficheiro num só processo."""
+    started = time.perf_counter()
+    records = sum(len(parse_xml_activity(path)[1]) for path in files)
+    return time.perf_counter() - started, records
+
+
+def parallel_seconds(files, workers):
+    """Segundos do import (só a atividade) com iter_fit_results e `workers` processos."""
+    started = time.perf_counter()
+    errors = sum(1 for _, data, error in iter_fit_results(files, workers) if error or not data)
+    return time.perf_counter() - started, errors
+
+
+def peak_memory(parse):
+    """Pico (bytes) de memória Python alocada durante parse()."""
+    tracemalloc.start()
+    try:
+        parse()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def ultra_report(tmp, hours):
+    """Memória ao ler uma corrida de `hours` horas (1 ponto por segundo) em GPX e TCX."""
+    rng = random.Random(7)
+    run = random_run(rng, datetime(2024, 6, 1, 6, 0, tzinfo=timezone.utc))
+    run.update(distance_km=hours * 8.0, duration_s=hours * 3600)
+    print(f"\n🏔️  Ultra de {hours}h ({hours * 3600:,} pontos)")
+    print(f"{'formato':<8} {'ficheiro':>10} {'arrays':>10} {'iterparse':>11} {'árvore':>10}")
+    for fmt in ("gpx", "tcx"):
+        path = write_xml_folder(os.path.join(tmp, "ultra"), 1, fmt, runs=[run])[0]
+        _, block = parse_xml_activity(path)
+        streaming = peak_memory(lambda: parse_xml_activity(path))
+        tree = peak_memory(lambda: ElementTree.parse(path))
+        print(
+            f"{fmt:<8} {os.path.getsize(path) / 2**20:>8.1f}MB {block.nbytes / 2**20:>8.1f}MB "
+            f"{streaming / 2**20:>9.1f}MB {tree / 2**20:>8.1f}MB"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da importação de GPX/TCX")
+    parser.add_argument("--files", type=int, default=20, help="nº de ficheiros sintéticos por formato")
+    parser.add_argument("--source", help="pasta com .gpx/.tcx reais (em vez de sintéticos)")
+    parser.add_argument("--workers", default="1,2,4", help="ex.: 1,2,4")
+    parser.add_argument("--ultra-hours", type=int, default=12, help="duração da ultra (0 = não mede)")
+    args = parser.parse_args()
+
+    worker_counts = [int(value) for value in args.workers.split(",") if value.strip()]
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.source:
+            files = sorted(
+                path for suffix in XML_SUFFIXES
+                for path in glob.glob(os.path.join(args.source, f"*{suffix}"))
+            )
+            groups = {suffix[1:]: [path for path in files if path.endswith(suffix)] for suffix in XML_SUFFIXES}
+        else:
+            print(f"🧪 A gerar {args.files} ficheiros GPX e {args.files} TCX...")
+            groups = {fmt: write_xml_folder(os.path.join(tmp, fmt), args.files, fmt) for fmt in ("gpx", "tcx")}
+
+        print(f"\n{'formato':<8} {'ficheiros':>9} {'records':>10} {'tempo (s)':>10} {'records/s':>12}")
+        for fmt, files in groups.items():
+            if not files:
+                continue
+            elapsed, records = records_per_second(files)
+            print(f"{fmt:<8} {len(files):>9} {records:>10} {elapsed:>10.3f} {records / elapsed:>12,.0f}")
+
+        files = [path for group in groups.values() for path in group]
+        if files:
+            print(f"\n{'workers':>7} {'tempo (s)':>10} {'speedup':>8} {'erros':>6}")
+            baseline = None
+            for workers in worker_counts:
+                elapsed, errors = parallel_seconds(files, workers)
+                baseline = baseline or elapsed
+                print(f"{workers:>7} {elapsed:>10.3f} {baseline / elapsed:>7.2f}x {errors:>6}")
+
+        if args.ultra_hours:
+            ultra_report(tmp, args.ultra_hours)
+
+
+if __name__ == "__main__":
+    main()
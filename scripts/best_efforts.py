@@ -0,0 +1,86 @@
+"""
+Melhores marcas por distância (1k, 5k, 10k, meia, maratona) dentro de cada corrida
+
+Usa o stream por segundo de fit_records.py: para cada ponto de partida i,
+o fim do segmento é o primeiro record j com distância[j] >= distância[i] + alvo
+(interpolado entre j-1 e j). Como a distância acumulada é crescente, os fins
+também o são — é a técnica dos dois ponteiros, feita de uma vez com
+np.searchsorted sobre todas as partidas (sem ciclo Python por record).
+
+    efforts = best_efforts(block)        # {"1k": 241.7, "5k": 1290.2, ...} em segundos
+    table = personal_bests(activities)   # melhor de cada distância no histórico
+"""
+
+try:
+    import numpy as np
+except ImportError:  # personal_bests() não precisa de numpy
+    np = None
+
+# Distâncias standard em metros (ordem de apresentação)
+BEST_EFFORT_DISTANCES = {
+    "1k": 1000.0,
+    "5k": 5000.0,
+    "10k": 10000.0,
+    "half": 21097.5,
+    "marathon": 42195.0,
+}
+
+
+def fastest_segment(distance: "np.ndarray", elapsed: "np.ndarray", target: float) -> float | None:
+    """
+    Menor tempo para cobrir `target` metros. distance tem de ser crescente
+    (não estritamente) e elapsed em segundos. None se a corrida for curta.
+    """
+    if len(distance) < 2 or distance[-1] - distance[0] < target:
+        return None
+    # Partidas possíveis: as que ainda têm `target` metros pela frente
+    starts = np.arange(np.searchsorted(distance, distance[-1] - target, side="right"))
+    goal = distance[starts] + target
+    ends = np.searchsorted(distance, goal, side="left")
+    # distance[ends - 1] < goal <= distance[ends]: interpolação linear do tempo
+    d0, d1 = distance[ends - 1], distance[ends]
+    t0, t1 = elapsed[ends - 1], elapsed[ends]
+    end_time = t0 + (goal - d0) / (d1 - d0) * (t1 - t0)
+    return float(np.min(end_time - elapsed[starts]))
+
+
+def best_efforts(block, distances: dict = BEST_EFFORT_DISTANCES) -> dict:
+    """Melhor tempo (s, 0.1) de cada distância numa atividade (RecordBlock)."""
+    distance = block["distance"]
+    valid = ~np.isnan(distance)
+    if valid.sum() < 2:
+        return {}
+    # Distância do GPS pode recuar uns cm: força monotonia
+    distance = np.maximum.accumulate(distance[valid])
+    elapsed = (block["timestamp"][valid] - block["timestamp"][valid][0]).astype(np.float64)
+
+    efforts = {}
+    for name, target in distances.items():
+        seconds = fastest_segment(distance, elapsed, target)
+        if seconds is None:
+            break  # distâncias por ordem crescente: as seguintes também não cabem
+        efforts[name] = round(seconds, 1)
+    return efforts
+
+
+def personal_bests(activities, distances: dict = BEST_EFFORT_DISTANCES) -> dict:
+    """
+    Tabela de recordes a partir do campo "best_efforts" das atividades.
+    Em empate fica a atividade mais antiga (a primeira a fazer a marca).
+    """
+    table = {}
+    for activity in activities:
+        for name, seconds in (activity.get("best_efforts") or {}).items():
+            if name not in distances:
+                continue
+            current = table.get(name)
+            date = activity.get("iso_date") or activity.get("date") or ""
+            if current is None or (seconds, date) < (current["time_seconds"], current["iso_date"]):
+                table[name] = {
+                    "distance_m": distances[name],
+                    "time_seconds": seconds,
+                    "pace_seconds": round(seconds / (distances[name] / 1000), 1),
+                    "iso_date": date,
+                    "title": activity.get("title") or "Corrida",
+                }
+    return {name: table[name] for name in distances if name in table}
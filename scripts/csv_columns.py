@@ -0,0 +1,102 @@
+"""
+Leitura de CSVs do Garmin com mapeamento de colunas compilado por ficheiro
+
+O cabeçalho é resolvido uma única vez (aliases PT/EN → índice da coluna) e
+as linhas são lidas com csv.reader e indexação por posição, em vez de
+csv.DictReader + procura de aliases em cada campo de cada linha.
+
+Como usar:
+    FIELDS = {"distance": ["Distance", "Distância"], "time": ["Time", "Tempo"]}
+    for distance, time in iter_csv_fields(path, FIELDS):
+        ...
+"""
+
+import csv
+from contextlib import nullcontext
+from operator import itemgetter
+from typing import Callable, Iterable, Iterator, Optional
+
+
+def resolve_columns(header: list[str], fields: dict[str, Iterable[str]]) -> list[tuple[int, ...]]:
+    """Para cada campo, os índices das colunas presentes, pela ordem dos aliases."""
+    positions: dict[str, int] = {}
+    for index, name in enumerate(header):
+        positions.setdefault(name.strip().lstrip("\ufeff"), index)
+    return [
+        tuple(positions[alias] for alias in aliases if alias in positions)
+        for aliases in fields.values()
+    ]
+
+
+def compile_plan(
+    header: list[str],
+    fields: dict[str, Iterable[str]],
+    empty: Iterable[str] = ("",),
+) -> Callable[[list], tuple]:
+    """
+    Devolve uma função linha → tuplo com um valor por campo (pela ordem de
+    `fields`). Campos sem coluna dão None; valores em `empty` contam como
+    vazios. Com vários aliases presentes, vale o primeiro não vazio.
+
+    A linha tem de ter len(header) + 1 posições, sendo a última None
+    (ver iter_csv_fields) — é para lá que apontam os campos em falta.
+    """
+    missing = len(header)
+    columns = resolve_columns(header, fields)
+    empty = frozenset(empty)
+
+    if all(len(indices) <= 1 for indices in columns):
+        # Caso normal (um só idioma no export): um itemgetter para a linha inteira
+        getter = itemgetter(*[indices[0] if indices else missing for indices in columns])
+        if len(columns) == 1:
+            single = getter
+            getter = lambda row: (single(row),)
+        if empty == {""}:
+            return getter
+        return lambda row: tuple([None if value in empty else value for value in getter(row)])
+
+    def first_value(row: list) -> tuple:
+        values = []
+        for indices in columns:
+            value = None
+            for index in indices:
+                if row[index] not in empty:
+                    value = row[index]
+                    break
+            values.append(value)
+        return tuple(values)
+
+    return first_value
+
+
+def iter_csv_fields(
+    file_path,
+    fields: dict[str, Iterable[str]],
+    empty: Iterable[str] = ("",),
+    encoding: str = "utf-8",
+) -> Iterator[tuple]:
+    """
+    Lê o CSV e devolve um tuplo de valores (ordem de `fields`) por linha.
+    `file_path` pode ser também um ficheiro de texto já aberto (ex.: membro de um ZIP).
+    """
+    if hasattr(file_path, "read"):
+        source = nullcontext(file_path)
+    else:
+        source = open(file_path, "r", encoding=encoding, newline="")
+    with source as csvfile:
+        reader = csv.reader(csvfile)
+        header: Optional[list[str]] = next(reader, None)
+        if not header:
+            return
+        plan = compile_plan(header, fields, empty)
+        width = len(header)
+        padding = [""] * width
+
+        for row in reader:
+            if not row:
+                # Linhas vazias são ignoradas (como no DictReader)
+                continue
+            if len(row) != width:
+                row = (row + padding)[:width]
+            row.append(None)
+            yield plan(row)
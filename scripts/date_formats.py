@@ -0,0 +1,124 @@
+"""
+Parse de datas com deteção do formato
+
+Cada DateParser (um por coluna/campo) descobre o formato da primeira data
+que vê e guarda-o: as seguintes são lidas pelo caminho rápido desse formato
+(fatias da string ou datetime.fromisoformat) e só voltam a testar os outros
+formatos se não encaixarem.
+
+    dates = DateParser(["%Y-%m-%d %H:%M:%S", "%d/%m/%Y"])
+    dates.parse("2025-11-19 08:30:00")
+
+Nas listas usadas pelos importadores, uma string só encaixa num formato (ou
+os que se sobrepõem dão a mesma data), por isso o resultado é o mesmo que
+testar a lista por ordem.
+"""
+
+from datetime import datetime
+from typing import Callable, Iterable, Optional
+
+# Formato especial: datetime.fromisoformat, aceitando o sufixo "Z"
+ISO_ANY = "iso"
+
+
+def _iso_any(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _iso_date(value: str) -> datetime:
+    if len(value) != 10 or value[4] != "-" or value[7] != "-":
+        raise ValueError(value)
+    return datetime(int(value[0:4]), int(value[5:7]), int(value[8:10]))
+
+
+def _iso_datetime(separator: str) -> Callable[[str], datetime]:
+    def parse(value: str) -> datetime:
+        if len(value) != 19 or value[10] != separator or value[4] != "-" or value[13] != ":":
+            raise ValueError(value)
+        return datetime(
+            int(value[0:4]), int(value[5:7]), int(value[8:10]),
+            int(value[11:13]), int(value[14:16]), int(value[17:19]),
+        )
+    return parse
+
+
+def _day_first_date(value: str) -> datetime:
+    if len(value) != 10 or value[2] != "/" or value[5] != "/":
+        raise ValueError(value)
+    return datetime(int(value[6:10]), int(value[3:5]), int(value[0:2]))
+
+
+def _day_first_datetime(value: str) -> datetime:
+    if len(value) != 19 or value[2] != "/" or value[5] != "/" or value[10] != " ":
+        raise ValueError(value)
+    return datetime(
+        int(value[6:10]), int(value[3:5]), int(value[0:2]),
+        int(value[11:13]), int(value[14:16]), int(value[17:19]),
+    )
+
+
+# Caminhos rápidos para os formatos dos exports Garmin (zero-padded).
+# Strings com outro aspeto (ex.: "1/2/2025") caem no strptime do mesmo formato.
+_FAST_PATHS: dict[str, Callable[[str], datetime]] = {
+    ISO_ANY: _iso_any,
+    "%Y-%m-%d": _iso_date,
+    "%Y-%m-%d %H:%M:%S": _iso_datetime(" "),
+    "%Y-%m-%dT%H:%M:%S": _iso_datetime("T"),
+    "%d/%m/%Y": _day_first_date,
+    "%d/%m/%Y %H:%M:%S": _day_first_datetime,
+}
+
+
+def _format_parser(fmt: str) -> Callable[[str], datetime]:
+    fast = _FAST_PATHS.get(fmt)
+    if fast is None or fmt == ISO_ANY:
+        return fast or (lambda value: datetime.strptime(value, fmt))
+
+    def parse(value: str) -> datetime:
+        try:
+            return fast(value)
+        except ValueError:
+            return datetime.strptime(value, fmt)
+    return parse
+
+
+class DateParser:
+    """Parse de datas de uma coluna, lembrando o último formato que resultou."""
+
+    def __init__(self, formats: Iterable[str]):
+        self.formats = list(formats)
+        self._parsers = [(fmt, _format_parser(fmt)) for fmt in self.formats]
+        self._current: Optional[tuple[str, Callable[[str], datetime]]] = None
+        self.detections = 0
+
+    @property
+    def detected_format(self) -> Optional[str]:
+        return self._current[0] if self._current else None
+
+    def parse(self, value) -> Optional[datetime]:
+        if not value:
+            return None
+        if isinstance(value, datetime):
+            return value
+
+        value = str(value).strip()
+        current = self._current
+        if current is not None:
+            try:
+                return current[1](value)
+            except ValueError:
+                pass
+
+        for entry in self._parsers:
+            if entry is current:
+                continue
+            try:
+                parsed = entry[1](value)
+            except ValueError:
+                continue
+            self._current = entry
+            self.detections += 1
+            return parsed
+        return None
+
+    __call__ = parse
@@ -0,0 +1,127 @@
+"""
+Estatísticas por janela de datas (esta semana, últimos 7/30/90 dias, mês e ano até hoje)
+
+As atividades ficam ordenadas pelo dia (array de inteiros, dia ordinal),
+com somas acumuladas de distância (metros inteiros, como em
+running_aggregates.py) e de tempo. Cada janela são dois bisect: totais em
+O(log n), e as atividades da janela em O(log n + k). A data de cada
+atividade é lida uma só vez, ao construir o índice.
+
+"this_week" é a semana ISO (segunda a domingo), a mesma dos rollups
+semanais e do cartão "Esta Semana" do site.
+
+Saída (secção "windows" do resumo), para cada janela:
+    {"runs", "distance", "time", "time_seconds", "start_date", "end_date"}
+
+    timeline = ActivityTimeline.build(activities)
+    summary["windows"] = timeline.windows()
+    summary["this_week"] = timeline.this_week()
+"""
+
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from typing import Iterable, Optional
+
+from rollups import activity_day
+
+WEEKLY_GOAL_KM = float(os.getenv("WEEKLY_GOAL_KM", "25"))
+WINDOWS = ("this_week", "last_7_days", "last_30_days", "last_90_days", "month_to_date", "year_to_date")
+
+
+def window_ranges(today: date) -> dict:
+    """(primeiro dia, último dia) de cada janela, inclusive."""
+    week_start = today - timedelta(days=today.weekday())
+    return {
+        "this_week": (week_start, week_start + timedelta(days=6)),
+        "last_7_days": (today - timedelta(days=6), today),
+        "last_30_days": (today - timedelta(days=29), today),
+        "last_90_days": (today - timedelta(days=89), today),
+        "month_to_date": (today.replace(day=1), today),
+        "year_to_date": (today.replace(month=1, day=1), today),
+    }
+
+
+def earliest_start(today: Optional[date] = None) -> date:
+    """Primeiro dia de que alguma janela precisa (para ler só esse período do store)."""
+    return min(first for first, _ in window_ranges(today or date.today()).values())
+
+
+def _format_time(seconds: int) -> str:
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def _meters(activity: dict) -> int:
+    try:
+        return int(round(float(activity.get("distance") or 0) * 1000))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _seconds(activity: dict) -> int:
+    value = activity.get("time_seconds")
+    if value is None:
+        value = activity.get("total_time")
+    try:
+        return int(round(float(value or 0)))
+    except (TypeError, ValueError):
+        return 0
+
+
+class ActivityTimeline:
+    """Atividades ordenadas por dia, com somas acumuladas para consultas por janela."""
+
+    def __init__(self, entries: list):
+        entries.sort(key=lambda entry: entry[0])
+        self.days = array("l", (day for day, _ in entries))
+        self._activities = [activity for _, activity in entries]
+        # Somas acumuladas: posição i = soma das i primeiras atividades
+        self._distance_m = array("q", [0])
+        self._seconds = array("q", [0])
+        for activity in self._activities:
+            self._distance_m.append(self._distance_m[-1] + _meters(activity))
+            self._seconds.append(self._seconds[-1] + _seconds(activity))
+
+    @classmethod
+    def build(cls, activities: Iterable[dict]) -> "ActivityTimeline":
+        """Índice das atividades com data (as sem data ficam de fora)."""
+        entries = []
+        for activity in activities:
+            day = activity_day(activity)
+            if day is not None:
+                entries.append((day.toordinal(), activity))
+        return cls(entries)
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def _bounds(self, first: date, last: date) -> tuple[int, int]:
+        return bisect_left(self.days, first.toordinal()), bisect_right(self.days, last.toordinal())
+
+    def activities_between(self, first: date, last: date) -> list:
+        """Atividades de `first` a `last` (inclusive), da mais antiga para a mais recente."""
+        start, end = self._bounds(first, last)
+        return self._activities[start:end]
+
+    def totals(self, first: date, last: date) -> dict:
+        """Totais de `first` a `last` (inclusive), sem percorrer as atividades."""
+        start, end = self._bounds(first, last)
+        seconds = self._seconds[end] - self._seconds[start]
+        return {
+            "runs": end - start,
+            "distance": round((self._distance_m[end] - self._distance_m[start]) / 1000, 2),
+            "time": _format_time(seconds),
+            "time_seconds": seconds,
+            "start_date": first.isoformat(),
+            "end_date": last.isoformat(),
+        }
+
+    def windows(self, today: Optional[date] = None) -> dict:
+        """Totais de todas as janelas (WINDOWS) em relação a `today`."""
+        ranges = window_ranges(today or date.today())
+        return {name: self.totals(*ranges[name]) for name in WINDOWS}
+
+    def this_week(self, today: Optional[date] = None, goal: float = WEEKLY_GOAL_KM) -> dict:
+        """Bloco "this_week" do resumo: semana ISO atual e objetivo semanal."""
+        return {**self.totals(*window_ranges(today or date.today())["this_week"]), "goal": goal}
@@ -0,0 +1,241 @@
+"""
+Duplicados entre fontes: a mesma corrida vinda do .FIT e do CSV (ou de dois exports)
+
+A assinatura exata (data, distância a 3 casas, tempo) não apanha a mesma
+corrida com arredondamentos diferentes (CSV com 2 casas, .FIT em metros) nem
+com a data em UTC (.FIT) de um lado e na hora local (CSV) do outro.
+
+Relógio de cada atividade: os parsers de .FIT/.GPX/.TCX marcam
+"clock": "utc" (a hora sem fuso é UTC); sem marca, a hora é local (CSV,
+atividades já publicadas). A hora local passa a UTC com o fuso de
+GARMIN_TIMEZONE (zoneinfo, ex.: "Europe/Lisbon"; por omissão o do sistema),
+com o desvio desse dia (horário de verão incluído). Datas com fuso explícito
+já são absolutas. Assim o .FIT e o CSV só se juntam se o desvio entre eles
+for o do fuso local nesse dia, e duas corridas da mesma fonte só se juntam
+com o mesmo início.
+
+Duas atividades são a mesma corrida se:
+- os inícios (em UTC) batem certo a menos de START_TOLERANCE_S. Atividades
+  só com data (hora 00:00:00) podem ter começado a qualquer hora desse dia;
+- a distância e a duração diferem menos de DISTANCE_TOLERANCE e
+  TIME_TOLERANCE (relativas, com um mínimo absoluto que cobre o
+  arredondamento do CSV). Se uma delas só tem a data, o início não confirma
+  nada e só vale o mínimo do arredondamento (duas corridas iguais no mesmo
+  dia continuam separadas).
+
+Índice: o início de cada atividade é um intervalo [lo, hi] (hi - lo < 1
+dia), guardado numa lista ordenada por lo. Os candidatos de uma atividade
+nova estão entre dois bisect (o dia dela, mais a tolerância), por isso cada
+verificação custa O(log n + k), com k as poucas corridas desses dias.
+Registar uma atividade (add) encontra a posição em O(log n), mas a inserção
+na lista desloca os elementos seguintes: O(n), feito por um memmove em C
+(microssegundos mesmo com dezenas de milhares de corridas).
+
+Ao juntar duas atividades fica a fonte mais rica (dados do stream dos .FIT
+primeiro, depois o nº de campos preenchidos), completada com os campos que
+só a outra tem.
+
+    index = DuplicateIndex()
+    for activity in activities:
+        if index.find(activity) is None:
+            index.add(activity)
+"""
+
+import os
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Iterable, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from date_formats import ISO_ANY, DateParser
+
+START_TOLERANCE_S = float(os.getenv("DUPLICATE_START_TOLERANCE_S", "60"))
+DISTANCE_TOLERANCE = float(os.getenv("DUPLICATE_DISTANCE_TOLERANCE", "0.01"))
+TIME_TOLERANCE = float(os.getenv("DUPLICATE_TIME_TOLERANCE", "0.01"))
+# Fuso das horas locais (CSV); vazio = fuso do sistema
+TIMEZONE = os.getenv("GARMIN_TIMEZONE", "")
+# Mínimos absolutos: o CSV arredonda a distância a 10 m e o tempo ao segundo
+MIN_DISTANCE_KM = 0.02
+MIN_TIME_S = 5
+DAY_S = 86_400
+# Maior desvio possível entre a hora local e UTC (UTC+14): margem para o sort_ts do store
+MAX_UTC_OFFSET_S = 14 * 3600
+
+CLOCK_KEY = "clock"
+CLOCK_UTC = "utc"
+
+# Campos que só existem com o stream por segundo (--records): fonte mais rica
+RICH_FIELDS = ("best_efforts", "track_id", "route_id", "hr_zones")
+_DEFAULT_VALUES = (None, "", 0, "Corrida", "--")
+
+_DATES = DateParser([
+    ISO_ANY,
+    "%Y-%m-%d %H:%M:%S",
+    "%Y/%m/%d %H:%M:%S",
+    "%d/%m/%Y %H:%M:%S",
+    "%d/%m/%Y",
+])
+
+
+@lru_cache(maxsize=None)
+def local_zone(name: str = "") -> Optional[ZoneInfo]:
+    """Fuso das horas locais; None = fuso do sistema (também se o nome não existir)."""
+    if not name:
+        return None
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        print(f"⚠️  GARMIN_TIMEZONE={name!r} desconhecido: a usar o fuso do sistema")
+        return None
+
+
+def _moment(activity: dict) -> Optional[datetime]:
+    for key in ("_dt", "start_time", "date", "iso_date"):
+        value = activity.get(key)
+        moment = value if isinstance(value, datetime) else _DATES.parse(value)
+        if moment is not None:
+            return moment
+    return None
+
+
+def _timestamp(moment: datetime, utc_clock: bool) -> float:
+    """Segundos Unix: com fuso, tal como está; sem fuso, UTC ou hora local (TIMEZONE)."""
+    if moment.tzinfo is None:
+        if utc_clock:
+            moment = moment.replace(tzinfo=timezone.utc)
+        else:
+            zone = local_zone(TIMEZONE)
+            if zone is not None:
+                moment = moment.replace(tzinfo=zone)
+    return moment.timestamp()
+
+
+def _seconds(activity: dict) -> float:
+    for key in ("time_seconds", "total_time"):
+        value = activity.get(key)
+        if isinstance(value, (int, float)) and value > 0:
+            return float(value)
+    return 0.0
+
+
+def run_key(activity: dict) -> Optional[tuple]:
+    """(início mín., início máx., km, segundos) da atividade em UTC, ou None sem data/distância."""
+    moment = _moment(activity)
+    try:
+        distance = float(activity.get("distance") or 0)
+    except (TypeError, ValueError):
+        distance = 0.0
+    seconds = _seconds(activity)
+    if moment is None or distance <= 0 or seconds <= 0:
+        return None
+    utc_clock = activity.get(CLOCK_KEY) == CLOCK_UTC
+    start = _timestamp(moment, utc_clock)
+    # Hora 00:00:00 = só a data (CSV sem hora, atividades já normalizadas): o dia inteiro
+    if (moment.hour, moment.minute, moment.second, moment.microsecond) == (0, 0, 0, 0):
+        return start, _timestamp(moment + timedelta(days=1), utc_clock) - 1, distance, seconds
+    return start, start, distance, seconds
+
+
+def _close(a: float, b: float, relative: float, minimum: float) -> bool:
+    return abs(a - b) <= max(minimum, relative * max(a, b))
+
+
+def same_run(key: tuple, other: tuple, start_tolerance: float = START_TOLERANCE_S) -> bool:
+    """Se duas chaves (run_key) são a mesma corrida."""
+    lo, hi, distance, seconds = key
+    other_lo, other_hi, other_distance, other_seconds = other
+    if lo > other_hi + start_tolerance or other_lo > hi + start_tolerance:
+        return False
+    # Só com a data, o início não confirma nada: só o arredondamento do CSV separa duas corridas
+    date_only = hi > lo or other_hi > other_lo
+    distance_tolerance = 0.0 if date_only else DISTANCE_TOLERANCE
+    time_tolerance = 0.0 if date_only else TIME_TOLERANCE
+    return (
+        _close(distance, other_distance, distance_tolerance, MIN_DISTANCE_KM)
+        and _close(seconds, other_seconds, time_tolerance, MIN_TIME_S)
+    )
+
+
+def richness(activity: dict) -> tuple:
+    """Para escolher a fonte a manter: (campos do stream, campos preenchidos)."""
+    filled = sum(1 for value in activity.values() if value not in _DEFAULT_VALUES and value != [] and value != {})
+    return sum(1 for key in RICH_FIELDS if activity.get(key)), filled
+
+
+def merge_duplicates(current: dict, incoming: dict) -> dict:
+    """A mais rica das duas (empate: `current`), com os campos vazios preenchidos pela outra."""
+    base, other = (incoming, current) if richness(incoming) > richness(current) else (current, incoming)
+    merged = dict(base)
+    for key, value in other.items():
+        if merged.get(key) in _DEFAULT_VALUES and value not in _DEFAULT_VALUES:
+            merged[key] = value
+    return merged
+
+
+class DuplicateIndex:
+    """Inícios das atividades ordenados (bisect) para procurar a mesma corrida noutra fonte."""
+
+    def __init__(self, start_tolerance: float = START_TOLERANCE_S):
+        self.start_tolerance = start_tolerance
+        self._starts: list[float] = []  # lo de cada chave, ordenado
+        self._entries: list[tuple] = []  # (chave, item), pela mesma ordem
+        self.compared = 0
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    @classmethod
+    def build(cls, activities: Iterable[dict]) -> "DuplicateIndex":
+        """Índice de atividades já conhecidas (ordenado de uma vez)."""
+        index = cls()
+        entries = [(key, activity) for activity in activities if (key := run_key(activity))]
+        entries.sort(key=lambda entry: entry[0][0])
+        index._entries = entries
+        index._starts = [key[0] for key, _ in entries]
+        return index
+
+    def add(self, activity: dict, item=None) -> None:
+        """
+        Regista a atividade; `item` é o que find() devolve (por omissão a própria
+        atividade). O(n) pela inserção nas listas (ver o topo do módulo).
+        """
+        key = run_key(activity)
+        if key is None:
+            return
+        position = bisect_right(self._starts, key[0])
+        self._starts.insert(position, key[0])
+        self._entries.insert(position, (key, activity if item is None else item))
+
+    def find(self, activity: dict):
+        """Item registado que é a mesma corrida que `activity`, ou None."""
+        key = run_key(activity)
+        if key is None:
+            return None
+        # lo dos candidatos: até 1 dia (atividade só com data) antes do início mínimo
+        first = bisect_left(self._starts, key[0] - self.start_tolerance - DAY_S)
+        last = bisect_right(self._starts, key[1] + self.start_tolerance)
+        for other, item in self._entries[first:last]:
+            self.compared += 1
+            if same_run(key, other, self.start_tolerance):
+                return item
+        return None
+
+
+def dedupe_activities(activities: Iterable[dict]) -> tuple[list, int]:
+    """
+    Atividades sem duplicados entre fontes, pela ordem da primeira ocorrência
+    (cada uma já junta com as repetições); devolve também o nº de juntas.
+    """
+    kept: list[dict] = []
+    index = DuplicateIndex()
+    merged = 0
+    for activity in activities:
+        position = index.find(activity)
+        if position is None:
+            index.add(activity, len(kept))
+            kept.append(activity)
+        else:
+            kept[position] = merge_duplicates(kept[position], activity)
+            merged += 1
+    return kept, merged
@@ -0,0 +1,352 @@
+"""
+Stream por segundo dos ficheiros .FIT (mensagens "record") em arrays NumPy
+
+O parse_fit_file só lê a sessão; aqui lê-se cada record (timestamp,
+distância, velocidade, FC, cadência, altitude e posição) para um bloco de
+colunas tipadas por atividade — a base das análises por corrida.
+
+    block = decode_records("data/garmin_exports/corrida.fit")
+    block["heart_rate"]          # float32, NaN onde a cinta falhou
+    cache = RecordCache()
+    block = cache.load(fit_path)  # decodifica uma vez, depois lê o .npz
+
+Dois decoders:
+- "fast": lê o binário FIT diretamente. Percorre os cabeçalhos das mensagens
+  em Python mas converte todos os records de uma vez com np.frombuffer
+  (sem criar um objeto por campo, como o fitparse).
+- "fitparse": usa o fitparse mensagem a mensagem (referência, mais lento).
+O modo "auto" usa o "fast" e recorre ao fitparse em ficheiros que este não
+suporta (ex.: timestamps comprimidos nos records).
+
+Campos em falta (valor inválido do FIT ou campo ausente) ficam NaN; records
+sem timestamp são descartados.
+"""
+
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timezone
+from pathlib import Path
+
+import numpy as np
+
+from parse_cache import file_sha256
+
+RECORDS_DIR = "data/cache/records"
+RECORDS_FORMAT = 1
+
+# Segundos entre o epoch Unix e o epoch FIT (1989-12-31 00:00:00 UTC)
+FIT_EPOCH_OFFSET = 631065600
+_RECORD_MESG = 20
+_SEMICIRCLES_TO_DEG = 180 / 2 ** 31
+
+# Colunas de cada bloco e o seu tipo
+COLUMNS = {
+    "timestamp": np.int64,     # segundos Unix (UTC)
+    "distance": np.float64,    # m
+    "speed": np.float32,       # m/s
+    "heart_rate": np.float32,  # bpm
+    "cadence": np.float32,     # rpm
+    "altitude": np.float32,    # m
+    "lat": np.float64,         # graus
+    "lon": np.float64,         # graus
+}
+
+# Campos da mensagem record: número -> (nome fitparse, tipo, escala, offset)
+_RECORD_FIELDS = {
+    253: ("timestamp", "u4", 1, 0),
+    0: ("position_lat", "i4", 1, 0),
+    1: ("position_long", "i4", 1, 0),
+    2: ("altitude", "u2", 5, 500),
+    3: ("heart_rate", "u1", 1, 0),
+    4: ("cadence", "u1", 1, 0),
+    5: ("distance", "u4", 100, 0),
+    6: ("speed", "u2", 1000, 0),
+    73: ("enhanced_speed", "u4", 1000, 0),
+    78: ("enhanced_altitude", "u4", 5, 500),
+}
+_FIELDS_BY_NAME = {spec[0]: spec for spec in _RECORD_FIELDS.values()}
+
+
+class FitFormatError(ValueError):
+    """Ficheiro .FIT inválido ou cortado."""
+
+
+class UnsupportedFit(ValueError):
+    """Ficheiro válido que o decoder rápido não suporta (usa o fitparse)."""
+
+
+class RecordBlock:
+    """Colunas de uma atividade: arrays do mesmo comprimento, um elemento por record."""
+
+    def __init__(self, columns: dict):
+        self.columns = {
+            name: np.asarray(columns[name], dtype=dtype) for name, dtype in COLUMNS.items()
+        }
+
+    @classmethod
+    def empty(cls) -> "RecordBlock":
+        return cls({name: np.empty(0, dtype) for name, dtype in COLUMNS.items()})
+
+    @classmethod
+    def concatenate(cls, blocks) -> "RecordBlock":
+        blocks = list(blocks)
+        if not blocks:
+            return cls.empty()
+        return cls({name: np.concatenate([b.columns[name] for b in blocks]) for name in COLUMNS})
+
+    def __len__(self) -> int:
+        return len(self.columns["timestamp"])
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in self.columns.values())
+
+    def equals(self, other: "RecordBlock") -> bool:
+        """Igualdade coluna a coluna (NaN == NaN)."""
+        return all(
+            np.array_equal(self.columns[name], other.columns[name], equal_nan=name != "timestamp")
+            for name in COLUMNS
+        )
+
+    def save(self, path) -> Path:
+        """Grava em .npz comprimido (escrita atómica)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(f, format=np.int64(RECORDS_FORMAT), **self.columns)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path) -> "RecordBlock":
+        with np.load(path) as data:
+            if int(data["format"]) != RECORDS_FORMAT:
+                raise ValueError(f"{path}: formato {int(data['format'])} != {RECORDS_FORMAT}")
+            return cls({name: data[name] for name in COLUMNS})
+
+
+def _scaled(raw: np.ndarray, scale: int, offset: int) -> np.ndarray:
+    """Valor físico (raw / escala - offset) com NaN nos valores inválidos do FIT."""
+    values = raw.astype(np.float64)
+    values[raw == np.iinfo(raw.dtype).max] = np.nan
+    return values / scale - offset
+
+
+def _columns_from_fields(fields: dict, count: int) -> dict:
+    """Converte {nome fitparse: array em float (NaN = em falta)} nas COLUMNS."""
+    missing = np.full(count, np.nan)
+
+    def pick(preferred, fallback=None):
+        value = fields.get(preferred, missing)
+        if fallback is not None and fallback in fields:
+            value = np.where(np.isnan(value), fields[fallback], value)
+        return value
+
+    timestamp = fields.get("timestamp", missing)
+    keep = ~np.isnan(timestamp)
+    columns = {
+        "timestamp": timestamp,
+        "distance": pick("distance"),
+        "speed": pick("enhanced_speed", "speed"),
+        "heart_rate": pick("heart_rate"),
+        "cadence": pick("cadence"),
+        "altitude": pick("enhanced_altitude", "altitude"),
+        "lat": pick("position_lat") * _SEMICIRCLES_TO_DEG,
+        "lon": pick("position_long") * _SEMICIRCLES_TO_DEG,
+    }
+    return {name: value[keep] for name, value in columns.items()}
+
+
+class _Definition:
+    __slots__ = ("global_num", "size", "dtype")
+
+    def __init__(self, global_num: int, size: int, dtype):
+        self.global_num = global_num
+        self.size = size
+        self.dtype = dtype
+
+
+def _record_dtype(fields: bytes, big_endian: bool, size: int) -> np.dtype:
+    """dtype estruturado com os campos conhecidos da definição (o resto é saltado)."""
+    names, formats, offsets = [], [], []
+    offset = 0
+    for index in range(0, len(fields), 3):
+        field_num, field_size = fields[index], fields[index + 1]
+        known = _RECORD_FIELDS.get(field_num)
+        # Tamanho diferente do esperado = array ou tipo inesperado: ignora o campo
+        if known and np.dtype(known[1]).itemsize == field_size:
+            names.append(known[0])
+            formats.append((">" if big_endian else "<") + known[1])
+            offsets.append(offset)
+        offset += field_size
+    return np.dtype({"names": names, "formats": formats, "offsets": offsets, "itemsize": size})
+
+
+def _decode_run(buffer: np.ndarray, definition: _Definition, offsets: list) -> dict:
+    rows = buffer[np.asarray(offsets)[:, None] + np.arange(definition.size)]
+    raw = rows.view(definition.dtype).ravel()
+    fields = {}
+    for name in definition.dtype.names:
+        _, _, scale, offset = _FIELDS_BY_NAME[name]
+        values = raw[name]
+        if name == "timestamp":
+            valid = values != np.iinfo(values.dtype).max
+            fields[name] = np.where(valid, values.astype(np.float64) + FIT_EPOCH_OFFSET, np.nan)
+        else:
+            fields[name] = _scaled(values, scale, offset)
+    return _columns_from_fields(fields, len(raw))
+
+
+def decode_records_fast(file_path) -> RecordBlock:
+    """Decoder rápido: lê o binário FIT e converte os records em bloco."""
+    data = Path(file_path).read_bytes()
+    if len(data) < 12 or data[8:12] != b".FIT":
+        raise FitFormatError(f"{file_path}: não é um ficheiro FIT")
+    header_size = data[0]
+    end = header_size + struct.unpack_from("<I", data, 4)[0]
+    if end > len(data):
+        raise FitFormatError(f"{file_path}: ficheiro cortado")
+
+    definitions = {}
+    # Records seguidos com a mesma definição formam um "run" (lista de offsets)
+    runs = []
+    current = None
+    pos = header_size
+    try:
+        while pos < end:
+            header = data[pos]
+            if header & 0x80:
+                definition = definitions[(header >> 5) & 0x03]
+                if definition.dtype is not None:
+                    raise UnsupportedFit(f"{file_path}: records com timestamp comprimido")
+                pos += 1 + definition.size
+            elif header & 0x40:
+                big_endian = data[pos + 2] == 1
+                global_num = int.from_bytes(data[pos + 3:pos + 5], "big" if big_endian else "little")
+                field_count = data[pos + 5]
+                fields = data[pos + 6:pos + 6 + 3 * field_count]
+                pos += 6 + 3 * field_count
+                size = sum(fields[1::3])
+                if header & 0x20:  # campos de developer: só contam para o tamanho
+                    dev_count = data[pos]
+                    size += sum(data[pos + 2:pos + 1 + 3 * dev_count:3])
+                    pos += 1 + 3 * dev_count
+                dtype = _record_dtype(fields, big_endian, size) if global_num == _RECORD_MESG else None
+                definitions[header & 0x0F] = _Definition(global_num, size, dtype)
+            else:
+                definition = definitions[header & 0x0F]
+                if definition.dtype is not None:
+                    if current is None or current[0] is not definition:
+                        current = (definition, [])
+                        runs.append(current)
+                    current[1].append(pos + 1)
+                pos += 1 + definition.size
+    except (KeyError, IndexError):
+        raise FitFormatError(f"{file_path}: mensagem sem definição ou cortada") from None
+    if pos > end:
+        raise FitFormatError(f"{file_path}: última mensagem cortada")
+
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    return RecordBlock.concatenate(
+        RecordBlock(_decode_run(buffer, definition, offsets)) for definition, offsets in runs
+    )
+
+
+def decode_records_fitparse(file_path) -> RecordBlock:
+    """Decoder de referência: fitparse, record a record."""
+    from fitparse import FitFile
+
+    names = list(_FIELDS_BY_NAME)
+    values = {name: [] for name in names}
+    for message in FitFile(str(file_path)).get_messages("record"):
+        record = message.get_values()
+        for name in names:
+            value = record.get(name)
+            if name == "timestamp" and value is not None:
+                value = value.replace(tzinfo=timezone.utc).timestamp()
+            values[name].append(np.nan if value is None else value)
+
+    count = len(values["timestamp"])
+    fields = {name: np.asarray(column, dtype=np.float64) for name, column in values.items()}
+    return RecordBlock(_columns_from_fields(fields, count))
+
+
+DECODERS = {"fast": decode_records_fast, "fitparse": decode_records_fitparse}
+
+
+def decode_records(file_path, decoder: str = "auto") -> RecordBlock:
+    """Bloco de records de um .FIT (ou .GPX/.TCX). decoder: "auto", "fast" ou "fitparse"."""
+    if Path(file_path).suffix.lower() in (".gpx", ".tcx"):
+        from xml_activities import decode_xml_records
+        return decode_xml_records(file_path)
+    if decoder != "auto":
+        return DECODERS[decoder](file_path)
+    try:
+        return decode_records_fast(file_path)
+    except UnsupportedFit:
+        return decode_records_fitparse(file_path)
+
+
+class RecordCache:
+    """
+    Blocos já decodificados, um .npz por conteúdo de .FIT (hash SHA-256):
+    <directory>/<sha256>.npz
+    """
+
+    def __init__(self, directory: str = RECORDS_DIR, decoder: str = "auto"):
+        self.directory = Path(directory)
+        self.decoder = decoder
+        self.hits = 0
+        self.misses = 0
+
+    def path_for(self, digest: str) -> Path:
+        return self.directory / f"{digest}.npz"
+
+    def load(self, fit_path, digest: str | None = None) -> RecordBlock:
+        path = self.path_for(digest or file_sha256(fit_path))
+        if path.exists():
+            try:
+                block = RecordBlock.load(path)
+                self.hits += 1
+                return block
+            except (OSError, ValueError, KeyError):
+                pass  # cache antigo ou corrompido: volta a decodificar
+        self.misses += 1
+        block = decode_records(fit_path, self.decoder)
+        block.save(path)
+        return block
+
+
+def _ingest_worker(args):
+    """Decodifica e guarda um .FIT; devolve (ficheiro, nº de records, hit, análise, erro)."""
+    fit_path, directory, decoder, analyze = args
+    cache = RecordCache(directory, decoder)
+    try:
+        digest = file_sha256(fit_path)
+        block = cache.load(fit_path, digest)
+        analysis = analyze(block, digest) if analyze else None
+        return fit_path, len(block), cache.hits > 0, analysis, None
+    except Exception as error:  # ficheiro corrompido não pode parar o lote
+        return fit_path, 0, False, None, f"{type(error).__name__}: {error}"
+
+
+def ingest_fit_records(fit_files, workers: int = 1, directory: str = RECORDS_DIR,
+                       decoder: str = "auto", analyze=None):
+    """
+    Garante um bloco em cache para cada .FIT (só decodifica os novos).
+    `analyze(block, digest)` (função de módulo, para poder ir para os workers)
+    corre sobre cada bloco no mesmo processo que o leu.
+    Os resultados chegam pela ordem de fit_files: (ficheiro, records, hit, análise, erro).
+    """
+    jobs = [(str(fit_file), directory, decoder, analyze) for fit_file in fit_files]
+    if workers <= 1 or len(jobs) <= 1:
+        yield from map(_ingest_worker, jobs)
+        return
+    chunksize = max(1, min(16, len(jobs) // (workers * 4)))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(_ingest_worker, jobs, chunksize=chunksize)
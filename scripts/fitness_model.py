@@ -0,0 +1,211 @@
+"""
+Forma física: carga aguda (ATL), crónica (CTL) e forma (TSB) por dia
+
+A carga de cada dia é a soma do TRIMP das corridas desse dia (training_load.py).
+ATL e CTL são médias exponenciais dessa carga (7 e 42 dias por omissão):
+    atl += (carga - atl) × (1 - e^(-1/7))      tsb = ctl - atl
+
+O estado é guardado com checkpoints (ATL/CTL no fim de cada domingo, o fim
+da semana do this_week). Corridas novas só fazem avançar o modelo a partir
+do último dia calculado; uma corrida com data anterior obriga a recalcular
+apenas desde o checkpoint anterior a essa data.
+
+Saída (secção "fitness" do resumo):
+    {"current": {...}, "daily": [{"date", "load", "atl", "ctl", "tsb"}, ...]}
+"daily" cobre os últimos FITNESS_DAYS dias. O estado para retomar (to_dict:
+todas as cargas diárias e checkpoints) não vai para o site: fica no meta do
+activity store (update_training_data.py) ou em FITNESS_STATE_FILE
+(import_garmin_incremental.py), com o hash do JSON escrito na mesma
+execução para saber, sem voltar a ler o histórico, se ainda lhe corresponde.
+"""
+
+import json
+import math
+import os
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Iterable, Optional
+
+from rollups import activity_day
+from training_load import activity_load
+
+ATL_DAYS = int(os.getenv("FITNESS_ATL_DAYS", "7"))
+CTL_DAYS = int(os.getenv("FITNESS_CTL_DAYS", "42"))
+SERIES_DAYS = int(os.getenv("FITNESS_DAYS", "365"))
+STATE_FORMAT = 1
+FITNESS_STATE_FILE = "data/cache/fitness_state.json"
+# Dia da semana dos checkpoints (domingo, fim da semana ISO)
+_CHECKPOINT_WEEKDAY = 6
+
+
+class FitnessModel:
+    """Carga diária + checkpoints de ATL/CTL, atualizáveis incrementalmente."""
+
+    def __init__(self, atl_days: int = ATL_DAYS, ctl_days: int = CTL_DAYS):
+        self.atl_days = atl_days
+        self.ctl_days = ctl_days
+        self.loads: dict[str, int] = {}  # dia ISO -> TRIMP em décimas (soma exata)
+        self.checkpoints: dict[str, list] = {}  # domingo ISO -> [atl, ctl] no fim do dia
+        self.start: Optional[date] = None
+        self.computed_until: Optional[date] = None
+        self.last = (0.0, 0.0)  # [atl, ctl] no fim de computed_until
+        self.runs = 0
+        self._dirty_from: Optional[date] = None
+        self.replayed_days = 0
+
+    @classmethod
+    def load(cls, path: str = FITNESS_STATE_FILE,
+             source: Optional[str] = None) -> Optional["FitnessModel"]:
+        """
+        Estado guardado com save(); None se não existir, usar outras constantes
+        ou tiver sido gravado para outro histórico (`source` diferente, ex.: o
+        hash do JSON escrito junto com o estado).
+        """
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if source is not None and data.get("source") != source:
+            return None
+        return cls.from_dict(data)
+
+    def save(self, path: str = FITNESS_STATE_FILE, source: Optional[str] = None) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        state = self.to_dict()
+        if source is not None:
+            state["source"] = source
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(state, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def from_dict(cls, data: Optional[dict]) -> Optional["FitnessModel"]:
+        """Retoma o estado guardado; None se não existir ou usar outras constantes."""
+        if not isinstance(data, dict) or data.get("format") != STATE_FORMAT:
+            return None
+        if (data.get("atl_days"), data.get("ctl_days")) != (ATL_DAYS, CTL_DAYS):
+            return None
+        model = cls()
+        model.runs = data.get("runs", 0)
+        model.loads = dict(data.get("loads") or {})
+        model.checkpoints = dict(data.get("checkpoints") or {})
+        if data.get("start"):
+            model.start = date.fromisoformat(data["start"])
+        if data.get("computed_until"):
+            model.computed_until = date.fromisoformat(data["computed_until"])
+            model.last = tuple(data["last"])
+        return model
+
+    def to_dict(self) -> dict:
+        return {
+            "format": STATE_FORMAT,
+            "atl_days": self.atl_days,
+            "ctl_days": self.ctl_days,
+            "runs": self.runs,
+            "start": self.start.isoformat() if self.start else None,
+            "computed_until": self.computed_until.isoformat() if self.computed_until else None,
+            "last": list(self.last),
+            "loads": dict(sorted(self.loads.items())),
+            "checkpoints": dict(sorted(self.checkpoints.items())),
+        }
+
+    @classmethod
+    def recompute(cls, activities: Iterable[dict], until: Optional[date] = None) -> "FitnessModel":
+        model = cls()
+        model.add_many(activities)
+        model.advance(until or date.today())
+        return model
+
+    def add_many(self, activities: Iterable[dict]) -> None:
+        for activity in activities:
+            self.add(activity)
+
+    def add(self, activity: dict) -> None:
+        """Soma o TRIMP da atividade à carga do seu dia (o cálculo fica para advance)."""
+        day = activity_day(activity)
+        if day is None:
+            return
+        self.runs += 1
+        tenths = int(round(activity_load(activity).get("trimp", 0) * 10))
+        key = day.isoformat()
+        self.loads[key] = self.loads.get(key, 0) + tenths
+        if self.start is None or day < self.start:
+            self.start = day
+        if self._dirty_from is None or day < self._dirty_from:
+            self._dirty_from = day
+
+    def _resume_point(self, day: date) -> tuple[date, float, float]:
+        """Primeiro dia a calcular e ATL/CTL na véspera, a partir do checkpoint anterior a `day`."""
+        before = [key for key in self.checkpoints if key < day.isoformat()]
+        if not before or self.start is None:
+            return self.start, 0.0, 0.0
+        key = max(before)
+        atl, ctl = self.checkpoints[key]
+        return date.fromisoformat(key) + timedelta(days=1), atl, ctl
+
+    def _replay(self, first: date, until: date, save: bool):
+        """Gera (dia, carga, atl, ctl) de `first` até `until`; save=True regrava checkpoints."""
+        day, atl, ctl = self._resume_point(first)
+        atl_factor = 1 - math.exp(-1 / self.atl_days)
+        ctl_factor = 1 - math.exp(-1 / self.ctl_days)
+        while day <= until:
+            key = day.isoformat()
+            load = self.loads.get(key, 0) / 10
+            atl += (load - atl) * atl_factor
+            ctl += (load - ctl) * ctl_factor
+            self.replayed_days += 1
+            if save and day.weekday() == _CHECKPOINT_WEEKDAY:
+                self.checkpoints[key] = [atl, ctl]
+            yield day, load, atl, ctl
+            day += timedelta(days=1)
+
+    def advance(self, until: date) -> None:
+        """Calcula até `until`, só a partir do que mudou (dias novos ou corrida antiga)."""
+        if self.start is None:
+            return
+        first = self.start
+        if self.computed_until is not None:
+            first = self.computed_until + timedelta(days=1)
+        if self._dirty_from is not None:
+            first = min(first, self._dirty_from)
+        until = max(until, self.computed_until or until)
+        if first > until:
+            return
+        # Checkpoints depois do primeiro dia alterado deixam de ser válidos
+        stale = first.isoformat()
+        self.checkpoints = {k: v for k, v in self.checkpoints.items() if k < stale}
+        for _, _, atl, ctl in self._replay(first, until, save=True):
+            pass
+        self.last = (atl, ctl)
+        self.computed_until = until
+        self._dirty_from = None
+
+    def series(self, days: int = SERIES_DAYS) -> list[dict]:
+        """Série diária dos últimos `days` dias calculados (do mais antigo para o mais recente)."""
+        if self.computed_until is None:
+            return []
+        first = max(self.start, self.computed_until - timedelta(days=days - 1))
+        return [
+            {
+                "date": day.isoformat(),
+                "load": round(load, 1),
+                "atl": round(atl, 1),
+                "ctl": round(ctl, 1),
+                "tsb": round(ctl - atl, 1),
+            }
+            for day, load, atl, ctl in self._replay(first, self.computed_until, save=False)
+            if day >= first
+        ]
+
+    def to_summary(self, days: int = SERIES_DAYS) -> dict:
+        atl, ctl = self.last
+        current = None
+        if self.computed_until is not None:
+            current = {
+                "date": self.computed_until.isoformat(),
+                "atl": round(atl, 1),
+                "ctl": round(ctl, 1),
+                "tsb": round(ctl - atl, 1),
+            }
+        return {"current": current, "daily": self.series(days)}
@@ -0,0 +1,154 @@
+"""
+Leitura direta do export completo da conta Garmin (ZIP, com ZIPs lá dentro)
+
+Os .FIT/.GPX/.TCX/.CSV são lidos de dentro do arquivo, sem extrair nada
+para disco:
+- cada membro é identificado pela cadeia de nomes desde o ZIP exterior
+  (ex.: "export.zip!DI_CONNECT/UploadedFiles_Part1.zip!123.fit");
+- um ZIP interior é copiado para um SpooledTemporaryFile (em memória até
+  SPOOL_MAX_BYTES) porque o zipfile precisa de saltar para o diretório no
+  fim do ficheiro, e isso num membro comprimido obrigaria a descomprimir
+  tudo outra vez a cada salto;
+- com workers > 1, cada processo abre o arquivo por si e mantém aberto o
+  último ZIP interior usado (os membros seguidos do mesmo ZIP são enviados
+  em lotes, por isso cada processo abre cada ZIP interior poucas vezes);
+- o hash SHA-256 do conteúdo é calculado no worker: membros com hash em
+  `known` (já importados) não voltam a passar pelo parser;
+- um ZIP (interior ou exterior) corrompido dá um resultado com erro para
+  esse ZIP, tal como um membro corrompido, e a leitura continua.
+
+    for label, digest, known, data, error in iter_archive_results(["export.zip"], parse):
+        ...
+"""
+
+import hashlib
+import shutil
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from typing import Callable, Iterator
+
+ARCHIVE_SUFFIXES = (".fit", ".gpx", ".tcx", ".csv")
+SPOOL_MAX_BYTES = 64 * 1024 * 1024
+LABEL_SEPARATOR = "!"
+
+# Estado de cada processo: hashes já importados e o último ZIP (interior) aberto
+_KNOWN: frozenset = frozenset()
+_OPEN = {"key": None, "zip": None, "stack": None}
+
+
+def member_label(archive_path: str, chain: tuple) -> str:
+    return LABEL_SEPARATOR.join((str(archive_path), *chain))
+
+
+def _open_nested(stack: ExitStack, container: zipfile.ZipFile, name: str) -> zipfile.ZipFile:
+    spool = stack.enter_context(tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES))
+    with container.open(name) as member:
+        shutil.copyfileobj(member, spool, 1024 * 1024)
+    spool.seek(0)
+    return stack.enter_context(zipfile.ZipFile(spool))
+
+
+def _error(error: Exception) -> str:
+    return f"{type(error).__name__}: {error}"
+
+
+def _walk(stack: ExitStack, container: zipfile.ZipFile, prefix: tuple) -> Iterator[tuple]:
+    for info in container.infolist():
+        if info.is_dir():
+            continue
+        chain = (*prefix, info.filename)
+        name = info.filename.lower()
+        if name.endswith(".zip"):
+            with ExitStack() as nested_stack:
+                try:
+                    nested = _open_nested(nested_stack, container, info.filename)
+                except (zipfile.BadZipFile, OSError, EOFError) as error:
+                    # ZIP interior corrompido: fica como erro, os outros continuam
+                    yield chain, _error(error)
+                    continue
+                yield from _walk(nested_stack, nested, chain)
+        elif name.endswith(ARCHIVE_SUFFIXES):
+            yield chain, None
+
+
+def iter_archive_members(archive_path: str) -> Iterator[tuple]:
+    """
+    (cadeia de nomes, erro) de todos os ficheiros de atividade do arquivo; a
+    cadeia é (ZIP interior..., ficheiro) e o erro só existe para ZIPs que não
+    se conseguem abrir (cadeia até esse ZIP, vazia se for o próprio arquivo).
+    """
+    with ExitStack() as stack:
+        try:
+            outer = stack.enter_context(zipfile.ZipFile(archive_path))
+        except (zipfile.BadZipFile, OSError) as error:
+            yield (), _error(error)
+            return
+        yield from _walk(stack, outer, ())
+
+
+def _container(archive_path: str, nested: tuple) -> zipfile.ZipFile:
+    """ZIP que contém o membro; reutiliza o anterior se for o mesmo."""
+    key = (archive_path, nested)
+    if _OPEN["key"] != key:
+        close_containers()
+        stack = ExitStack()
+        container = stack.enter_context(zipfile.ZipFile(archive_path))
+        for name in nested:
+            container = _open_nested(stack, container, name)
+        _OPEN.update(key=key, zip=container, stack=stack)
+    return _OPEN["zip"]
+
+
+def close_containers() -> None:
+    if _OPEN["stack"] is not None:
+        _OPEN["stack"].close()
+    _OPEN.update(key=None, zip=None, stack=None)
+
+
+def _init_worker(known: frozenset) -> None:
+    global _KNOWN
+    _KNOWN = known
+
+
+def _archive_worker(task) -> tuple:
+    """Lê, calcula o hash e faz parse de um membro: (label, hash, conhecido, dados, erro)."""
+    archive_path, chain, parse, error = task
+    label = member_label(archive_path, chain)
+    if error:
+        return label, None, False, None, error
+    try:
+        data = _container(archive_path, chain[:-1]).read(chain[-1])
+        digest = hashlib.sha256(data).hexdigest()
+        if digest in _KNOWN:
+            return label, digest, True, None, None
+        return label, digest, False, parse(chain[-1], data), None
+    except Exception as error:  # membro corrompido não pode parar o lote
+        return label, None, False, None, _error(error)
+
+
+def iter_archive_results(archives, parse: Callable, workers: int = 1,
+                         known: set = frozenset(), chunksize: int = 32) -> Iterator[tuple]:
+    """
+    (label, hash, conhecido, dados, erro) de cada ficheiro dos arquivos, pela
+    ordem do arquivo. parse(nome, bytes) tem de ser uma função de módulo
+    (é enviada para os workers).
+    """
+    tasks = (
+        (str(archive_path), chain, parse, error)
+        for archive_path in archives
+        for chain, error in iter_archive_members(archive_path)
+    )
+    if workers <= 1:
+        _init_worker(frozenset(known))
+        try:
+            for task in tasks:
+                yield _archive_worker(task)
+        finally:
+            close_containers()
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(frozenset(known),)) as pool:
+        yield from pool.map(_archive_worker, tasks, chunksize=chunksize)
@@ -0,0 +1,153 @@
+"""
+Trajetos GPS simplificados para os mapas de cada corrida
+
+O stream de posições de um .FIT (fit_records.py) tem milhares de pontos por
+corrida. Aqui cada trajeto é:
+1. projetado em metros (equiretangular à volta da latitude média);
+2. simplificado com Douglas-Peucker (tolerância em metros, TRACK_TOLERANCE_M);
+   cada segmento é avaliado de uma vez em NumPy — o ciclo Python é só por
+   ponto mantido, não por ponto do trajeto;
+3. codificado como polyline (formato do Google Maps, precisão 1e-5);
+4. escrito em public/data/garmin/tracks/<id>.json, com id = início do hash
+   SHA-256 do .FIT. Ficheiros já gerados com a mesma tolerância são saltados.
+
+    track = write_track(block, digest)   # {"id": ..., "polyline": ..., ...} ou None
+    lat, lon = decode_polyline(track["polyline"])
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+TRACKS_DIR = "public/data/garmin/tracks"
+TOLERANCE_M = float(os.getenv("TRACK_TOLERANCE_M", "5"))
+POLYLINE_PRECISION = 5
+TRACK_ID_LENGTH = 16
+_EARTH_RADIUS_M = 6_371_000
+
+
+def track_id(digest: str) -> str:
+    return digest[:TRACK_ID_LENGTH]
+
+
+def track_positions(block) -> tuple[np.ndarray, np.ndarray]:
+    """Latitude/longitude válidas (sem NaN) de um RecordBlock, pela ordem do trajeto."""
+    lat, lon = block["lat"], block["lon"]
+    valid = ~(np.isnan(lat) | np.isnan(lon))
+    return lat[valid], lon[valid]
+
+
+def project_meters(lat: np.ndarray, lon: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Projeção equiretangular local (suficiente para a escala de uma corrida)."""
+    lat0 = np.radians(np.mean(lat))
+    x = np.radians(lon) * np.cos(lat0) * _EARTH_RADIUS_M
+    y = np.radians(lat) * _EARTH_RADIUS_M
+    return x, y
+
+
+def douglas_peucker(x: np.ndarray, y: np.ndarray, tolerance: float) -> np.ndarray:
+    """Índices dos pontos mantidos (sempre inclui o primeiro e o último)."""
+    count = len(x)
+    if count <= 2:
+        return np.arange(count)
+    keep = np.zeros(count, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, count - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        px, py = x[start + 1:end], y[start + 1:end]
+        dx, dy = x[end] - x[start], y[end] - y[start]
+        length = np.hypot(dx, dy)
+        if length == 0:  # volta ao ponto de partida: distância ao ponto
+            distances = np.hypot(px - x[start], py - y[start])
+        else:
+            distances = np.abs(dy * (px - x[start]) - dx * (py - y[start])) / length
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            index = start + 1 + farthest
+            keep[index] = True
+            stack.append((start, index))
+            stack.append((index, end))
+    return np.flatnonzero(keep)
+
+
+def encode_polyline(lat: np.ndarray, lon: np.ndarray, precision: int = POLYLINE_PRECISION) -> str:
+    """Codifica pontos no formato polyline (diferenças entre pontos, 5 bits por carácter)."""
+    scale = 10 ** precision
+    points = np.column_stack([np.round(lat * scale), np.round(lon * scale)]).astype(np.int64)
+    deltas = np.diff(points, axis=0, prepend=np.zeros((1, 2), dtype=np.int64)).ravel()
+    # Sinal no bit menos significativo (negativos invertidos)
+    values = np.where(deltas < 0, ~(deltas << 1), deltas << 1)
+    chars = []
+    for value in values.tolist():
+        while value >= 0x20:
+            chars.append(chr((0x20 | (value & 0x1F)) + 63))
+            value >>= 5
+        chars.append(chr(value + 63))
+    return "".join(chars)
+
+
+def decode_polyline(encoded: str, precision: int = POLYLINE_PRECISION) -> tuple[np.ndarray, np.ndarray]:
+    values, value, shift = [], 0, 0
+    for char in encoded:
+        chunk = ord(char) - 63
+        value |= (chunk & 0x1F) << shift
+        shift += 5
+        if chunk < 0x20:
+            values.append(~(value >> 1) if value & 1 else value >> 1)
+            value, shift = 0, 0
+    points = np.cumsum(np.array(values, dtype=np.int64).reshape(-1, 2), axis=0) / 10 ** precision
+    return points[:, 0], points[:, 1]
+
+
+def simplify_track(block, tolerance: float = TOLERANCE_M) -> Optional[dict]:
+    """Trajeto simplificado de um RecordBlock, ou None se não tiver GPS."""
+    lat, lon = track_positions(block)
+    if len(lat) < 2:
+        return None
+    kept = douglas_peucker(*project_meters(lat, lon), tolerance)
+    lat, lon = lat[kept], lon[kept]
+    return {
+        "polyline": encode_polyline(lat, lon),
+        "points": len(kept),
+        "source_points": int(len(block)),
+        "tolerance_m": tolerance,
+        "bounds": [
+            [round(float(lat.min()), 5), round(float(lon.min()), 5)],
+            [round(float(lat.max()), 5), round(float(lon.max()), 5)],
+        ],
+    }
+
+
+def load_track(digest: str, out_dir: str = TRACKS_DIR) -> Optional[dict]:
+    path = Path(out_dir) / f"{track_id(digest)}.json"
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_track(block, digest: str, out_dir: str = TRACKS_DIR,
+                tolerance: float = TOLERANCE_M) -> Optional[dict]:
+    """
+    Escreve o trajeto do .FIT (identificado pelo hash) se ainda não existir
+    com esta tolerância. Devolve o trajeto (novo ou já existente).
+    """
+    existing = load_track(digest, out_dir)
+    if existing is not None and existing.get("tolerance_m") == tolerance:
+        return existing
+    track = simplify_track(block, tolerance)
+    if track is None:
+        return None
+    track = {"id": track_id(digest), **track}
+    path = Path(out_dir) / f"{track['id']}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(track, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp_path, path)
+    return track
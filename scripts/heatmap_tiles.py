@@ -0,0 +1,260 @@
+"""
+Heatmap de todas as corridas em tiles estáticos (PNG 256×256, esquema z/x/y)
+
+Fonte: os trajetos simplificados de gps_tracks.py (public/data/garmin/tracks).
+Para cada zoom (HEATMAP_ZOOMS, por omissão 10,12,14):
+1. a polyline é projetada em píxeis Web Mercator e densificada (um ponto por
+   píxel ao longo de cada segmento), tudo em NumPy;
+2. cada corrida conta no máximo 1 vez por píxel (np.unique), e as contagens
+   são somadas por tile com np.bincount;
+3. cada tile tocado é desenhado em PNG (escala log, saturada em
+   HEATMAP_SATURATION corridas — uma escala fixa, para que uma corrida nova
+   não obrigue a redesenhar tiles onde não passou).
+
+As contagens ficam em data/cache/heatmap/ com a lista de trajetos já
+incluídos: uma corrida nova só redesenha os tiles por onde passa. Se a
+configuração mudar, um trajeto desaparecer ou a cache não existir, tudo é
+recalculado.
+
+Saída em public/data/garmin/heatmap/:
+    <z>/<x>/<y>.png
+    index.json   {"zooms", "tile_size", "saturation", "tracks", "tiles": {"<z>": ["x/y", ...]}}
+
+    python scripts/heatmap_tiles.py            # incremental
+    python scripts/heatmap_tiles.py --rebuild  # recalcula tudo
+"""
+
+import argparse
+import json
+import math
+import os
+import shutil
+import struct
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+from gps_tracks import TRACKS_DIR, decode_polyline
+
+HEATMAP_DIR = "public/data/garmin/heatmap"
+HEATMAP_CACHE_DIR = "data/cache/heatmap"
+ZOOMS = tuple(int(zoom) for zoom in os.getenv("HEATMAP_ZOOMS", "10,12,14").split(","))
+SATURATION = int(os.getenv("HEATMAP_SATURATION", "20"))
+TILE_SIZE = 256
+STATE_FORMAT = 1
+_MAX_LATITUDE = 85.05112878
+
+# Cores (RGBA) ao longo da intensidade 0..1: azul escuro -> vermelho -> amarelo
+_PALETTE_STOPS = np.array([0.0, 0.4, 0.75, 1.0])
+_PALETTE = np.array([
+    [40, 60, 190, 110],
+    [200, 40, 90, 180],
+    [250, 120, 30, 220],
+    [255, 240, 120, 255],
+], dtype=np.float64)
+
+
+def world_pixels(lat: np.ndarray, lon: np.ndarray, zoom: int) -> tuple[np.ndarray, np.ndarray]:
+    """Coordenadas Web Mercator em píxeis (float) no zoom dado."""
+    world = TILE_SIZE * 2 ** zoom
+    lat = np.radians(np.clip(lat, -_MAX_LATITUDE, _MAX_LATITUDE))
+    x = (lon + 180.0) / 360.0 * world
+    y = (1.0 - np.log(np.tan(lat) + 1.0 / np.cos(lat)) / math.pi) / 2.0 * world
+    return x, y
+
+
+def densify(x: np.ndarray, y: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Pontos ao longo de cada segmento, a menos de 1 píxel uns dos outros."""
+    if len(x) < 2:
+        return x, y
+    dx, dy = np.diff(x), np.diff(y)
+    steps = np.maximum(np.ceil(np.hypot(dx, dy)).astype(np.int64), 1)
+    segment = np.repeat(np.arange(len(steps)), steps)
+    # Fração ao longo do segmento: 0, 1/n, ..., (n-1)/n
+    offsets = np.arange(len(segment)) - np.repeat(np.cumsum(steps) - steps, steps)
+    fraction = offsets / steps[segment]
+    return (
+        np.append(x[segment] + dx[segment] * fraction, x[-1]),
+        np.append(y[segment] + dy[segment] * fraction, y[-1]),
+    )
+
+
+def track_pixels(lat: np.ndarray, lon: np.ndarray, zoom: int) -> np.ndarray:
+    """Píxeis (id = y × largura do mundo + x) por onde o trajeto passa, sem repetidos."""
+    world = TILE_SIZE * 2 ** zoom
+    x, y = densify(*world_pixels(lat, lon, zoom))
+    x = np.clip(x.astype(np.int64), 0, world - 1)
+    y = np.clip(y.astype(np.int64), 0, world - 1)
+    return np.unique(y * world + x)
+
+
+def tile_increments(tracks: list, zoom: int) -> dict:
+    """{(x, y) do tile: contagens a somar (TILE_SIZE², uint32)} para os trajetos dados."""
+    if not tracks:
+        return {}
+    world = TILE_SIZE * 2 ** zoom
+    pixels, hits = np.unique(
+        np.concatenate([track_pixels(lat, lon, zoom) for lat, lon in tracks]), return_counts=True
+    )
+    px, py = pixels % world, pixels // world
+    tiles = (py // TILE_SIZE) * (world // TILE_SIZE) + px // TILE_SIZE
+    local = (py % TILE_SIZE) * TILE_SIZE + px % TILE_SIZE
+    order = np.argsort(tiles, kind="stable")
+    tiles, local, hits = tiles[order], local[order], hits[order]
+    keys, starts = np.unique(tiles, return_index=True)
+    ends = np.append(starts[1:], len(tiles))
+    tiles_per_row = world // TILE_SIZE
+    return {
+        (int(key % tiles_per_row), int(key // tiles_per_row)): np.bincount(
+            local[start:end], weights=hits[start:end], minlength=TILE_SIZE * TILE_SIZE
+        ).astype(np.uint32)
+        for key, start, end in zip(keys, starts, ends)
+    }
+
+
+def palette(saturation: int = SATURATION) -> np.ndarray:
+    """Cor (RGBA uint8) de cada contagem 0..saturation; 0 fica transparente."""
+    intensity = np.log1p(np.arange(saturation + 1)) / math.log1p(saturation)
+    table = np.stack(
+        [np.interp(intensity, _PALETTE_STOPS, _PALETTE[:, channel]) for channel in range(4)],
+        axis=-1,
+    )
+    table[0] = 0
+    return np.rint(table).astype(np.uint8)
+
+
+def colorize(counts: np.ndarray, saturation: int = SATURATION) -> np.ndarray:
+    """Contagens (TILE_SIZE²) -> RGBA (TILE_SIZE × TILE_SIZE × 4, uint8), por tabela."""
+    table = palette(saturation)
+    return table[np.minimum(counts, saturation)].reshape(TILE_SIZE, TILE_SIZE, 4)
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def encode_png(rgba: np.ndarray) -> bytes:
+    """PNG RGBA de 8 bits sem dependências (filtro 0 em todas as linhas)."""
+    height, width, _ = rgba.shape
+    rows = np.concatenate([np.zeros((height, 1), dtype=np.uint8), rgba.reshape(height, -1)], axis=1)
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + _png_chunk(b"IHDR", header)
+        + _png_chunk(b"IDAT", zlib.compress(rows.tobytes(), 9))
+        + _png_chunk(b"IEND", b"")
+    )
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+def load_tracks(tracks_dir: str = TRACKS_DIR) -> dict:
+    """{track_id: polyline} de todos os trajetos publicados."""
+    tracks = {}
+    for path in sorted(Path(tracks_dir).glob("*.json")):
+        with open(path, "r", encoding="utf-8") as f:
+            track = json.load(f)
+        if track.get("polyline"):
+            tracks[track.get("id") or path.stem] = track["polyline"]
+    return tracks
+
+
+class HeatmapBuilder:
+    """Contagens por tile em cache e escrita dos PNG dos tiles alterados."""
+
+    def __init__(self, out_dir: str = HEATMAP_DIR, cache_dir: str = HEATMAP_CACHE_DIR,
+                 zooms: tuple = ZOOMS, saturation: int = SATURATION):
+        self.out_dir = Path(out_dir)
+        self.cache_dir = Path(cache_dir)
+        self.zooms = tuple(sorted(zooms))
+        self.saturation = saturation
+        self.rendered = 0
+
+    def _config(self) -> dict:
+        return {
+            "format": STATE_FORMAT,
+            "zooms": list(self.zooms),
+            "tile_size": TILE_SIZE,
+            "saturation": self.saturation,
+        }
+
+    def _load_state(self) -> dict | None:
+        path = self.cache_dir / "state.json"
+        if not path.exists():
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        return state if state.get("config") == self._config() else None
+
+    def _counts_path(self, zoom: int, x: int, y: int) -> Path:
+        return self.cache_dir / str(zoom) / str(x) / f"{y}.npy"
+
+    def _tile_path(self, zoom: int, x: int, y: int) -> Path:
+        return self.out_dir / str(zoom) / str(x) / f"{y}.png"
+
+    def build(self, tracks: dict, rebuild: bool = False) -> dict:
+        """Atualiza os tiles com `tracks` ({id: polyline}); devolve o index.json escrito."""
+        state = None if rebuild else self._load_state()
+        if state is not None and not set(state["tracks"]) <= set(tracks):
+            state = None  # trajeto removido: as contagens deixam de bater certo
+        if state is None:
+            for directory in (self.cache_dir, self.out_dir):
+                if directory.exists():
+                    shutil.rmtree(directory)
+            state = {"config": self._config(), "tracks": [], "tiles": {}}
+
+        known = set(state["tracks"])
+        new_ids = [track_id for track_id in tracks if track_id not in known]
+        positions = [decode_polyline(tracks[track_id]) for track_id in new_ids]
+        for zoom in self.zooms:
+            tiles = set(state["tiles"].get(str(zoom), []))
+            for (x, y), increment in tile_increments(positions, zoom).items():
+                counts_path = self._counts_path(zoom, x, y)
+                counts = np.load(counts_path) + increment if counts_path.exists() else increment
+                counts_path.parent.mkdir(parents=True, exist_ok=True)
+                np.save(counts_path, counts)
+                _write_atomic(self._tile_path(zoom, x, y), encode_png(colorize(counts, self.saturation)))
+                tiles.add(f"{x}/{y}")
+                self.rendered += 1
+            state["tiles"][str(zoom)] = sorted(tiles)
+        state["tracks"] = sorted(known | set(new_ids))
+
+        _write_atomic(self.cache_dir / "state.json", json.dumps(state).encode("utf-8"))
+        index = {
+            "zooms": list(self.zooms),
+            "tile_size": TILE_SIZE,
+            "saturation": self.saturation,
+            "tracks": len(state["tracks"]),
+            "tiles": state["tiles"],
+        }
+        _write_atomic(self.out_dir / "index.json",
+                      json.dumps(index, separators=(",", ":")).encode("utf-8"))
+        return {**index, "new_tracks": len(new_ids), "rendered": self.rendered}
+
+
+def build_heatmap(tracks_dir: str = TRACKS_DIR, rebuild: bool = False, **kwargs) -> dict:
+    result = HeatmapBuilder(**kwargs).build(load_tracks(tracks_dir), rebuild=rebuild)
+    tiles = sum(len(names) for names in result["tiles"].values())
+    print(
+        f"🗺️  Heatmap: {result['tracks']} trajeto(s), {tiles} tile(s) em {HEATMAP_DIR} "
+        f"({result['new_tracks']} novo(s), {result['rendered']} tile(s) redesenhado(s))"
+    )
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera os tiles do heatmap a partir dos trajetos GPS")
+    parser.add_argument("--tracks", default=TRACKS_DIR, help="pasta com os trajetos (gps_tracks.py)")
+    parser.add_argument("--rebuild", action="store_true", help="ignora a cache e recalcula tudo")
+    args = parser.parse_args()
+    build_heatmap(args.tracks, rebuild=args.rebuild)
+
+
+if __name__ == "__main__":
+    main()
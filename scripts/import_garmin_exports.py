@@ -8,15 +8,38 @@ Como usar:
 3. Executa: python scripts/import_garmin_exports.py
 """
 
+import argparse
+import io
 import json
 import os
 import glob
-from datetime import datetime, timedelta, timezone
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
 from pathlib import Path
 
+from api_slices import print_slice_report, write_api_slices
+from best_efforts import personal_bests
+from csv_columns import iter_csv_fields
+from date_formats import ISO_ANY, DateParser
+from date_windows import ActivityTimeline
+from duplicate_index import dedupe_activities
+from parse_cache import CACHE_ENABLED, ParseCache
+from fitness_model import FitnessModel
+from rollups import Rollups
+from route_index import route_table
+from training_load import add_training_load
+from summary_shards import (
+    SHARDS_DIR,
+    print_shard_report,
+    sharding_enabled,
+    write_sharded_summary,
+)
+
 # Pasta onde colocas os exports do Garmin
 GARMIN_EXPORTS_DIR = "data/garmin_exports"
 OUTPUT_FILE = "public/data/garmin_summary.json"
+# Campos por corrida calculados a partir do stream dos .FIT (--records)
+STREAM_FIELDS = ("best_efforts", "track_id", "route_id")
 
 
 def format_time_hours(seconds: float) -> str:
@@ -38,33 +61,19 @@ def format_pace_label(seconds_per_km: float) -> str:
     return f"{minutes}:{seconds:02d}/km"
 
 
-def parse_datetime(value):
-    """Try to parse several datetime formats."""
-    if not value:
-        return None
-    if isinstance(value, datetime):
-        return value
-
-    value_str = str(value).strip()
-    formats = [
-        "%Y-%m-%d %H:%M:%S",
-        "%Y-%m-%dT%H:%M:%S",
-        "%Y-%m-%dT%H:%M:%S.%f",
-        "%Y/%m/%d %H:%M:%S",
-    ]
-
-    # Handle ISO with timezone
-    try:
-        return datetime.fromisoformat(value_str.replace("Z", "+00:00"))
-    except ValueError:
-        pass
+DATE_FORMATS = [
+    ISO_ANY,
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S.%f",
+    "%Y/%m/%d %H:%M:%S",
+]
+_ACTIVITY_DATES = DateParser(DATE_FORMATS)
 
-    for fmt in formats:
-        try:
-            return datetime.strptime(value_str, fmt)
-        except ValueError:
-            continue
-    return None
+
+def parse_datetime(value):
+    """Try to parse several datetime formats (remembers the last one that matched)."""
+    return _ACTIVITY_DATES.parse(value)
 
 
 def to_int(value):
@@ -117,8 +126,9 @@ def serialize_activity(activity):
     )
     dt = parse_datetime(date_value)
     if dt is None:
-        dt = datetime.now(timezone.utc)
-    elif dt.tzinfo is None:
+        # Sem data não há dia onde a pôr (a hora da importação mudaria a cada execução)
+        return None
+    if dt.tzinfo is None:
         dt = dt.replace(tzinfo=timezone.utc)
     else:
         dt = dt.astimezone(timezone.utc)
@@ -148,7 +158,7 @@ def serialize_activity(activity):
 
     pace_seconds = time_seconds / distance if distance > 0 else 0
 
-    return {
+    run = {
         "date": formatted_date,
         "iso_date": iso_date,
         "title": activity.get("title") or activity.get("name") or "Corrida",
@@ -162,6 +172,13 @@ def serialize_activity(activity):
         "elevation_gain": elevation or 0,
         "_dt": dt,
     }
+    # Só existem para .FIT importados com --records
+    for key in STREAM_FIELDS:
+        if activity.get(key):
+            run[key] = activity[key]
+    # Zonas/TRIMP do stream (--records) ou estimados pela FC média
+    add_training_load(run, activity)
+    return run
 
 
 def build_summary(activities):
@@ -184,11 +201,12 @@ def build_summary(activities):
                 "marathon_progress": 0,
             },
             "latest_run": None,
-            "this_week": {
-                "runs": 0,
-                "distance": 0,
-                "time": "00:00:00",
-            },
+            "this_week": ActivityTimeline.build([]).this_week(),
+            "windows": ActivityTimeline.build([]).windows(),
+            "rollups": Rollups().to_summary(),
+            "fitness": FitnessModel().to_summary(),
+            "personal_bests": {},
+            "routes": [],
             "recent_runs": [],
             "activities": [],
         }
@@ -206,11 +224,8 @@ def build_summary(activities):
         total_time_seconds / total_distance if total_distance > 0 else 0
     )
 
-    today = datetime.now(timezone.utc).date()
-    week_ago = today - timedelta(days=7)
-    weekly_runs = [run for run in runs if run.get("_dt").date() >= week_ago]
-    weekly_distance = sum(run["distance"] for run in weekly_runs)
-    weekly_time_seconds = sum(run["time_seconds"] for run in weekly_runs)
+    # Semana, últimos 7/30/90 dias, mês e ano (pelo iso_date, sem voltar a ler datas)
+    timeline = ActivityTimeline.build(runs)
 
     latest_run = runs[0].copy()
 
@@ -233,11 +248,12 @@ def build_summary(activities):
             ),
         },
         "latest_run": latest_run,
-        "this_week": {
-            "runs": len(weekly_runs),
-            "distance": round(weekly_distance, 2),
-            "time": format_time_hours(weekly_time_seconds),
-        },
+        "this_week": timeline.this_week(),
+        "windows": timeline.windows(),
+        "rollups": Rollups.recompute(runs).to_summary(),
+        "fitness": FitnessModel.recompute(runs).to_summary(),
+        "personal_bests": personal_bests(runs),
+        "routes": route_table(runs),
         "recent_runs": runs[:10],
         "activities": runs,
     }
@@ -245,8 +261,11 @@ def build_summary(activities):
     return summary
 
 
-def parse_fit_file(file_path):
-    """Parse ficheiro .FIT do Garmin (requer fitparse)."""
+def parse_fit_file(file_path, name=None):
+    """
+    Parse ficheiro .FIT do Garmin (requer fitparse).
+    `file_path` pode ser um ficheiro já aberto (membro de um ZIP), com o nome em `name`.
+    """
     try:
         from fitparse import FitFile
     except ImportError:
@@ -262,7 +281,9 @@ def parse_fit_file(file_path):
         "max_heart_rate": 0,
         "calories": 0,
         "date": None,
-        "title": Path(file_path).stem,
+        "title": Path(name or file_path).stem,
+        # start_time do .FIT vem sem fuso, em UTC (duplicate_index.py)
+        "clock": "utc",
     }
 
     field_handlers = {
@@ -291,50 +312,131 @@ def parse_fit_file(file_path):
     return activity_data
 
 
+def parse_activity_file(file_path, name=None):
+    """Uma corrida por ficheiro: .FIT (fitparse) ou .GPX/.TCX (xml_activities.py, requer numpy)."""
+    if Path(name or str(file_path)).suffix.lower() in (".gpx", ".tcx"):
+        from xml_activities import parse_xml_activity
+        return parse_xml_activity(file_path, name)[0]
+    return parse_fit_file(file_path, name)
+
+
+def _parse_fit_worker(file_path):
+    """Parse de um .FIT/.GPX/.TCX isolado: devolve (ficheiro, dados, erro) sem lançar exceções."""
+    try:
+        return file_path, parse_activity_file(file_path), None
+    except Exception as error:  # ficheiro corrompido não pode parar o lote
+        return file_path, None, f"{type(error).__name__}: {error}"
+
+
+def resolve_workers(workers=None):
+    """
+    Normaliza o nº de workers para ler ficheiros .FIT: None → GARMIN_FIT_WORKERS
+    (1 = sequencial, por omissão), 0 → nº de CPUs.
+    """
+    if workers is None:
+        raw = os.getenv("GARMIN_FIT_WORKERS", "1")
+        try:
+            workers = int(raw)
+        except ValueError:
+            print(f"⚠️  GARMIN_FIT_WORKERS={raw!r} inválido (inteiro, 0 = todos os cores): a usar 1 worker")
+            workers = 1
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers
+
+
+def iter_fit_results(fit_files, workers=None, chunksize=None, cache=None):
+    """
+    Faz parse dos ficheiros .FIT, em paralelo se workers > 1.
+    Os resultados chegam em streaming e pela mesma ordem de fit_files.
+    Com `cache`, ficheiros inalterados não chegam a ser lidos.
+    """
+    if cache is not None:
+        yield from _iter_fit_results_cached(fit_files, workers, chunksize, cache)
+        return
+
+    workers = resolve_workers(workers)
+    if workers <= 1 or len(fit_files) <= 1:
+        for fit_file in fit_files:
+            yield _parse_fit_worker(fit_file)
+        return
+
+    if chunksize is None:
+        # Lotes pequenos mantêm o streaming fluido sem pagar IPC por ficheiro
+        chunksize = max(1, min(32, len(fit_files) // (workers * 4)))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(_parse_fit_worker, fit_files, chunksize=chunksize)
+
+
+def _iter_fit_results_cached(fit_files, workers, chunksize, cache):
+    """Serve os hits do cache e só envia os ficheiros novos/alterados para o parse."""
+    lookups = [(fit_file, *cache.get(fit_file)) for fit_file in fit_files]
+    misses = [fit_file for fit_file, _, cached in lookups if cached is None]
+    parsed = iter_fit_results(misses, workers, chunksize)
+
+    for fit_file, digest, cached in lookups:
+        if cached is not None:
+            yield fit_file, cached, None
+            continue
+        result = next(parsed)
+        if result[1] is not None:
+            cache.put(digest, result[1])
+        yield result
+
+
+# Aliases PT/EN das colunas do export CSV (resolvidos uma vez por ficheiro)
+CSV_FIELDS = {
+    "distance": ["Distância", "Distance"],
+    "time": ["Tempo", "Time"],
+    "avg_hr": ["FC Média", "Avg HR"],
+    "max_hr": ["FC Máx", "Max HR"],
+    "calories": ["Calorias", "Calories"],
+    "date": ["Date", "Data"],
+    "date_display": ["Data"],
+    "title": ["Title", "Activity Name", "Name"],
+    "total_ascent": ["Total Ascent"],
+}
+
+
 def parse_csv_file(file_path):
     """
     Parse ficheiro CSV exportado do Garmin Connect
     Retorna lista de atividades
     """
-    import csv
-    
     activities = []
 
-    with open(file_path, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-
-        for row in reader:
-            try:
-                distance = to_float(row.get("Distância", row.get("Distance")))
-                if distance <= 0:
-                    continue
-
-                time_seconds = parse_time_string(row.get("Tempo", row.get("Time", "0")))
-                avg_hr = to_int(row.get("FC Média", row.get("Avg HR")))
-                max_hr = to_int(row.get("FC Máx", row.get("Max HR")))
-                calories = to_int(row.get("Calorias", row.get("Calories")))
-
-                activity_data = {
-                    "date": row.get("Date", row.get("Data")),
-                    "date_display": row.get("Data"),
-                    "distance": distance,
-                    "total_time": time_seconds,
-                    "average_heartrate": avg_hr,
-                    "max_heart_rate": max_hr,
-                    "calories": calories or 0,
-                    "title": row.get("Title")
-                    or row.get("Activity Name")
-                    or row.get("Name")
-                    or "Corrida",
-                    "total_ascent": to_int(row.get("Total Ascent")),
-                }
-
-                activities.append(activity_data)
+    for row in iter_csv_fields(file_path, CSV_FIELDS):
+        try:
+            distance_raw, time_raw, avg_hr_raw, max_hr_raw, calories_raw, date, date_display, title, ascent_raw = row
 
-            except (ValueError, KeyError) as error:
-                print(f"   ⚠️  Erro ao processar linha: {error}")
+            distance = to_float(distance_raw)
+            if distance <= 0:
                 continue
 
+            time_seconds = parse_time_string(time_raw or "0")
+            avg_hr = to_int(avg_hr_raw)
+            max_hr = to_int(max_hr_raw)
+            calories = to_int(calories_raw)
+
+            activity_data = {
+                "date": date,
+                "date_display": date_display,
+                "distance": distance,
+                "total_time": time_seconds,
+                "average_heartrate": avg_hr,
+                "max_heart_rate": max_hr,
+                "calories": calories or 0,
+                "title": title or "Corrida",
+                "total_ascent": to_int(ascent_raw),
+            }
+
+            activities.append(activity_data)
+
+        except (ValueError, KeyError) as error:
+            print(f"   ⚠️  Erro ao processar linha: {error}")
+            continue
+
     return activities
 
 
@@ -356,39 +458,172 @@ def parse_time_string(time_str):
         return 0
 
 
-def import_garmin_data():
+def parse_archive_member(name, data):
+    """Parse de um .FIT/.GPX/.TCX/.CSV lido de dentro de um ZIP (garmin_archive.py)."""
+    if not name.lower().endswith(".csv"):
+        return parse_activity_file(io.BytesIO(data), name=name)
+    return parse_csv_file(io.TextIOWrapper(io.BytesIO(data), encoding="utf-8", newline=""))
+
+
+def ingest_archives(archives, workers, fit_cache, csv_cache, seen):
+    """
+    Atividades dos .FIT/.CSV dentro dos ZIP, sem os extrair. Membros com hash
+    já no cache de parse não voltam ao parser; conteúdo repetido (hashes em
+    `seen`, ex. o mesmo .FIT solto e dentro do ZIP) só conta uma vez.
+    """
+    from garmin_archive import iter_archive_results
+
+    activities = []
+    members = reused = duplicates = errors = 0
+    known = fit_cache.digests() | csv_cache.digests()
+    results = iter_archive_results(archives, parse_archive_member, workers, known)
+    for label, digest, is_known, data, error in results:
+        members += 1
+        if error:
+            errors += 1
+            print(f"   ❌ {label}: {error}")
+            continue
+        if digest in seen:
+            duplicates += 1
+            continue
+        seen.add(digest)
+        # .FIT/.GPX/.TCX = uma atividade; .CSV = lista de atividades
+        is_fit = not label.lower().endswith(".csv")
+        cache = fit_cache if is_fit else csv_cache
+        if is_known:
+            data = cache.lookup(digest)
+            reused += 1
+        elif data is not None:
+            cache.put(digest, data)
+        if data:
+            activities.extend([data] if is_fit else data)
+    print(
+        f"🗜️  {members} ficheiro(s) em {len(archives)} ZIP: {len(activities)} atividade(s), "
+        f"{reused} já importado(s), {duplicates} repetido(s), {errors} erro(s)"
+    )
+    return activities
+
+
+def analyze_records(block, digest):
+    """Métricas de uma corrida calculadas a partir do stream por segundo."""
+    from best_efforts import best_efforts
+    from gps_tracks import write_track
+    from training_load import stream_loads
+
+    analysis = {"best_efforts": best_efforts(block), **stream_loads([block])[0]}
+    # Trajeto simplificado em public/data/garmin/tracks/<track_id>.json
+    track = write_track(block, digest)
+    if track:
+        analysis["track_id"] = track["id"]
+    return analysis
+
+
+def ingest_records(fit_files, workers=None):
     """
-    Importa todos os ficheiros da pasta garmin_exports
+    Guarda o stream por segundo (mensagens record) de cada .FIT em
+    data/cache/records/ (arrays NumPy, ver fit_records.py) e devolve
+    {ficheiro: analyze_records(bloco)}.
+    """
+    try:
+        from fit_records import RECORDS_DIR, ingest_fit_records
+    except ImportError:
+        print("⚠️  numpy não instalado. Instala com: pip install numpy")
+        return {}
+
+    analyses = {}
+    total_records = cached = errors = 0
+    results = ingest_fit_records(fit_files, resolve_workers(workers), analyze=analyze_records)
+    for fit_file, count, hit, analysis, error in results:
+        if error:
+            errors += 1
+            print(f"   ❌ Records de {os.path.basename(fit_file)}: {error}")
+            continue
+        total_records += count
+        cached += hit
+        analyses[fit_file] = analysis
+    print(
+        f"📈 Records por segundo: {total_records} de {len(fit_files) - errors} ficheiro(s) "
+        f"({cached} já em cache) em {RECORDS_DIR}"
+    )
+    return analyses
+
+
+def import_garmin_data(workers=None, use_cache=True, sharded=False, records=False,
+                       archives=None):
+    """
+    Importa todos os ficheiros da pasta garmin_exports (incluindo os .FIT/.CSV
+    dentro de ZIPs, sem extrair) e dos ZIPs em `archives`
     """
     # Cria pasta se não existir
     Path(GARMIN_EXPORTS_DIR).mkdir(parents=True, exist_ok=True)
     
     activities = []
+    fit_activities = {}
     
     # Batch process all files at once to reduce I/O operations
-    fit_files = glob.glob(f"{GARMIN_EXPORTS_DIR}/*.fit")
-    csv_files = glob.glob(f"{GARMIN_EXPORTS_DIR}/*.csv")
+    # Uma corrida por ficheiro: .FIT e também .GPX/.TCX (histórico antigo, provas)
+    fit_files = sorted(
+        path
+        for pattern in ("*.fit", "*.gpx", "*.tcx")
+        for path in glob.glob(f"{GARMIN_EXPORTS_DIR}/{pattern}")
+    )
+    csv_files = sorted(glob.glob(f"{GARMIN_EXPORTS_DIR}/*.csv"))
+    archives = sorted(glob.glob(f"{GARMIN_EXPORTS_DIR}/*.zip")) + list(archives or [])
     
     # Processa ficheiros .FIT
-    for fit_file in fit_files:
+    workers = resolve_workers(workers)
+    if workers > 1 and len(fit_files) > 1:
+        print(f"⚙️  A processar {len(fit_files)} ficheiros .FIT/.GPX/.TCX com {workers} workers")
+    fit_cache = ParseCache("import_garmin_exports.fit:v2", enabled=use_cache and CACHE_ENABLED)
+    csv_cache = ParseCache("import_garmin_exports.csv:v1", enabled=use_cache and CACHE_ENABLED)
+    for fit_file, data, error in iter_fit_results(fit_files, workers, cache=fit_cache):
         print(f"📁 A processar {os.path.basename(fit_file)}...")
-        data = parse_fit_file(fit_file)
+        if error:
+            print(f"   ❌ Erro ao ler ficheiro: {error}")
+            continue
         if data:
             activities.append(data)
+            fit_activities[fit_file] = data
             print(f"   ✅ {data['distance']:.2f}km em {data['total_time']/60:.1f}min")
+    if records and fit_files:
+        for fit_file, analysis in ingest_records(fit_files, workers).items():
+            if fit_file in fit_activities:
+                fit_activities[fit_file].update(analysis)
+        # Percursos repetidos (route_id), pelo índice espacial dos trajetos
+        from route_index import assign_routes
+        assign_routes(fit_activities.values())
     
     # Processa ficheiros .CSV
     for csv_file in csv_files:
         print(f"📁 A processar {os.path.basename(csv_file)}...")
-        csv_activities = parse_csv_file(csv_file)
+        csv_activities = csv_cache.cached_parse(csv_file, parse_csv_file)
         if csv_activities:
             activities.extend(csv_activities)
             print(f"   ✅ {len(csv_activities)} atividade(s) importada(s)")
+
+    # Export completo da conta (ZIP com ZIPs): lido diretamente do arquivo
+    if archives:
+        print(f"📦 A ler {len(archives)} arquivo(s) ZIP...")
+        seen = {fit_cache.digest(path) for path in fit_files}
+        seen |= {csv_cache.digest(path) for path in csv_files}
+        activities.extend(ingest_archives(archives, workers, fit_cache, csv_cache, seen))
+        if records:
+            print("ℹ️  --records só lê o stream por segundo dos ficheiros soltos (fora dos ZIP)")
+
+    for cache in (fit_cache, csv_cache):
+        if cache.hits:
+            print(f"♻️  {cache.summary()}")
+        cache.close()
     
     if not activities:
         print(f"\n⚠️  Nenhum ficheiro encontrado em '{GARMIN_EXPORTS_DIR}'")
         print("📝 Exporta atividades do Garmin Connect e coloca nessa pasta.")
         return
+
+    # A mesma corrida no .FIT e no CSV (UTC vs. hora local, outro arredondamento) conta uma vez
+    activities, merged = dedupe_activities(activities)
+    if merged:
+        print(f"🔀 {merged} duplicado(s) entre fontes juntos (fica a fonte mais completa)")
     
     summary = build_summary(activities)
     
@@ -396,6 +631,13 @@ def import_garmin_data():
     Path(OUTPUT_FILE).parent.mkdir(parents=True, exist_ok=True)
     with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
         json.dump(summary, f, indent=2, ensure_ascii=False)
+    print_slice_report(write_api_slices(summary, OUTPUT_FILE))
+    if sharding_enabled(sharded):
+        print_shard_report(write_sharded_summary(summary))
+    if records and fit_files:
+        # Tiles do heatmap: só os tocados pelos trajetos novos são redesenhados
+        from heatmap_tiles import build_heatmap
+        build_heatmap()
     
     stats = summary["stats"]
     print("\n✅ Dados importados com sucesso!")
@@ -406,5 +648,39 @@ def import_garmin_data():
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Importa exports do Garmin Connect")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="processos para ler .FIT (1 = sequencial, 0 = todos os cores)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="ignora o cache de parse e volta a ler todos os ficheiros",
+    )
+    parser.add_argument(
+        "--sharded",
+        action="store_true",
+        help=f"escreve também header + shards mensais em {SHARDS_DIR}",
+    )
+    parser.add_argument(
+        "--records",
+        action="store_true",
+        help="guarda também o stream por segundo dos .FIT (requer numpy)",
+    )
+    parser.add_argument(
+        "--archive",
+        action="append",
+        metavar="ZIP",
+        help=f"export completo da conta (ZIP) a ler sem extrair; os *.zip em {GARMIN_EXPORTS_DIR} "
+             "são sempre lidos",
+    )
+    args = parser.parse_args()
+
     print("🏃 Garmin Data Importer - joaofaquino.run\n")
-    import_garmin_data()
+    import_garmin_data(
+        workers=args.workers, use_cache=not args.no_cache, sharded=args.sharded, records=args.records,
+        archives=args.archive,
+    )
@@ -9,16 +9,36 @@ Como usar:
 4. Os novos dados serão ADICIONADOS aos existentes
 """
 
+import argparse
 import json
 import os
 import glob
-import csv
-from datetime import datetime, timedelta
+from datetime import datetime
 from pathlib import Path
 
+from api_slices import print_slice_report, write_api_slices
+from best_efforts import personal_bests
+from csv_columns import iter_csv_fields
+from date_windows import ActivityTimeline
+from duplicate_index import DuplicateIndex, merge_duplicates
+from fitness_model import FitnessModel
+from parse_cache import ParseCache, file_sha256
+from rollups import Rollups
+from route_index import route_table
+from running_aggregates import RunningAggregates
+from sorted_merge import merge_runs
+from summary_shards import (
+    SHARDS_DIR,
+    print_shard_report,
+    sharding_enabled,
+    write_sharded_summary,
+)
+from training_load import add_training_load
+
 GARMIN_EXPORTS_DIR = "data/garmin_exports"
 OUTPUT_FILE = "public/data/garmin_summary.json"
-WEEKLY_GOAL_KM = float(os.getenv("WEEKLY_GOAL_KM", "25"))
+# Marca no JSON que "activities" foi escrito ordenado (data, mais recente primeiro)
+ACTIVITIES_ORDER = "date_desc"
 
 
 def load_existing_data():
@@ -29,14 +49,6 @@ def load_existing_data():
     return {"activities": []}
 
 
-def _first_value(row, keys):
-    for key in keys:
-        value = row.get(key)
-        if value not in (None, "", "--"):
-            return value
-    return None
-
-
 def _to_float(value):
     try:
         if value in (None, ""):
@@ -46,80 +58,66 @@ def _to_float(value):
         return 0.0
 
 
-def _parse_date(value: str | None) -> datetime | None:
-    if not value:
-        return None
-
-    value = value.strip()
-    formats = [
-        "%Y-%m-%d %H:%M:%S",
-        "%Y-%m-%dT%H:%M:%S",
-        "%Y-%m-%d",
-    ]
-
-    for fmt in formats:
-        try:
-            return datetime.strptime(value, fmt)
-        except ValueError:
-            continue
-
-    return None
+# Aliases PT/EN das colunas do export CSV (resolvidos uma vez por ficheiro)
+CSV_FIELDS = {
+    "distance": ['Distance', 'Distância', 'Distância (km)'],
+    "time": ['Time', 'Tempo'],
+    "avg_hr": ['Avg HR', 'FC Média'],
+    "max_hr": ['Max HR', 'FC máxima', 'FC Máxima'],
+    "calories": ['Calories', 'Calorias'],
+    "date": ['Date', 'Data'],
+    "title": ['Title', 'Título'],
+}
+_EMPTY_VALUES = ("", "--")
 
 
 def parse_csv_file(file_path):
     """Parse ficheiro CSV do Garmin"""
     activities = []
-    
-    with open(file_path, 'r', encoding='utf-8') as csvfile:
-        reader = csv.DictReader(csvfile)
+
+    for row in iter_csv_fields(file_path, CSV_FIELDS, empty=_EMPTY_VALUES):
+        distance_raw, time_str, avg_hr_raw, max_hr_raw, calories_raw, date, title = row
+
+        # Ignora linhas sem distância ou sem data (a hora atual iria para a cache)
+        distance = _to_float(distance_raw)
+        if distance <= 0 or not date:
+            continue
         
-        for row in reader:
-            distance_raw = _first_value(row, [
-                'Distance',
-                'Distância',
-                'Distância (km)',
-            ])
-
-            # Ignora linhas sem distância
-            distance = _to_float(distance_raw)
-            if distance <= 0:
-                continue
-            
-            # Parse dos dados
-            time_str = _first_value(row, ['Time', 'Tempo']) or '0'
-            
-            # Converte tempo (formato HH:MM:SS ou segundos)
-            if ':' in time_str:
-                time_parts = time_str.split(':')
-                total_seconds = int(time_parts[0]) * 3600 + int(time_parts[1]) * 60 + int(time_parts[2])
-            else:
-                total_seconds = int(float(time_str))
-            
-            # Calcula pace (min/km)
-            average_pace = (total_seconds / 60) / distance if distance > 0 else 0
-
-            avg_hr_raw = _first_value(row, ['Avg HR', 'FC Média'])
-            max_hr_raw = _first_value(row, ['Max HR', 'FC máxima', 'FC Máxima'])
-            calories_raw = _first_value(row, ['Calories', 'Calorias'])
-            
-            activity = {
-                "date": _first_value(row, ['Date', 'Data']) or datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                "distance": distance,
-                "total_time": total_seconds,
-                "calories": int(_to_float(calories_raw)) if calories_raw else 0,
-                "average_heartrate": int(_to_float(avg_hr_raw)) if avg_hr_raw else None,
-                "average_pace": average_pace,
-                "average_speed": (distance / total_seconds) * 3600 if total_seconds > 0 else 0,
-                "average_speed_kmh": (distance / total_seconds) * 3600 if total_seconds > 0 else 0,
-                "title": _first_value(row, ['Title', 'Título']) or 'Corrida',
-                "max_heart_rate": int(_to_float(max_hr_raw)) if max_hr_raw else None,
-            }
-            
-            activities.append(activity)
+        # Parse dos dados
+        time_str = time_str or '0'
+        
+        # Converte tempo (formato HH:MM:SS ou segundos)
+        if ':' in time_str:
+            time_parts = time_str.split(':')
+            total_seconds = int(time_parts[0]) * 3600 + int(time_parts[1]) * 60 + int(time_parts[2])
+        else:
+            total_seconds = int(float(time_str))
+        
+        # Calcula pace (min/km)
+        average_pace = (total_seconds / 60) / distance if distance > 0 else 0
+
+        activity = {
+            "date": date,
+            "distance": distance,
+            "total_time": total_seconds,
+            "calories": int(_to_float(calories_raw)) if calories_raw else 0,
+            "average_heartrate": int(_to_float(avg_hr_raw)) if avg_hr_raw else None,
+            "average_pace": average_pace,
+            "average_speed": (distance / total_seconds) * 3600 if total_seconds > 0 else 0,
+            "average_speed_kmh": (distance / total_seconds) * 3600 if total_seconds > 0 else 0,
+            "title": title or 'Corrida',
+            "max_heart_rate": int(_to_float(max_hr_raw)) if max_hr_raw else None,
+        }
+        
+        activities.append(activity)
     
     return activities
 
 
+def _activity_order_key(activity):
+    return activity.get('date', '')
+
+
 def format_time_hours(seconds: float) -> str:
     total = int(round(seconds))
     hours = total // 3600
@@ -128,91 +126,162 @@ def format_time_hours(seconds: float) -> str:
     return f"{hours:02d}:{minutes:02d}:{secs:02d}"
 
 
-def import_garmin_incremental():
+def load_aggregates(existing_data, existing_activities):
+    """
+    Agregados guardados no JSON; se faltarem ou não baterem certo com o nº
+    de atividades (ficheiro escrito por outro script), recalcula uma vez.
+    """
+    aggregates = RunningAggregates.from_dict(existing_data.get("aggregates"))
+    if aggregates is None or aggregates.count != len(existing_activities):
+        aggregates = RunningAggregates.recompute(existing_activities, "total_time", "date")
+    return aggregates
+
+
+def load_fitness(summary_digest, existing_activities):
+    """
+    Estado de ATL/CTL gravado com o JSON atual (mesmo hash); se o JSON foi
+    escrito por outro script, recalcula as cargas diárias uma vez.
+    """
+    fitness = FitnessModel.load(source=summary_digest) if summary_digest else None
+    if fitness is None:
+        fitness = FitnessModel()
+        fitness.add_many(existing_activities)
+    return fitness
+
+
+def import_garmin_incremental(verify=False, sharded=False):
     """Importa novos dados SEM apagar os antigos"""
     
     print("🔄 Modo INCREMENTAL - mantém dados existentes\n")
     
     # 1. Carrega dados existentes
+    summary_digest = file_sha256(OUTPUT_FILE) if os.path.exists(OUTPUT_FILE) else None
     existing_data = load_existing_data()
     existing_activities = existing_data.get("activities", [])
     print(f"📦 Dados existentes: {len(existing_activities)} atividades")
     
-    # 2. Cria conjunto de datas existentes (para evitar duplicados)
-    existing_dates = {act['date'] for act in existing_activities}
+    # 2. Índice dos inícios existentes: apanha a mesma corrida vinda de outra
+    # fonte (data em UTC vs. local, distância/tempo arredondados de outra forma)
+    known = DuplicateIndex.build(existing_activities)
+    merged_count = 0
     
     # 3. Processa novos ficheiros CSV
     Path(GARMIN_EXPORTS_DIR).mkdir(parents=True, exist_ok=True)
     csv_files = glob.glob(f"{GARMIN_EXPORTS_DIR}/*.csv")
     
     new_activities = []
+    # Cada ficheiro é um "run" à parte, para a junção ordenada no passo 4
+    new_runs = []
+    cache = ParseCache("import_garmin_incremental.csv:v2")
     for csv_file in csv_files:
         print(f"📁 A processar {os.path.basename(csv_file)}...")
-        activities = parse_csv_file(csv_file)
+        activities = cache.cached_parse(csv_file, parse_csv_file)
         
+        file_run = []
         for act in activities:
-            if act['date'] not in existing_dates:
-                new_activities.append(act)
+            current = known.find(act)
+            if current is None:
+                file_run.append(add_training_load(act))
+                known.add(act)
                 print(f"   ✅ Nova: {act['date']} - {act['distance']:.2f}km")
+                continue
+            merged = merge_duplicates(current, add_training_load(act))
+            if merged != current:
+                # Fica no mesmo sítio da lista, com os dados da fonte mais completa
+                current.clear()
+                current.update(merged)
+                merged_count += 1
+                print(f"   🔀 Duplicada: {act['date']} - completada com esta fonte")
             else:
                 print(f"   ⏭️  Duplicada: {act['date']} - ignorada")
+        new_activities.extend(file_run)
+        new_runs.append(file_run)
+    if cache.hits:
+        print(f"♻️  {cache.summary()}")
+    cache.close()
     
     initial_count = len(existing_activities)
     added_count = len(new_activities)
 
     if not new_activities:
         print(f"\nℹ️  Nenhuma atividade nova encontrada, mantendo dados existentes.")
-        all_activities = existing_activities
-    else:
-        all_activities = existing_activities + new_activities
+    if merged_count:
+        print(f"🔀 {merged_count} atividade(s) já existente(s) completada(s) com outra fonte")
     
-    # 4. Combina atividades antigas + novas
-    all_activities.sort(key=lambda x: x.get('date', ''), reverse=True)
+    # 4. Combina atividades antigas + novas (o histórico já vem ordenado)
+    all_activities = merge_runs(
+        [existing_activities, *new_runs],
+        key=_activity_order_key,
+        reverse=True,
+        history_sorted=existing_data.get("activities_order") == ACTIVITIES_ORDER and not merged_count,
+    )
     
-    # 5. Recalcula estatísticas
-    total_distance = sum(a['distance'] for a in all_activities)
-    total_time = sum(a['total_time'] for a in all_activities)
-    total_runs = len(all_activities)
-    
-    avg_distance = total_distance / total_runs if total_runs > 0 else 0
+    # 5. Atualiza estatísticas só com as atividades novas (se alguma já
+    # existente mudou de valores ao juntar duplicados, recalcula tudo)
+    today = datetime.now().date()
+    if merged_count:
+        aggregates = RunningAggregates.recompute(all_activities, "total_time", "date")
+        rollups = Rollups.recompute(all_activities)
+        fitness = FitnessModel.recompute(all_activities, today)
+    else:
+        aggregates = load_aggregates(existing_data, existing_activities)
+        rollups = Rollups.from_summary(existing_data.get("rollups"))
+        if rollups is None or rollups.total_runs != len(existing_activities):
+            rollups = Rollups.recompute(existing_activities)
+        # ATL/CTL: avança a partir do último checkpoint (ou da corrida mais antiga nova)
+        fitness = load_fitness(summary_digest, existing_activities)
+        for act in new_activities:
+            aggregates.add_activity(act, "total_time", "date")
+            rollups.add(act)
+            fitness.add(act)
+        fitness.advance(today)
+
+    if verify:
+        full = RunningAggregates.recompute(all_activities, "total_time", "date")
+        full_rollups = Rollups.recompute(all_activities)
+        full_fitness = FitnessModel.recompute(all_activities, today)
+        drift = aggregates.drift(full)
+        if rollups.to_summary() != full_rollups.to_summary():
+            drift["rollups"] = ("incremental", "recálculo")
+        if fitness.to_dict() != full_fitness.to_dict():
+            drift["fitness"] = ("incremental", "recálculo")
+        if drift:
+            print("\n⚠️  Agregados incrementais diferem do recálculo completo:")
+            for key, (stored, expected) in drift.items():
+                print(f"   • {key}: incremental={stored} | completo={expected}")
+            aggregates = full
+            rollups = full_rollups
+            fitness = full_fitness
+        else:
+            print(f"\n✅ Agregados consistentes ({full.count} atividades)")
+
+    total_distance = aggregates.total_distance
+    total_time = aggregates.time_seconds
+    total_runs = aggregates.count
     avg_pace = (total_time / 60) / total_distance if total_distance > 0 else 0
     
     summary = {
         "total_distance": round(total_distance, 2),
         "total_time": total_time,
         "total_runs": total_runs,
-        "avg_distance": round(avg_distance, 2),
+        "avg_distance": round(aggregates.avg_distance, 2),
         "avg_pace": round(avg_pace, 2),
+        "aggregates": aggregates.to_dict(),
+        "rollups": rollups.to_summary(),
+        "fitness": fitness.to_summary(),
+        "personal_bests": personal_bests(all_activities),
+        "routes": route_table(all_activities),
         "activities": all_activities,
+        "activities_order": ACTIVITIES_ORDER,
         "last_updated": datetime.now().isoformat(),
         "source": "Garmin Connect Export (Incremental)"
     }
 
     if all_activities:
-        now = datetime.now()
-        week_start = now - timedelta(days=now.weekday())
-        week_start = week_start.replace(hour=0, minute=0, second=0, microsecond=0)
-        week_end = week_start + timedelta(days=7)
-
-        weekly_runs = []
-        weekly_distance = 0.0
-        weekly_time = 0.0
-
-        for activity in all_activities:
-            activity_dt = _parse_date(activity.get("date"))
-            if activity_dt and week_start <= activity_dt < week_end:
-                weekly_runs.append(activity)
-                weekly_distance += activity.get("distance", 0.0)
-                weekly_time += activity.get("total_time", 0.0)
-
-        summary["this_week"] = {
-            "runs": len(weekly_runs),
-            "distance": round(weekly_distance, 2),
-            "time": format_time_hours(weekly_time),
-            "start_date": week_start.strftime("%Y-%m-%d"),
-            "end_date": (week_end - timedelta(days=1)).strftime("%Y-%m-%d"),
-            "goal": WEEKLY_GOAL_KM,
-        }
+        # Semana, últimos 7/30/90 dias, mês e ano: dois bisect por janela
+        timeline = ActivityTimeline.build(all_activities)
+        summary["this_week"] = timeline.this_week(today)
+        summary["windows"] = timeline.windows(today)
         summary["latest_run"] = all_activities[0]
         summary["recent_runs"] = all_activities[:10]
     
@@ -220,6 +289,11 @@ def import_garmin_incremental():
     Path(OUTPUT_FILE).parent.mkdir(parents=True, exist_ok=True)
     with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
         json.dump(summary, f, indent=2, ensure_ascii=False)
+    # Estado do ATL/CTL para a próxima importação (fora do JSON do site)
+    fitness.save(source=file_sha256(OUTPUT_FILE))
+    print_slice_report(write_api_slices(summary, OUTPUT_FILE))
+    if sharding_enabled(sharded):
+        print_shard_report(write_sharded_summary(summary))
     
     print("\n✅ Dados consolidados com sucesso!")
     print(f"📊 Antes: {initial_count} corridas")
@@ -229,5 +303,18 @@ def import_garmin_incremental():
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Importa novas atividades sem apagar as antigas")
+    parser.add_argument(
+        "--verify-aggregates",
+        action="store_true",
+        help="recalcula as estatísticas do zero e compara com os agregados incrementais",
+    )
+    parser.add_argument(
+        "--sharded",
+        action="store_true",
+        help=f"escreve também header + shards mensais em {SHARDS_DIR}",
+    )
+    args = parser.parse_args()
+
     print("🏃 Garmin Incremental Importer - joaofaquino.run\n")
-    import_garmin_incremental()
+    import_garmin_incremental(verify=args.verify_aggregates, sharded=args.sharded)
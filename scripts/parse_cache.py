@@ -0,0 +1,215 @@
+"""
+Cache persistente do parse de ficheiros exportados do Garmin
+Evita voltar a ler CSV/FIT que não mudaram desde a última importação
+
+- Chave: hash SHA-256 do conteúdo do ficheiro (+ namespace do parser)
+- Pré-verificação barata: tamanho + mtime, para não voltar a calcular o hash
+- Limite de tamanho com despejo LRU (entradas usadas há mais tempo saem primeiro)
+
+Desativar: GARMIN_PARSE_CACHE=0
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+CACHE_FILE = "data/cache/parse_cache.sqlite"
+CACHE_ENABLED = os.getenv("GARMIN_PARSE_CACHE", "1") != "0"
+MAX_ENTRIES = int(os.getenv("GARMIN_PARSE_CACHE_MAX_ENTRIES", "20000"))
+MAX_BYTES = int(os.getenv("GARMIN_PARSE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    digest TEXT NOT NULL,
+    namespace TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (digest, namespace)
+);
+CREATE INDEX IF NOT EXISTS idx_entries_last_used ON entries(last_used);
+"""
+
+
+def file_sha256(path, chunk_size: int = 1024 * 1024) -> str:
+    """Hash SHA-256 do conteúdo do ficheiro, lido por blocos."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """
+    Cache de resultados de parse por conteúdo de ficheiro.
+
+    Uso:
+        with ParseCache("import_garmin_incremental.csv:v2") as cache:
+            activities = cache.cached_parse(path, parse_csv_file)
+    """
+
+    def __init__(self, namespace: str, path: str = CACHE_FILE,
+                 max_entries: int = MAX_ENTRIES, max_bytes: int = MAX_BYTES,
+                 enabled: bool = CACHE_ENABLED):
+        self.namespace = namespace
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+        self._files: dict[str, tuple[int, int, str]] = {}
+        self._touched: dict[str, float] = {}
+        self._dirty_files: dict[str, tuple[int, int, str]] = {}
+        # Escritas só em close(): dois caches (ex.: FIT e CSV) partilham o
+        # ficheiro SQLite e uma transação aberta bloquearia o outro
+        self._pending: dict[str, str] = {}
+
+        if self.enabled:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(path)
+            self._conn.executescript(_SCHEMA)
+            # Uma só query para a pré-verificação de todos os ficheiros
+            self._files = {
+                row[0]: (row[1], row[2], row[3])
+                for row in self._conn.execute("SELECT path, size, mtime_ns, digest FROM files")
+            }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def digest(self, file_path) -> str:
+        """Hash do ficheiro, reutilizando o anterior se tamanho e mtime não mudaram."""
+        key = os.path.abspath(file_path)
+        stat = os.stat(file_path)
+        known = self._files.get(key)
+        if known and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+            return known[2]
+
+        digest = file_sha256(file_path)
+        record = (stat.st_size, stat.st_mtime_ns, digest)
+        self._files[key] = record
+        self._dirty_files[key] = record
+        return digest
+
+    def get(self, file_path):
+        """Devolve (digest, atividades) — atividades é None se não estiver em cache."""
+        if not self.enabled:
+            return None, None
+
+        digest = self.digest(file_path)
+        return digest, self.lookup(digest)
+
+    def lookup(self, digest):
+        """Atividades em cache para um hash já calculado (ex.: membro de um ZIP), ou None."""
+        if not self.enabled:
+            return None
+        row = self._conn.execute(
+            "SELECT payload FROM entries WHERE digest = ? AND namespace = ?",
+            (digest, self.namespace),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._touched[digest] = time.time()
+        return json.loads(row[0])
+
+    def digests(self) -> set:
+        """Hashes com resultado em cache neste namespace."""
+        if not self.enabled:
+            return set()
+        return {
+            row[0]
+            for row in self._conn.execute(
+                "SELECT digest FROM entries WHERE namespace = ?", (self.namespace,)
+            )
+        }
+
+    def put(self, digest, activities) -> None:
+        """Guarda o resultado do parse de um ficheiro."""
+        if not self.enabled or digest is None:
+            return
+        self._pending[digest] = json.dumps(activities, ensure_ascii=False, default=str)
+
+    def cached_parse(self, file_path, parser):
+        """Devolve o resultado em cache ou chama parser(file_path) e guarda-o."""
+        digest, cached = self.get(file_path)
+        if cached is not None:
+            return cached
+        result = parser(file_path)
+        if result is not None:
+            self.put(digest, result)
+        return result
+
+    def evict(self) -> int:
+        """Remove as entradas menos usadas até respeitar os limites. Devolve quantas saíram."""
+        if not self.enabled:
+            return 0
+        count, total = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return 0
+
+        removed = 0
+        rows = self._conn.execute(
+            "SELECT rowid, size FROM entries ORDER BY last_used ASC"
+        ).fetchall()
+        doomed = []
+        for rowid, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            doomed.append((rowid,))
+            count -= 1
+            total -= size
+            removed += 1
+        self._conn.executemany("DELETE FROM entries WHERE rowid = ?", doomed)
+        self._conn.execute(
+            "DELETE FROM files WHERE digest NOT IN (SELECT digest FROM entries)"
+        )
+        return removed
+
+    def close(self) -> None:
+        """Grava acessos/hashes pendentes, aplica o limite LRU e fecha a ligação."""
+        if self._conn is None:
+            return
+        now = time.time()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries (digest, namespace, payload, size, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (digest, self.namespace, payload, len(payload), now)
+                    for digest, payload in self._pending.items()
+                ],
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, digest) VALUES (?, ?, ?, ?)",
+                [(path, *record) for path, record in self._dirty_files.items()],
+            )
+            self._conn.executemany(
+                "UPDATE entries SET last_used = ? WHERE digest = ? AND namespace = ?",
+                [(used, digest, self.namespace) for digest, used in self._touched.items()],
+            )
+            self.evict()
+        self._conn.close()
+        self._conn = None
+
+    def summary(self) -> str:
+        return f"cache: {self.hits} ficheiro(s) reutilizado(s), {self.misses} lido(s)"
@@ -0,0 +1,200 @@
+"""
+Métricas por fase do pipeline (tempo, CPU, memória e contadores)
+
+    metrics = PipelineMetrics("update_training_data")
+    with metrics.stage("import"):
+        with metrics.stage("import.file", file="Activities.csv"):
+            metrics.count("rows_read", 120)
+    metrics.write_json("data/metrics/update_training_data.json")
+    metrics.write_prometheus("/var/lib/node_exporter/garmin.prom")
+
+Cada fase regista tempo real (wall), tempo de CPU e pico de memória Python
+(tracemalloc) durante a fase. Fases podem ser aninhadas (ex.: uma por
+ficheiro dentro da importação). Com profile_dir, as fases de topo correm
+também sob cProfile e o resultado fica em <profile_dir>/<fase>.prof.
+"""
+
+import cProfile
+import json
+import os
+import re
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+METRICS_DIR = "data/metrics"
+REPORT_FORMAT = 1
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    # Linux devolve KB; macOS devolve bytes
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    divisor = 1024 * 1024 if os.uname().sysname == "Darwin" else 1024
+    return round(peak / divisor, 2)
+
+
+def _metric_name(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def _label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class NullMetrics:
+    """Mesma interface, sem medir nada (para chamadas fora do main)."""
+
+    def count(self, name: str, value: int = 1) -> None:
+        pass
+
+    @contextmanager
+    def stage(self, name: str, **labels):
+        yield self
+
+
+class PipelineMetrics:
+    """Recolhe métricas de uma execução e exporta-as em JSON / Prometheus."""
+
+    def __init__(self, pipeline: str, profile_dir: Optional[str] = None):
+        self.pipeline = pipeline
+        self.profile_dir = Path(profile_dir) if profile_dir else None
+        self.started_at = datetime.now().isoformat(timespec="seconds")
+        self.stages: list[dict] = []
+        self.counters: dict[str, int] = {}
+        self._stack: list[dict] = []
+        self._owns_tracemalloc = not tracemalloc.is_tracing()
+        if self._owns_tracemalloc:
+            tracemalloc.start()
+
+    def count(self, name: str, value: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    @contextmanager
+    def stage(self, name: str, **labels):
+        """Mede o bloco como uma fase; `labels` (ex.: file=...) vão para o relatório."""
+        if self._stack:
+            parent = self._stack[-1]
+            parent["max_peak"] = max(parent["max_peak"], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+
+        frame = {"max_peak": 0, "mem_start": tracemalloc.get_traced_memory()[0]}
+        # Entrada criada já aqui para o relatório manter a ordem de início
+        entry = {"stage": name, "depth": len(self._stack)}
+        if labels:
+            entry["labels"] = labels
+        self.stages.append(entry)
+        profiler = None
+        if self.profile_dir and not self._stack:
+            profiler = cProfile.Profile()
+        self._stack.append(frame)
+
+        status = "ok"
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        if profiler:
+            profiler.enable()
+        try:
+            yield self
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            if profiler:
+                profiler.disable()
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            self._stack.pop()
+            peak = max(frame["max_peak"], tracemalloc.get_traced_memory()[1])
+            if self._stack:
+                self._stack[-1]["max_peak"] = max(self._stack[-1]["max_peak"], peak)
+
+            entry.update({
+                "status": status,
+                "wall_s": round(wall, 4),
+                "cpu_s": round(cpu, 4),
+                "peak_mb": round((peak - frame["mem_start"]) / 1024 / 1024, 2),
+            })
+            if profiler:
+                self.profile_dir.mkdir(parents=True, exist_ok=True)
+                profile_path = self.profile_dir / f"{_metric_name(name)}.prof"
+                profiler.dump_stats(profile_path)
+                entry["profile"] = str(profile_path)
+
+    def to_dict(self) -> dict:
+        return {
+            "format": REPORT_FORMAT,
+            "pipeline": self.pipeline,
+            "started_at": self.started_at,
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+            "peak_rss_mb": _peak_rss_mb(),
+            "stages": self.stages,
+            "counters": self.counters,
+        }
+
+    def close(self) -> None:
+        if self._owns_tracemalloc and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def write_json(self, path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        os.replace(tmp_path, path)
+        return path
+
+    def prometheus_text(self) -> str:
+        """Formato textfile do node_exporter (só fases de topo + contadores)."""
+        prefix = f"garmin_{_metric_name(self.pipeline)}"
+        lines = []
+        series = [
+            ("stage_wall_seconds", "Tempo real da fase", "wall_s"),
+            ("stage_cpu_seconds", "Tempo de CPU da fase", "cpu_s"),
+            ("stage_peak_memory_megabytes", "Pico de memória Python da fase", "peak_mb"),
+        ]
+        top_level = [entry for entry in self.stages if entry["depth"] == 0]
+        for metric, help_text, key in series:
+            lines.append(f"# HELP {prefix}_{metric} {help_text}")
+            lines.append(f"# TYPE {prefix}_{metric} gauge")
+            for entry in top_level:
+                lines.append(f'{prefix}_{metric}{{stage="{_label_value(entry["stage"])}"}} {entry[key]}')
+
+        for name, value in sorted(self.counters.items()):
+            metric = f"{prefix}_{_metric_name(name)}"
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {value}")
+
+        lines.append(f"# TYPE {prefix}_last_run_timestamp_seconds gauge")
+        lines.append(f"{prefix}_last_run_timestamp_seconds {int(time.time())}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path) -> Path:
+        # Escrita atómica: o node_exporter nunca lê um ficheiro a meio
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        tmp_path.write_text(self.prometheus_text(), encoding="utf-8")
+        os.replace(tmp_path, path)
+        return path
+
+    def print_report(self) -> None:
+        print(f"\n⏱️  Métricas ({self.pipeline})")
+        for entry in self.stages:
+            indent = "   " * (entry["depth"] + 1)
+            label = entry["stage"]
+            if entry.get("labels"):
+                label += " " + " ".join(f"{k}={v}" for k, v in entry["labels"].items())
+            print(f"{indent}{label}: {entry['wall_s']:.3f}s (CPU {entry['cpu_s']:.3f}s, pico {entry['peak_mb']:.1f} MB)")
+        if self.counters:
+            print("   " + " | ".join(f"{k}={v}" for k, v in sorted(self.counters.items())))
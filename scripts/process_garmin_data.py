@@ -9,6 +9,9 @@ import json
 from datetime import datetime
 from pathlib import Path
 
+from api_slices import print_slice_report, write_api_slices
+from date_windows import ActivityTimeline
+
 
 def parse_time(time_str):
     """Convert HH:MM:SS to seconds"""
@@ -135,21 +138,8 @@ def process_garmin_csv():
     # Get latest run
     latest_run = runs[0] if runs else None
     
-    # Calculate this week's stats (last 7 days) - optimized
-    from datetime import date, timedelta
-    today = date.today()
-    week_ago = today - timedelta(days=7)
-    
-    weekly_distance = 0
-    weekly_time = 0
-    weekly_count = 0
-    
-    for r in runs:
-        run_date = datetime.strptime(r['iso_date'], "%Y-%m-%d").date()
-        if run_date >= week_ago:
-            weekly_distance += r['distance']
-            weekly_time += r['time_seconds']
-            weekly_count += 1
+    # This week (ISO week) and the other date windows - two bisects each
+    timeline = ActivityTimeline.build(runs)
     
     # Build summary object
     summary = {
@@ -164,17 +154,15 @@ def process_garmin_csv():
             "marathon_progress": round((total_distance / 42.195) * 100, 1)
         },
         "latest_run": latest_run,
-        "this_week": {
-            "runs": weekly_count,
-            "distance": round(weekly_distance, 2),
-            "time": format_time_hours(weekly_time)
-        },
+        "this_week": timeline.this_week(),
+        "windows": timeline.windows(),
         "recent_runs": runs[:10]  # Last 10 runs
     }
     
     # Write JSON
     with open(output_path, 'w', encoding='utf-8') as f:
         json.dump(summary, f, indent=2, ensure_ascii=False)
+    print_slice_report(write_api_slices(summary, output_path))
     
     print(f"✅ Garmin data processed successfully!")
     print(f"📊 Total runs: {total_runs}")
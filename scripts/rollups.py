@@ -0,0 +1,186 @@
+"""
+Agregados semanais, mensais e anuais das corridas (prontos para gráficos)
+
+Cada bucket guarda somas (nº de corridas, distância, tempo, elevação, FC,
+TRIMP e tempo em cada zona de FC)
+para poder ser atualizado só com as atividades novas; os valores derivados
+(ritmo, FC média) são calculados ao exportar. As somas também vão na saída,
+por isso o próprio resumo chega para retomar a atualização incremental.
+
+Saída (secção "rollups" do resumo):
+    {"weekly": [...], "monthly": [...], "yearly": [...]}
+cada lista ordenada do período mais antigo para o mais recente.
+"""
+
+import re
+from datetime import date, timedelta
+from typing import Iterable, Optional
+
+from training_load import ZONE_COUNT, activity_load
+
+PERIODS = ("weekly", "monthly", "yearly")
+
+_ISO_DAY = re.compile(r"^(\d{4})-(\d{2})-(\d{2})")
+_DISPLAY_DAY = re.compile(r"^(\d{1,2})/(\d{1,2})/(\d{4})")
+
+
+def activity_day(activity: dict) -> Optional[date]:
+    """Dia da atividade a partir de iso_date / date (ISO ou DD/MM/YYYY)."""
+    for key in ("iso_date", "date"):
+        value = str(activity.get(key) or "")
+        match = _ISO_DAY.match(value)
+        if match:
+            return date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+        match = _DISPLAY_DAY.match(value)
+        if match:
+            return date(int(match.group(3)), int(match.group(2)), int(match.group(1)))
+    return None
+
+
+def period_keys(day: date) -> dict:
+    """Chave e início de cada período (semana ISO, mês, ano)."""
+    iso_year, iso_week, _ = day.isocalendar()
+    week_start = day - timedelta(days=day.weekday())
+    return {
+        "weekly": (f"{iso_year}-W{iso_week:02d}", week_start.isoformat()),
+        "monthly": (f"{day.year}-{day.month:02d}", date(day.year, day.month, 1).isoformat()),
+        "yearly": (str(day.year), date(day.year, 1, 1).isoformat()),
+    }
+
+
+def _activity_seconds(activity: dict) -> int:
+    value = activity.get("time_seconds")
+    if value is None:
+        value = activity.get("total_time")
+    try:
+        return int(round(float(value or 0)))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _activity_number(activity: dict, *keys) -> Optional[float]:
+    for key in keys:
+        value = activity.get(key)
+        if value in (None, "", "--"):
+            continue
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def _format_pace(seconds_per_km: float) -> str:
+    if seconds_per_km <= 0:
+        return "--/km"
+    total = int(round(seconds_per_km))
+    return f"{total // 60}:{total % 60:02d}/km"
+
+
+def _empty_bucket(start: str) -> dict:
+    return {
+        "start": start,
+        "runs": 0,
+        "distance_m": 0,
+        "time_seconds": 0,
+        "elevation_gain": 0,
+        "hr_sum": 0,
+        "hr_count": 0,
+        "max_hr": None,
+        "trimp_tenths": 0,
+        "hr_zone_seconds": [0] * ZONE_COUNT,
+    }
+
+
+class Rollups:
+    """Buckets por semana/mês/ano, atualizáveis incrementalmente."""
+
+    def __init__(self, buckets: Optional[dict] = None):
+        self.buckets: dict[str, dict[str, dict]] = {
+            period: dict((buckets or {}).get(period, {})) for period in PERIODS
+        }
+
+    @classmethod
+    def from_summary(cls, data: Optional[dict]) -> Optional["Rollups"]:
+        """Reconstrói os buckets a partir da secção "rollups" já publicada."""
+        if not isinstance(data, dict) or not all(isinstance(data.get(p), list) for p in PERIODS):
+            return None
+        # Resumos anteriores à carga de treino: obriga a recalcular
+        if any("trimp_tenths" not in entry for p in PERIODS for entry in data[p]):
+            return None
+        buckets = {}
+        for period in PERIODS:
+            buckets[period] = {}
+            for entry in data[period]:
+                bucket = _empty_bucket(entry["start"])
+                for key in bucket:
+                    if key in entry:
+                        bucket[key] = entry[key]
+                buckets[period][entry["period"]] = bucket
+        return cls(buckets)
+
+    @property
+    def total_runs(self) -> int:
+        return sum(bucket["runs"] for bucket in self.buckets["yearly"].values())
+
+    @classmethod
+    def recompute(cls, activities: Iterable[dict]) -> "Rollups":
+        rollups = cls()
+        rollups.add_many(activities)
+        return rollups
+
+    def add_many(self, activities: Iterable[dict]) -> None:
+        for activity in activities:
+            self.add(activity)
+
+    def add(self, activity: dict) -> None:
+        """Soma uma atividade aos buckets da sua semana, mês e ano."""
+        day = activity_day(activity)
+        if day is None:
+            return
+
+        distance_m = int(round((_activity_number(activity, "distance") or 0) * 1000))
+        seconds = _activity_seconds(activity)
+        elevation = _activity_number(activity, "elevation_gain", "total_ascent") or 0
+        avg_hr = _activity_number(activity, "avg_hr", "average_heartrate")
+        max_hr = _activity_number(activity, "max_hr", "max_heart_rate")
+        load = activity_load(activity)
+        trimp_tenths = int(round(load.get("trimp", 0) * 10))
+        zone_seconds = load.get("hr_zones") or [0] * ZONE_COUNT
+
+        for period, (key, start) in period_keys(day).items():
+            bucket = self.buckets[period].setdefault(key, _empty_bucket(start))
+            bucket["runs"] += 1
+            bucket["distance_m"] += distance_m
+            bucket["time_seconds"] += seconds
+            bucket["elevation_gain"] += int(round(elevation))
+            if avg_hr:
+                bucket["hr_sum"] += int(round(avg_hr))
+                bucket["hr_count"] += 1
+            if max_hr:
+                bucket["max_hr"] = max(bucket["max_hr"] or 0, int(round(max_hr)))
+            bucket["trimp_tenths"] += trimp_tenths
+            bucket["hr_zone_seconds"] = [
+                total + in_zone for total, in_zone in zip(bucket["hr_zone_seconds"], zone_seconds)
+            ]
+
+    def series(self, period: str) -> list[dict]:
+        """Série pronta para gráfico, do período mais antigo para o mais recente."""
+        series = []
+        for key in sorted(self.buckets[period]):
+            bucket = self.buckets[period][key]
+            distance = bucket["distance_m"] / 1000
+            pace_seconds = bucket["time_seconds"] / distance if distance else 0
+            series.append({
+                "period": key,
+                **bucket,
+                "distance": round(distance, 2),
+                "pace_seconds": round(pace_seconds, 1),
+                "pace": _format_pace(pace_seconds),
+                "avg_hr": round(bucket["hr_sum"] / bucket["hr_count"]) if bucket["hr_count"] else None,
+                "trimp": bucket["trimp_tenths"] / 10,
+            })
+        return series
+
+    def to_summary(self) -> dict:
+        return {period: self.series(period) for period in PERIODS}
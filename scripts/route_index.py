@@ -0,0 +1,225 @@
+"""
+Percursos repetidos: agrupa as corridas pelo trajeto GPS (gps_tracks.py)
+
+Assinatura de um trajeto: as células de ~120 m por onde passa (píxeis Web
+Mercator no zoom ROUTE_CELL_ZOOM, a partir da polyline densificada — ver
+heatmap_tiles.track_pixels). Duas corridas fazem o mesmo percurso se a
+semelhança de Jaccard das células for >= ROUTE_MIN_SIMILARITY.
+
+Índice espacial (grid hash): cada percurso fica registado na célula grossa
+(8×8 células, ~1 km) do centro do seu trajeto. Uma corrida nova só é
+comparada com os percursos das 9 células grossas à volta do seu centro, por
+isso o custo depende dos percursos dessa zona e não do total guardado.
+
+O índice fica em data/cache/route_index.json: {track_id: route_id} e a
+assinatura de referência de cada percurso (a da primeira corrida). Corridas
+já atribuídas mantêm o percurso e o ID (route-<track_id da 1.ª corrida>).
+
+    index = assign_routes(activities)   # escreve activity["route_id"]
+    table = route_table(activities)     # histórico de cada percurso repetido
+"""
+
+import json
+import os
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+try:
+    import numpy as np
+except ImportError:  # route_table() não precisa de numpy
+    np = None
+
+ROUTE_INDEX_FILE = "data/cache/route_index.json"
+CELL_ZOOM = int(os.getenv("ROUTE_CELL_ZOOM", "10"))
+MIN_SIMILARITY = float(os.getenv("ROUTE_MIN_SIMILARITY", "0.6"))
+# Células finas por célula grossa do grid hash (8 = 3 zooms acima)
+GRID_FACTOR = 8
+INDEX_FORMAT = 1
+
+
+class RouteIndex:
+    """Percursos conhecidos, com grid hash pelo centro de cada trajeto."""
+
+    def __init__(self, cell_zoom: int = CELL_ZOOM, min_similarity: float = MIN_SIMILARITY):
+        self.cell_zoom = cell_zoom
+        self.min_similarity = min_similarity
+        self.routes: dict[str, dict] = {}  # route_id -> {"cells", "center", "tracks"}
+        self.assignments: dict[str, str] = {}  # track_id -> route_id
+        self.grid: dict[tuple, list] = {}  # célula grossa -> [route_id, ...]
+        self.compared = 0
+
+    @classmethod
+    def from_dict(cls, data: Optional[dict]) -> Optional["RouteIndex"]:
+        """Índice guardado; None se não existir ou usar outra configuração."""
+        if not isinstance(data, dict) or data.get("format") != INDEX_FORMAT:
+            return None
+        if (data.get("cell_zoom"), data.get("min_similarity")) != (CELL_ZOOM, MIN_SIMILARITY):
+            return None
+        index = cls()
+        for route_id, route in data.get("routes", {}).items():
+            index._add_route(
+                route_id, np.asarray(route["cells"], dtype=np.int64), tuple(route["center"]),
+                route["tracks"],
+            )
+        index.assignments = dict(data.get("assignments") or {})
+        return index
+
+    def to_dict(self) -> dict:
+        return {
+            "format": INDEX_FORMAT,
+            "cell_zoom": self.cell_zoom,
+            "min_similarity": self.min_similarity,
+            "routes": {
+                route_id: {
+                    "cells": route["cells"].tolist(),
+                    "center": list(route["center"]),
+                    "tracks": route["tracks"],
+                }
+                for route_id, route in self.routes.items()
+            },
+            "assignments": dict(sorted(self.assignments.items())),
+        }
+
+    @classmethod
+    def load(cls, path: str = ROUTE_INDEX_FILE) -> "RouteIndex":
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                index = cls.from_dict(json.load(f))
+            if index is not None:
+                return index
+        return cls()
+
+    def save(self, path: str = ROUTE_INDEX_FILE) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(self.to_dict(), separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def signature(self, polyline: str) -> tuple["np.ndarray", tuple]:
+        """(células ordenadas, centro em células) de um trajeto."""
+        # gps_tracks e heatmap_tiles precisam de numpy: só aqui, não em route_table()
+        from gps_tracks import decode_polyline
+        from heatmap_tiles import track_pixels
+
+        lat, lon = decode_polyline(polyline)
+        cells = track_pixels(lat, lon, self.cell_zoom)
+        world = 256 * 2 ** self.cell_zoom
+        center = (float(np.mean(cells % world)), float(np.mean(cells // world)))
+        return cells, center
+
+    def _grid_key(self, center: tuple) -> tuple:
+        return int(center[0] // GRID_FACTOR), int(center[1] // GRID_FACTOR)
+
+    def _add_route(self, route_id: str, cells: "np.ndarray", center: tuple, tracks: list) -> None:
+        self.routes[route_id] = {"cells": cells, "center": center, "tracks": tracks}
+        self.grid.setdefault(self._grid_key(center), []).append(route_id)
+
+    def candidates(self, center: tuple) -> list:
+        """Percursos registados nas 9 células grossas à volta de `center`."""
+        gx, gy = self._grid_key(center)
+        return [
+            route_id
+            for dx in (-1, 0, 1)
+            for dy in (-1, 0, 1)
+            for route_id in self.grid.get((gx + dx, gy + dy), ())
+        ]
+
+    def match(self, cells: "np.ndarray", center: tuple) -> tuple[Optional[str], float]:
+        """Percurso mais parecido (Jaccard) acima do limite, ou (None, 0)."""
+        best, best_similarity = None, 0.0
+        for route_id in self.candidates(center):
+            self.compared += 1
+            reference = self.routes[route_id]["cells"]
+            shared = len(np.intersect1d(cells, reference, assume_unique=True))
+            similarity = shared / (len(cells) + len(reference) - shared)
+            if similarity >= self.min_similarity and similarity > best_similarity:
+                best, best_similarity = route_id, similarity
+        return best, best_similarity
+
+    def assign(self, track_id: str, polyline: str) -> str:
+        """Percurso da corrida: o já atribuído, o mais parecido, ou um novo."""
+        if track_id in self.assignments:
+            return self.assignments[track_id]
+        cells, center = self.signature(polyline)
+        route_id, _ = self.match(cells, center)
+        if route_id is None:
+            route_id = f"route-{track_id}"
+            self._add_route(route_id, cells, center, [])
+        self.routes[route_id]["tracks"].append(track_id)
+        self.assignments[track_id] = route_id
+        return route_id
+
+
+def assign_routes(activities, tracks_dir: Optional[str] = None,
+                  index_file: str = ROUTE_INDEX_FILE) -> RouteIndex:
+    """
+    Escreve route_id nas atividades com track_id (trajetos em `tracks_dir`,
+    por omissão gps_tracks.TRACKS_DIR). As corridas novas são atribuídas da
+    mais antiga para a mais recente (a primeira de cada percurso fica como
+    referência).
+    """
+    from gps_tracks import TRACKS_DIR, load_track
+
+    tracks_dir = tracks_dir or TRACKS_DIR
+    index = RouteIndex.load(index_file)
+    new_routes = len(index.routes)
+    pending = sorted(
+        (activity for activity in activities if activity.get("track_id")),
+        key=lambda activity: (str(activity.get("date") or ""), activity["track_id"]),
+    )
+    for activity in pending:
+        track_id = activity["track_id"]
+        if track_id not in index.assignments:
+            track = load_track(track_id, tracks_dir)
+            if not track:
+                continue
+            index.assign(track_id, track["polyline"])
+        activity["route_id"] = index.assignments[track_id]
+    index.save(index_file)
+    repeated = sum(1 for route in index.routes.values() if len(route["tracks"]) > 1)
+    print(
+        f"🧭 Percursos: {len(index.routes)} ({len(index.routes) - new_routes} novo(s), "
+        f"{repeated} repetido(s)); {index.compared} comparação(ões)"
+    )
+    return index
+
+
+def route_table(activities, min_runs: int = 2) -> list:
+    """
+    Percursos com pelo menos `min_runs` corridas, do mais frequente para o
+    menos, com o histórico de tempos (do mais antigo para o mais recente).
+    """
+    routes: dict[str, list] = {}
+    for activity in activities:
+        route_id = activity.get("route_id")
+        seconds = activity.get("time_seconds") or activity.get("total_time") or 0
+        distance = activity.get("distance") or 0
+        if not route_id or seconds <= 0 or distance <= 0:
+            continue
+        routes.setdefault(route_id, []).append({
+            "iso_date": activity.get("iso_date") or str(activity.get("date") or "")[:10],
+            "time_seconds": int(round(seconds)),
+            "pace_seconds": round(seconds / distance, 1),
+            "distance": round(distance, 2),
+            "title": activity.get("title") or "Corrida",
+        })
+
+    table = []
+    for route_id, runs in routes.items():
+        if len(runs) < min_runs:
+            continue
+        runs.sort(key=lambda run: (run["iso_date"], run["time_seconds"]))
+        distances = sorted(run["distance"] for run in runs)
+        best = min(runs, key=lambda run: (run["time_seconds"], run["iso_date"]))
+        table.append({
+            "id": route_id,
+            "title": Counter(run.pop("title") for run in runs).most_common(1)[0][0],
+            "runs": len(runs),
+            "distance": distances[len(distances) // 2],
+            "best": best,
+            "history": runs,
+        })
+    table.sort(key=lambda route: (-route["runs"], route["id"]))
+    return table
@@ -0,0 +1,82 @@
+"""
+Agregados incrementais das estatísticas globais (total_distance, total_time, médias...)
+
+Em vez de somar o histórico inteiro em cada importação, guardamos somas e
+contagens e atualizamos só com as atividades novas (O(N) para N novas).
+A distância é acumulada em metros inteiros para a soma ser exata e não
+depender da ordem — assim a verificação por recálculo completo não acusa
+diferenças de arredondamento de floats.
+"""
+
+from dataclasses import asdict, dataclass, fields
+from typing import Iterable, Optional
+
+MARATHON_KM = 42.195
+
+
+@dataclass
+class RunningAggregates:
+    count: int = 0
+    distance_m: int = 0
+    time_seconds: int = 0
+    min_distance_m: Optional[int] = None
+    max_distance_m: Optional[int] = None
+    first_date: Optional[str] = None
+    last_date: Optional[str] = None
+
+    def add(self, distance_km: float, time_seconds: float, iso_date: Optional[str] = None) -> None:
+        """Soma uma atividade aos agregados."""
+        meters = int(round(float(distance_km or 0) * 1000))
+        self.count += 1
+        self.distance_m += meters
+        self.time_seconds += int(round(time_seconds or 0))
+        self.min_distance_m = meters if self.min_distance_m is None else min(self.min_distance_m, meters)
+        self.max_distance_m = meters if self.max_distance_m is None else max(self.max_distance_m, meters)
+        if iso_date:
+            self.first_date = iso_date if self.first_date is None else min(self.first_date, iso_date)
+            self.last_date = iso_date if self.last_date is None else max(self.last_date, iso_date)
+
+    def add_activity(self, activity: dict, time_key: str = "time_seconds",
+                     date_key: str = "iso_date") -> None:
+        self.add(activity.get("distance", 0), activity.get(time_key, 0), activity.get(date_key))
+
+    @classmethod
+    def recompute(cls, activities: Iterable[dict], time_key: str = "time_seconds",
+                  date_key: str = "iso_date") -> "RunningAggregates":
+        """Recálculo completo (modo de verificação / migração)."""
+        aggregates = cls()
+        for activity in activities:
+            aggregates.add_activity(activity, time_key, date_key)
+        return aggregates
+
+    @classmethod
+    def from_dict(cls, data: Optional[dict]) -> Optional["RunningAggregates"]:
+        if not isinstance(data, dict):
+            return None
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    def drift(self, other: "RunningAggregates") -> dict:
+        """Campos em que os dois agregados diferem: {campo: (self, other)}."""
+        mine, theirs = self.to_dict(), other.to_dict()
+        return {key: (mine[key], theirs[key]) for key in mine if mine[key] != theirs[key]}
+
+    @property
+    def total_distance(self) -> float:
+        return self.distance_m / 1000
+
+    @property
+    def avg_distance(self) -> float:
+        return self.total_distance / self.count if self.count else 0
+
+    @property
+    def avg_pace_seconds(self) -> float:
+        """Segundos por km."""
+        return self.time_seconds / self.total_distance if self.distance_m else 0
+
+    @property
+    def marathon_progress(self) -> float:
+        return round((self.total_distance / MARATHON_KM) * 100, 1) if self.distance_m else 0
@@ -0,0 +1,85 @@
+"""
+Junção de listas já ordenadas (histórico + ficheiros novos)
+
+O histórico guardado já está ordenado e cada CSV do Garmin vem (quase)
+ordenado. Em vez de concatenar tudo e voltar a ordenar, cada lista é tratada
+como um "run" ordenado (ordenado localmente só se preciso). Os runs novos
+são juntos com um heap e inseridos no histórico por pesquisa binária: só
+O(novas · log n) comparações, sem percorrer o histórico.
+
+Com muitas atividades novas (ex.: reconstrução), a junção final é feita pelo
+sort do Python sobre os dois runs — o timsort deteta-os e junta-os em C, o
+que é mais rápido que um heap em Python.
+
+O resultado é igual a sorted(run1 + run2 + ..., key=key, reverse=reverse):
+em empates fica primeiro o que vem do run anterior.
+"""
+
+import heapq
+import math
+from typing import Callable, Iterable, Sequence
+
+BISECT_COST = 4
+
+
+def is_sorted(items: Sequence, key: Callable, reverse: bool = False) -> bool:
+    keys = [key(item) for item in items]
+    if reverse:
+        return all(a >= b for a, b in zip(keys, keys[1:]))
+    return all(a <= b for a, b in zip(keys, keys[1:]))
+
+
+def as_sorted_run(items: Sequence, key: Callable, reverse: bool = False) -> list:
+    """A própria lista se já estiver ordenada; senão uma cópia ordenada (estável)."""
+    items = list(items)
+    return items if is_sorted(items, key, reverse) else sorted(items, key=key, reverse=reverse)
+
+
+def _insert_position(items: list, item_key, key: Callable, reverse: bool, lo: int) -> int:
+    """Primeira posição depois de todos os elementos que ficam antes ou empatam."""
+    hi = len(items)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        mid_key = key(items[mid])
+        if (mid_key >= item_key) if reverse else (mid_key <= item_key):
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def merge_runs(runs: Iterable[Sequence], key: Callable, reverse: bool = False,
+               history_sorted: bool = False) -> list:
+    """
+    Junta runs (o primeiro é o histórico) numa lista ordenada.
+    Equivalente estável a sorted(concatenação, key=key, reverse=reverse).
+
+    history_sorted=True dispensa verificar a ordem do histórico (O(n)) —
+    só quando se sabe que foi escrito ordenado pela mesma chave.
+    """
+    runs = list(runs)
+    if not runs:
+        return []
+    history = runs[0] if history_sorted else as_sorted_run(runs[0], key, reverse)
+    incoming = [as_sorted_run(run, key, reverse) for run in runs[1:]]
+    incoming = list(heapq.merge(*incoming, key=key, reverse=reverse))
+    if not incoming:
+        return list(history)
+
+    # Pesquisa binária compensa enquanto custar bem menos chamadas a key() que o
+    # sort (cada passo da pesquisa em Python custa ~4x uma chamada dentro do sort)
+    if len(incoming) * math.log2(len(history) + 1) * BISECT_COST < len(history):
+        merged = []
+        start = 0
+        # As novas vêm ordenadas: cada pesquisa começa onde acabou a anterior,
+        # e o histórico é copiado por fatias (em C) entre posições de inserção
+        for item in incoming:
+            position = _insert_position(history, key(item), key, reverse, start)
+            merged.extend(history[start:position])
+            merged.append(item)
+            start = position
+        merged.extend(history[start:])
+        return merged
+
+    # Sort estável sobre dois runs ordenados: o timsort só os junta
+    return sorted(list(history) + incoming, key=key, reverse=reverse)
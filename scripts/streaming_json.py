@@ -0,0 +1,82 @@
+"""
+Escrita de JSON em streaming
+
+json.dump precisa do objeto completo em memória. Aqui, listas grandes podem
+ser passadas como StreamedList (um callable que devolve um iterável) e são
+escritas elemento a elemento — o resto do objeto é serializado normalmente.
+O resultado é byte a byte igual ao de json.dump(obj, f, indent=2).
+
+    summary = {"stats": {...}, "activities": StreamedList(store.iter_activities)}
+    write_json(DATA_FILE, summary)
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Callable, Iterable
+
+
+class StreamedList:
+    """Lista serializada por partes. `source()` pode ser chamado mais que uma vez."""
+
+    def __init__(self, source: Callable[[], Iterable]):
+        self._source = source
+
+    def __iter__(self):
+        return iter(self._source())
+
+
+def _has_stream(value) -> bool:
+    if isinstance(value, StreamedList):
+        return True
+    if isinstance(value, dict):
+        return any(_has_stream(item) for item in value.values())
+    return False
+
+
+def _encode(value, level: int, indent: int, ensure_ascii: bool) -> str:
+    text = json.dumps(value, indent=indent, ensure_ascii=ensure_ascii)
+    if level and "\n" in text:
+        # Strings JSON nunca têm \n literal, por isso só as quebras de linha da indentação mudam
+        text = text.replace("\n", "\n" + " " * (indent * level))
+    return text
+
+
+def _write(value, f, level: int, indent: int, ensure_ascii: bool) -> None:
+    if isinstance(value, StreamedList):
+        inner = "\n" + " " * (indent * (level + 1))
+        first = True
+        for item in value:
+            f.write(("[" if first else ",") + inner)
+            f.write(_encode(item, level + 1, indent, ensure_ascii))
+            first = False
+        f.write("[]" if first else "\n" + " " * (indent * level) + "]")
+    elif isinstance(value, dict) and _has_stream(value):
+        inner = "\n" + " " * (indent * (level + 1))
+        first = True
+        for key, item in value.items():
+            f.write(("{" if first else ",") + inner + json.dumps(str(key), ensure_ascii=ensure_ascii) + ": ")
+            _write(item, f, level + 1, indent, ensure_ascii)
+            first = False
+        f.write("\n" + " " * (indent * level) + "}")
+    else:
+        f.write(_encode(value, level, indent, ensure_ascii))
+
+
+def dump(value, f, indent: int = 2, ensure_ascii: bool = False) -> None:
+    """Como json.dump(value, f, indent=indent), escrevendo StreamedList por partes."""
+    _write(value, f, 0, indent, ensure_ascii)
+
+
+def write_json(path, value, indent: int = 2, ensure_ascii: bool = False) -> int:
+    """
+    Escreve o JSON num ficheiro temporário e substitui o destino no fim
+    (uma falha a meio não deixa o ficheiro cortado). Devolve o tamanho em bytes.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        dump(value, f, indent=indent, ensure_ascii=ensure_ascii)
+    os.replace(tmp_path, path)
+    return path.stat().st_size
@@ -0,0 +1,209 @@
+"""
+Saída particionada do resumo Garmin para o site
+
+    public/data/garmin/header.json             stats, this_week, latest_run (cartões da página inicial)
+    public/data/garmin/sections/<secção>.json  rollups, windows, fitness, personal_bests, routes
+    public/data/garmin/activities/YYYY-MM.json atividades de cada mês (mais recente primeiro)
+    public/data/garmin/manifest.json           header, secções e shards com hash SHA-256
+
+O frontend lê o manifest e só pede os meses e as secções de que precisa.
+Ficheiros cujo conteúdo não mudou não são reescritos (nem mudam no Git): o
+header e o manifest não têm a hora da geração.
+
+Ativa-se com --sharded nos importadores; a partir daí, enquanto o manifest
+existir, todos os importadores o mantêm atualizado.
+
+As atividades podem vir de um iterável (ex.: StreamedList do store): como
+vêm ordenadas por data, cada shard é escrito assim que o mês muda
+(write_month_files, também usado por api_slices.py).
+"""
+
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+SHARDS_DIR = "public/data/garmin"
+MANIFEST_VERSION = 1
+UNKNOWN_MONTH = "unknown"
+# O header só tem o que os cartões da página inicial leem (o incremental tem as stats no topo)
+HEADER_KEYS = (
+    "stats", "this_week", "latest_run",
+    "total_runs", "total_distance", "total_time", "total_time_seconds",
+    "avg_distance", "avg_pace", "marathon_progress",
+)
+# Secções maiores, cada uma no seu ficheiro (só as páginas que as mostram as pedem)
+SECTION_KEYS = ("rollups", "windows", "fitness", "personal_bests", "routes")
+
+_ISO_MONTH = re.compile(r"^(\d{4})-(\d{2})")
+_DISPLAY_MONTH = re.compile(r"^\d{1,2}/(\d{1,2})/(\d{4})")
+
+
+def dumps_compact(data) -> bytes:
+    """JSON compacto e determinístico (o mesmo conteúdo dá sempre o mesmo hash)."""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def month_key(activity: dict) -> str:
+    """YYYY-MM da atividade (iso_date, date ISO ou DD/MM/YYYY)."""
+    for key in ("iso_date", "date"):
+        value = str(activity.get(key) or "")
+        match = _ISO_MONTH.match(value)
+        if match:
+            return f"{match.group(1)}-{match.group(2)}"
+        match = _DISPLAY_MONTH.match(value)
+        if match:
+            return f"{match.group(2)}-{int(match.group(1)):02d}"
+    return UNKNOWN_MONTH
+
+
+def write_if_changed(path: Path, content: bytes, known_hash: str | None) -> tuple[str, bool]:
+    """(hash, escrito?): só reescreve (de forma atómica) se o hash mudou ou o ficheiro falta."""
+    digest = hashlib.sha256(content).hexdigest()
+    if digest == known_hash and path.exists():
+        return digest, False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_bytes(content)
+    os.replace(tmp_path, path)
+    return digest, True
+
+
+def write_month_files(activities: Iterable[dict], root: Path, rel_file: Callable[[str], str],
+                      known: dict, payload: Optional[Callable[[str, list], object]] = None,
+                      unwrap: Optional[Callable[[object], list]] = None,
+                      skip: tuple = ()) -> dict:
+    """
+    Um ficheiro JSON por mês (root / rel_file(mês)), escrito quando o mês
+    muda: as atividades chegam ordenadas por data, por isso só o mês corrente
+    fica em memória. `payload(mês, atividades)` dá o conteúdo (por omissão a
+    lista) e `unwrap` volta a tirar a lista dele; `known` é {ficheiro: sha256}
+    da execução anterior (ficheiros iguais não são reescritos).
+
+    Um mês que reaparece (histórico fora de ordem) é junto ao ficheiro já
+    escrito nesta execução e comparado com o hash dessa escrita parcial, não
+    com o `known`: o conteúdo final pode ser igual ao da execução anterior
+    enquanto o disco só tem a primeira parte.
+
+    Devolve {mês: {"file", "sha256", "bytes", "count", "written"}}.
+    """
+    payload = payload or (lambda month, items: items)
+    unwrap = unwrap or (lambda data: data)
+    files: dict[str, dict] = {}
+
+    def flush(month: str, items: list) -> None:
+        if month in skip:
+            return
+        path_rel = rel_file(month)
+        known_hash = known.get(path_rel)
+        previous = files.get(month)
+        if previous is not None:
+            with open(root / path_rel, "r", encoding="utf-8") as f:
+                items = unwrap(json.load(f)) + items
+            known_hash = previous["sha256"]
+        content = dumps_compact(payload(month, items))
+        digest, written = write_if_changed(root / path_rel, content, known_hash)
+        files[month] = {
+            "file": path_rel,
+            "sha256": digest,
+            "bytes": len(content),
+            "count": len(items),
+            "written": written or bool(previous and previous["written"]),
+        }
+
+    current_month, buffer = None, []
+    for activity in activities:
+        month = month_key(activity)
+        if month != current_month and buffer:
+            flush(current_month, buffer)
+            buffer = []
+        current_month = month
+        buffer.append(activity)
+    if buffer:
+        flush(current_month, buffer)
+    return files
+
+
+def sharding_enabled(requested: bool = False, out_dir: str = SHARDS_DIR) -> bool:
+    """Pedido explicitamente ou já ativo (manifest existe → não deixar shards desatualizados)."""
+    return requested or (Path(out_dir) / "manifest.json").exists()
+
+
+def load_manifest(out_dir: str = SHARDS_DIR) -> dict:
+    path = Path(out_dir) / "manifest.json"
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_sharded_summary(summary: dict, out_dir: str = SHARDS_DIR) -> dict:
+    """
+    Escreve header + secções + shards mensais + manifest.
+    Devolve contagens {"written": n, "unchanged": n, "removed": n}.
+    """
+    root = Path(out_dir)
+    previous = load_manifest(out_dir)
+    known = {entry["file"]: entry["sha256"] for entry in previous.get("shards", [])}
+    known_header = (previous.get("header") or {}).get("sha256")
+    known_sections = {entry["file"]: entry["sha256"] for entry in (previous.get("sections") or {}).values()}
+
+    counts = {"written": 0, "unchanged": 0, "removed": 0}
+    months = write_month_files(
+        summary.get("activities") or [], root,
+        rel_file=lambda month: f"activities/{month}.json",
+        known=known,
+    )
+    for entry in months.values():
+        counts["written" if entry["written"] else "unchanged"] += 1
+    shards = [
+        {"month": month, "file": months[month]["file"], "sha256": months[month]["sha256"],
+         "count": months[month]["count"]}
+        for month in sorted(months, reverse=True)
+    ]
+
+    sections = {}
+    for name in SECTION_KEYS:
+        if name not in summary:
+            continue
+        rel_file = f"sections/{name}.json"
+        digest, _ = write_if_changed(root / rel_file, dumps_compact(summary[name]), known_sections.get(rel_file))
+        sections[name] = {"file": rel_file, "sha256": digest}
+
+    # Meses e secções que deixaram de existir
+    current_files = {shard["file"] for shard in shards} | {entry["file"] for entry in sections.values()}
+    for rel_file in (set(known) | set(known_sections)) - current_files:
+        stale = root / rel_file
+        if stale.exists():
+            stale.unlink()
+            counts["removed"] += 1
+
+    header = {key: summary[key] for key in HEADER_KEYS if key in summary}
+    header_hash, _ = write_if_changed(root / "header.json", dumps_compact(header), known_header)
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "total_activities": sum(shard["count"] for shard in shards),
+        "header": {"file": "header.json", "sha256": header_hash},
+        "sections": sections,
+        "shards": shards,
+    }
+    manifest_path = root / "manifest.json"
+    current_hash = hashlib.sha256(manifest_path.read_bytes()).hexdigest() if manifest_path.exists() else None
+    write_if_changed(manifest_path, json.dumps(manifest, indent=2, ensure_ascii=False).encode("utf-8"), current_hash)
+    return counts
+
+
+def print_shard_report(counts: dict, out_dir: str = SHARDS_DIR) -> None:
+    print(
+        f"🧩 Shards em {out_dir}: {counts['written']} reescrito(s), "
+        f"{counts['unchanged']} inalterado(s), {counts['removed']} removido(s)"
+    )
+
+
+if __name__ == "__main__":
+    data_file = "public/data/garmin_summary.json"
+    with open(data_file, "r", encoding="utf-8") as f:
+        print_shard_report(write_sharded_summary(json.load(f)))
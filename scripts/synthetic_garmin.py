@@ -0,0 +1,433 @@
+"""
+Gerador de dados sintéticos do Garmin para benchmarks
+Escreve ficheiros .FIT mínimos (file_id + records + session) legíveis pelo fitparse
+e exports CSV do Garmin Connect (cabeçalhos em inglês ou português)
+
+Como usar:
+    python scripts/synthetic_garmin.py --fit 500 --out /tmp/garmin_fit
+    python scripts/synthetic_garmin.py --fit 0 --csv-rows 100000 --out /tmp/garmin_csv
+"""
+
+import argparse
+import csv
+import random
+import math
+import struct
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Epoch do protocolo FIT (1989-12-31 00:00:00 UTC)
+FIT_EPOCH = datetime(1989, 12, 31, tzinfo=timezone.utc)
+
+_CRC_TABLE = (
+    0x0000, 0xCC01, 0xD801, 0x1400, 0xF001, 0x3C00, 0x2800, 0xE401,
+    0xA001, 0x6C00, 0x7800, 0xB401, 0x5000, 0x9C01, 0x8801, 0x4400,
+)
+
+# Base types FIT: (código, formato struct)
+_ENUM = (0x00, "B")
+_UINT8 = (0x02, "B")
+_UINT16 = (0x84, "H")
+_SINT32 = (0x85, "i")
+_UINT32 = (0x86, "I")
+
+# (field_def_num, base_type) por mensagem global
+_FILE_ID_FIELDS = [(0, _ENUM), (4, _UINT32)]  # type, time_created
+_SESSION_FIELDS = [
+    (2, _UINT32),   # start_time
+    (7, _UINT32),   # total_elapsed_time (ms)
+    (8, _UINT32),   # total_timer_time (ms)
+    (9, _UINT32),   # total_distance (cm)
+    (11, _UINT16),  # total_calories
+    (16, _UINT8),   # avg_heart_rate
+    (17, _UINT8),   # max_heart_rate
+    (22, _UINT16),  # total_ascent
+    (5, _ENUM),     # sport
+]
+_RECORD_FIELDS = [
+    (253, _UINT32),  # timestamp
+    (0, _SINT32),    # position_lat (semicircles)
+    (1, _SINT32),    # position_long (semicircles)
+    (2, _UINT16),    # altitude (m * 5 + 500)
+    (3, _UINT8),     # heart_rate
+    (4, _UINT8),     # cadence
+    (5, _UINT32),    # distance (cm)
+    (6, _UINT16),    # speed (mm/s)
+]
+_SEMICIRCLES = 2 ** 31 / 180
+_INVALID_UINT8 = 0xFF
+_INVALID_SINT32 = 0x7FFFFFFF
+
+
+def _crc16(data: bytes, crc: int = 0) -> int:
+    for byte in data:
+        tmp = _CRC_TABLE[crc & 0xF]
+        crc = ((crc >> 4) & 0x0FFF) ^ tmp ^ _CRC_TABLE[byte & 0xF]
+        tmp = _CRC_TABLE[crc & 0xF]
+        crc = ((crc >> 4) & 0x0FFF) ^ tmp ^ _CRC_TABLE[(byte >> 4) & 0xF]
+    return crc
+
+
+def fit_timestamp(dt: datetime) -> int:
+    """Converte datetime em segundos desde o epoch FIT."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int((dt - FIT_EPOCH).total_seconds())
+
+
+def _definition(local_type: int, global_num: int, fields) -> bytes:
+    out = struct.pack("<BBBHB", 0x40 | local_type, 0, 0, global_num, len(fields))
+    for field_num, (base_type, fmt) in fields:
+        out += struct.pack("<BBB", field_num, struct.calcsize(fmt), base_type)
+    return out
+
+
+def _data(local_type: int, fields, values) -> bytes:
+    fmt = "<B" + "".join(base[1] for _, base in fields)
+    return struct.pack(fmt, local_type, *values)
+
+
+def encode_fit(messages) -> bytes:
+    """
+    Monta um ficheiro FIT a partir de blocos já codificados
+    (definições + dados), acrescentando header e CRC.
+    """
+    body = b"".join(messages)
+    header = struct.pack("<BBHI4s", 14, 0x10, 2093, len(body), b".FIT")
+    header += struct.pack("<H", _crc16(header))
+    payload = header + body
+    return payload + struct.pack("<H", _crc16(payload))
+
+
+def record_values(start: datetime, distance_km: float, duration_s: float,
+                  avg_hr: int, seed: int = 0, lat: float = 38.72, lon: float = -9.14,
+                  missing_rate: float = 0.0):
+    """
+    Valores brutos FIT (ordem de _RECORD_FIELDS) de cada record (1 Hz), com um
+    trajeto em loop à volta de (lat, lon). Uma fração `missing_rate` dos
+    records perde a FC ou o GPS (valor inválido do FIT, como quando a cinta
+    ou o sinal falham).
+    """
+    rng = random.Random(seed)
+    ts = fit_timestamp(start)
+    samples = max(2, int(duration_s))
+    speed = distance_km * 1000 / duration_s
+    radius = distance_km * 1000 / (2 * math.pi) / 111_320
+    distance_m = 0.0
+    for second in range(samples):
+        current_speed = max(0.5, speed * rng.uniform(0.9, 1.1))
+        distance_m += current_speed
+        angle = 2 * math.pi * second / samples
+        point_lat = lat + radius * math.sin(angle)
+        point_lon = lon + radius * math.cos(angle)
+        values = [
+            ts + second,
+            int(point_lat * _SEMICIRCLES),
+            int(point_lon * _SEMICIRCLES),
+            int((50 + 10 * math.sin(angle * 3) + 500) * 5),
+            max(60, min(210, avg_hr + rng.randint(-8, 8))),
+            rng.randint(80, 90),
+            int(distance_m * 100),
+            int(current_speed * 1000),
+        ]
+        if missing_rate and rng.random() < missing_rate:
+            if rng.random() < 0.5:
+                values[4] = _INVALID_UINT8
+            else:
+                values[1] = values[2] = _INVALID_SINT32
+        yield values
+
+
+def record_messages(start: datetime, distance_km: float, duration_s: float,
+                    avg_hr: int, seed: int = 0, missing_rate: float = 0.0):
+    """Mensagens record (1 Hz) de record_values()."""
+    messages = [_definition(2, 20, _RECORD_FIELDS)]
+    for values in record_values(start, distance_km, duration_s, avg_hr, seed,
+                                missing_rate=missing_rate):
+        messages.append(_data(2, _RECORD_FIELDS, values))
+    return messages
+
+
+def session_messages(start: datetime, distance_km: float, duration_s: float,
+                     avg_hr: int, max_hr: int, calories: int, ascent: int = 0):
+    """Mensagens file_id + session de uma corrida."""
+    ts = fit_timestamp(start)
+    return [
+        _definition(0, 0, _FILE_ID_FIELDS),
+        _data(0, _FILE_ID_FIELDS, (4, ts)),
+        _definition(1, 18, _SESSION_FIELDS),
+        _data(
+            1,
+            _SESSION_FIELDS,
+            (
+                ts,
+                int(round(duration_s * 1000)),
+                int(round(duration_s * 1000)),
+                int(round(distance_km * 100000)),
+                calories,
+                avg_hr,
+                max_hr,
+                ascent,
+                1,  # running
+            ),
+        ),
+    ]
+
+
+def random_run(rng: random.Random, start: datetime) -> dict:
+    """Corrida plausível: 3–25 km a 4:30–8:00/km."""
+    distance = round(rng.uniform(3, 25), 2)
+    pace = rng.uniform(270, 480)
+    avg_hr = rng.randint(125, 175)
+    return {
+        "start": start,
+        "distance_km": distance,
+        "duration_s": distance * pace,
+        "avg_hr": avg_hr,
+        "max_hr": min(205, avg_hr + rng.randint(8, 25)),
+        "calories": int(distance * rng.uniform(60, 75)),
+        "ascent": rng.randint(0, 250),
+    }
+
+
+def iter_runs(count: int, seed: int = 42, start: datetime | None = None,
+              per_day: float | None = None):
+    """
+    Gera `count` corridas determinísticas, uma a cada ~1-2 dias.
+    Com per_day, a média passa a ser `per_day` corridas por dia (históricos
+    grandes, ex. vários atletas, sem espalhar as datas por séculos).
+    """
+    rng = random.Random(seed)
+    current = start or datetime(2020, 1, 1, 7, 0, tzinfo=timezone.utc)
+    for _ in range(count):
+        if per_day:
+            current += timedelta(minutes=rng.uniform(0, 2 * 24 * 60 / per_day))
+        else:
+            current += timedelta(hours=rng.randint(20, 52), minutes=rng.randint(0, 59))
+        yield random_run(rng, current)
+
+
+def write_fit_activity(path, run: dict, records: bool = False, seed: int = 0,
+                       missing_rate: float = 0.0) -> Path:
+    """Escreve uma corrida (dict de random_run) como ficheiro .FIT."""
+    path = Path(path)
+    header = session_messages(**run)
+    messages = header[:2]
+    if records:
+        messages += record_messages(
+            run["start"], run["distance_km"], run["duration_s"], run["avg_hr"], seed=seed,
+            missing_rate=missing_rate,
+        )
+    path.write_bytes(encode_fit(messages + header[2:]))
+    return path
+
+
+def write_fit_folder(out_dir, count: int, seed: int = 42, records: bool = False,
+                     missing_rate: float = 0.0) -> list[Path]:
+    """Escreve `count` ficheiros .FIT sintéticos em out_dir."""
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for index, run in enumerate(iter_runs(count, seed)):
+        paths.append(
+            write_fit_activity(
+                out / f"synthetic_{index:06d}.fit", run, records, seed + index, missing_rate
+            )
+        )
+    return paths
+
+
+def _xml_points(run: dict, seed: int, missing_rate: float):
+    """Pontos de record_values() em unidades físicas (None onde o FIT tem inválido)."""
+    for ts, lat, lon, altitude, hr, cadence, distance, speed in record_values(
+        run["start"], run["distance_km"], run["duration_s"], run["avg_hr"], seed,
+        missing_rate=missing_rate,
+    ):
+        has_position = lat != _INVALID_SINT32
+        yield {
+            "time": (FIT_EPOCH + timedelta(seconds=ts)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "lat": lat / _SEMICIRCLES if has_position else None,
+            "lon": lon / _SEMICIRCLES if has_position else None,
+            "altitude": altitude / 5 - 500,
+            "hr": hr if hr != _INVALID_UINT8 else None,
+            "cadence": cadence,
+            "distance": distance / 100,
+        }
+
+
+def write_gpx_activity(path, run: dict, seed: int = 0, missing_rate: float = 0.0) -> Path:
+    """A mesma corrida de write_fit_activity(records=True) em GPX 1.1 (FC/cadência em extensions)."""
+    path = Path(path)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<gpx version="1.1" creator="synthetic_garmin" xmlns="http://www.topografix.com/GPX/1/1" '
+            'xmlns:gpxtpx="http://www.garmin.com/xmlschemas/TrackPointExtension/v1">\n'
+            f'<trk><name>{path.stem}</name><type>running</type><trkseg>\n'
+        )
+        for point in _xml_points(run, seed, missing_rate):
+            if point["lat"] is None:
+                continue  # GPX não tem pontos sem posição
+            hr = f"<gpxtpx:hr>{point['hr']}</gpxtpx:hr>" if point["hr"] is not None else ""
+            f.write(
+                f'<trkpt lat="{point["lat"]:.7f}" lon="{point["lon"]:.7f}">'
+                f'<ele>{point["altitude"]:.1f}</ele><time>{point["time"]}</time>'
+                f"<extensions><gpxtpx:TrackPointExtension>{hr}"
+                f"<gpxtpx:cad>{point['cadence']}</gpxtpx:cad>"
+                "</gpxtpx:TrackPointExtension></extensions></trkpt>\n"
+            )
+        f.write("</trkseg></trk></gpx>\n")
+    return path
+
+
+def write_tcx_activity(path, run: dict, seed: int = 0, missing_rate: float = 0.0) -> Path:
+    """A mesma corrida de write_fit_activity(records=True) em TCX (uma volta)."""
+    path = Path(path)
+    start = run["start"].strftime("%Y-%m-%dT%H:%M:%SZ")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<TrainingCenterDatabase xmlns="http://www.garmin.com/xmlschemas/TrainingCenterDatabase/v2" '
+            'xmlns:ns3="http://www.garmin.com/xmlschemas/ActivityExtension/v2">\n'
+            f'<Activities><Activity Sport="Running"><Id>{start}</Id><Lap StartTime="{start}">'
+            f'<TotalTimeSeconds>{run["duration_s"]:.3f}</TotalTimeSeconds>'
+            f'<DistanceMeters>{run["distance_km"] * 1000:.2f}</DistanceMeters>'
+            f'<Calories>{run["calories"]}</Calories>'
+            f'<AverageHeartRateBpm><Value>{run["avg_hr"]}</Value></AverageHeartRateBpm>'
+            f'<MaximumHeartRateBpm><Value>{run["max_hr"]}</Value></MaximumHeartRateBpm>'
+            "<Track>\n"
+        )
+        for point in _xml_points(run, seed, missing_rate):
+            position = ""
+            if point["lat"] is not None:
+                position = (
+                    f"<Position><LatitudeDegrees>{point['lat']:.7f}</LatitudeDegrees>"
+                    f"<LongitudeDegrees>{point['lon']:.7f}</LongitudeDegrees></Position>"
+                )
+            hr = f"<HeartRateBpm><Value>{point['hr']}</Value></HeartRateBpm>" if point["hr"] is not None else ""
+            f.write(
+                f"<Trackpoint><Time>{point['time']}</Time>{position}"
+                f"<AltitudeMeters>{point['altitude']:.1f}</AltitudeMeters>"
+                f"<DistanceMeters>{point['distance']:.2f}</DistanceMeters>{hr}"
+                f"<Extensions><ns3:TPX><ns3:RunCadence>{point['cadence']}</ns3:RunCadence>"
+                "</ns3:TPX></Extensions></Trackpoint>\n"
+            )
+        f.write("</Track></Lap></Activity></Activities></TrainingCenterDatabase>\n")
+    return path
+
+
+XML_WRITERS = {"gpx": write_gpx_activity, "tcx": write_tcx_activity}
+
+
+def write_xml_folder(out_dir, count: int, fmt: str = "gpx", seed: int = 42,
+                     missing_rate: float = 0.0, runs=None) -> list[Path]:
+    """Escreve `count` corridas (as mesmas de write_fit_folder) em .gpx ou .tcx."""
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    writer = XML_WRITERS[fmt]
+    return [
+        writer(out / f"synthetic_{index:06d}.{fmt}", run, seed + index, missing_rate)
+        for index, run in enumerate(runs or iter_runs(count, seed))
+    ]
+
+
+# Colunas do "Activities.csv" do Garmin Connect, por idioma
+CSV_HEADERS = {
+    "en": ["Activity Type", "Date", "Favorite", "Title", "Distance", "Calories", "Time",
+           "Avg HR", "Max HR", "Avg Run Cadence", "Avg Pace", "Total Ascent", "Total Descent"],
+    "pt": ["Tipo de atividade", "Data", "Favorito", "Título", "Distância", "Calorias", "Tempo",
+           "FC Média", "FC máxima", "Cadência média de corrida", "Ritmo médio", "Subida total",
+           "Descida total"],
+}
+
+
+def _clock(seconds: float) -> str:
+    total = int(round(seconds))
+    return f"{total // 3600:02d}:{total % 3600 // 60:02d}:{total % 60:02d}"
+
+
+def csv_row(run: dict, language: str = "en", no_sensors: bool = False) -> list[str]:
+    """
+    Linha do Activities.csv para uma corrida (dict de random_run).
+    Com no_sensors=True, FC/cadência/elevação vêm como "--" (como o Garmin
+    exporta corridas sem cinta ou sem altímetro).
+    """
+    pace = run["duration_s"] / run["distance_km"]
+    local_start = run["start"].strftime("%Y-%m-%d %H:%M:%S")
+    title = "Corrida" if language == "pt" else "Running"
+    decimal = (lambda value: value.replace(".", ",")) if language == "pt" else str
+    return [
+        title,
+        local_start,
+        "false",
+        f"Lisboa {title}",
+        decimal(f"{run['distance_km']:.2f}"),
+        str(run["calories"]),
+        _clock(run["duration_s"]),
+        "--" if no_sensors else str(run["avg_hr"]),
+        "--" if no_sensors else str(run["max_hr"]),
+        "--" if no_sensors else str(150 + run["calories"] % 35),
+        f"{int(pace) // 60}:{int(pace) % 60:02d}",
+        "--" if no_sensors else str(run["ascent"]),
+        "--" if no_sensors else str(run["ascent"]),
+    ]
+
+
+def write_csv_export(path, count: int, seed: int = 42, language: str = "en",
+                     missing_rate: float = 0.05, per_day: float | None = None) -> Path:
+    """
+    Escreve um Activities.csv com `count` corridas (mais recente primeiro,
+    como o Garmin). Uma fração `missing_rate` das linhas vem com "--".
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    runs = list(iter_runs(count, seed, per_day=per_day))
+    rng = random.Random(seed + 1)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_HEADERS[language])
+        writer.writerows(
+            csv_row(run, language, rng.random() < missing_rate) for run in reversed(runs)
+        )
+    return path
+
+
+def fit_session_record(run: dict, title: str = "synthetic") -> dict:
+    """O que parse_fit_file devolve para a sessão de uma corrida (sem ler o .FIT)."""
+    return {
+        "distance": round(run["distance_km"] * 1000) / 1000,
+        "total_time": round(run["duration_s"], 3),
+        "average_heartrate": run["avg_hr"],
+        "max_heart_rate": run["max_hr"],
+        "calories": run["calories"],
+        "date": run["start"].replace(microsecond=0).isoformat(),
+        "title": title,
+    }
+
+
+def iter_fit_session_records(count: int, seed: int = 42):
+    """Registos de sessão .FIT já parseados, para medir sem o custo do fitparse."""
+    for index, run in enumerate(iter_runs(count, seed)):
+        yield fit_session_record(run, f"synthetic_{index:06d}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera exports Garmin sintéticos")
+    parser.add_argument("--fit", type=int, default=100, help="nº de ficheiros .FIT")
+    parser.add_argument("--out", default="data/synthetic_exports", help="pasta de saída")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--records", action="store_true", help="inclui mensagens record (1 Hz)")
+    parser.add_argument("--csv-rows", type=int, default=0, help="nº de linhas do Activities.csv")
+    parser.add_argument("--language", choices=sorted(CSV_HEADERS), default="en")
+    parser.add_argument("--per-day", type=float, help="média de corridas por dia no CSV")
+    args = parser.parse_args()
+
+    if args.fit:
+        written = write_fit_folder(args.out, args.fit, args.seed, args.records)
+        print(f"✅ {len(written)} ficheiros .FIT escritos em {args.out}")
+    if args.csv_rows:
+        csv_path = write_csv_export(
+            Path(args.out) / "Activities.csv", args.csv_rows, args.seed, args.language,
+            per_day=args.per_day,
+        )
+        print(f"✅ {args.csv_rows} linhas CSV escritas em {csv_path}")
@@ -0,0 +1,186 @@
+"""
+Zonas de frequência cardíaca e carga de treino (TRIMP) por corrida
+
+- Zonas: modelo de 5 zonas, com limites em fração da FC máxima (ou da FC de
+  reserva, HR_ZONE_BASIS=reserve). Tempo abaixo da zona 1 não conta.
+- TRIMP de Banister: Σ minutos × HRr × 0.64 × e^(k × HRr), com
+  HRr = (FC - FC repouso) / (FC máx - FC repouso).
+
+Com o stream por segundo (fit_records.py) tudo é calculado em NumPy, num só
+lote para todas as atividades (np.bincount por atividade). Corridas que só
+vêm do CSV usam a FC média durante todo o tempo (estimativa, hr_source="avg_hr").
+
+Configuração (variáveis de ambiente):
+    HR_MAX=190  HR_REST=50  HR_ZONES=0.5,0.6,0.7,0.8,0.9  HR_ZONE_BASIS=max  HR_TRIMP_K=1.92
+"""
+
+import math
+import os
+from typing import Optional
+
+try:
+    import numpy as np
+except ImportError:  # a estimativa pela FC média não precisa de numpy
+    np = None
+
+ZONE_COUNT = 5
+LOAD_FIELDS = ("hr_zones", "trimp", "hr_source")
+# Intervalo maior que isto entre records é pausa: não conta para as zonas
+MAX_SAMPLE_GAP_S = 10
+# FC em bpm inteiros (uint8 no FIT)
+_BPM_LEVELS = 256
+# Amostras por lote: lotes de ~8 corridas cabem na cache do CPU (mais rápido
+# que uma corrida de cada vez ou que o histórico inteiro num só array)
+BATCH_SAMPLES = 50_000
+
+
+def _env_floats(name: str, default: str) -> list[float]:
+    return [float(value) for value in os.getenv(name, default).split(",")]
+
+
+class HeartRateModel:
+    """Limites das zonas (bpm) e fator de TRIMP para um atleta."""
+
+    def __init__(self, max_hr: float = 190, rest_hr: float = 50,
+                 zones: tuple = (0.5, 0.6, 0.7, 0.8, 0.9), basis: str = "max",
+                 trimp_k: float = 1.92):
+        if len(zones) != ZONE_COUNT or list(zones) != sorted(zones):
+            raise ValueError(f"HR_ZONES precisa de {ZONE_COUNT} limites crescentes: {zones}")
+        if basis not in ("max", "reserve"):
+            raise ValueError(f"HR_ZONE_BASIS inválido: {basis}")
+        self.max_hr = max_hr
+        self.rest_hr = rest_hr
+        self.trimp_k = trimp_k
+        reserve = max_hr - rest_hr
+        # Limite inferior de cada zona, em bpm
+        self.zone_floors = [
+            fraction * max_hr if basis == "max" else rest_hr + fraction * reserve
+            for fraction in zones
+        ]
+
+    @classmethod
+    def from_env(cls) -> "HeartRateModel":
+        return cls(
+            max_hr=float(os.getenv("HR_MAX", "190")),
+            rest_hr=float(os.getenv("HR_REST", "50")),
+            zones=tuple(_env_floats("HR_ZONES", "0.5,0.6,0.7,0.8,0.9")),
+            basis=os.getenv("HR_ZONE_BASIS", "max"),
+            trimp_k=float(os.getenv("HR_TRIMP_K", "1.92")),
+        )
+
+    def zone(self, hr: float) -> Optional[int]:
+        """Índice da zona (0-4) de uma FC, ou None abaixo da zona 1."""
+        index = -1
+        for floor in self.zone_floors:
+            if hr >= floor:
+                index += 1
+        return index if index >= 0 else None
+
+    def trimp_per_minute(self, hr: float) -> float:
+        reserve = min(max((hr - self.rest_hr) / (self.max_hr - self.rest_hr), 0.0), 1.0)
+        return reserve * 0.64 * math.exp(self.trimp_k * reserve)
+
+
+DEFAULT_MODEL = HeartRateModel.from_env()
+
+
+def _load_fields(zone_seconds, trimp: float, source: str) -> dict:
+    return {
+        "hr_zones": [int(round(seconds)) for seconds in zone_seconds],
+        "trimp": round(float(trimp), 1),
+        "hr_source": source,
+    }
+
+
+def estimate_from_avg_hr(avg_hr, seconds, model: HeartRateModel = DEFAULT_MODEL) -> dict:
+    """Estimativa para corridas sem stream: FC média durante todo o tempo."""
+    try:
+        avg_hr, seconds = float(avg_hr or 0), float(seconds or 0)
+    except (TypeError, ValueError):
+        return {}
+    if avg_hr <= 0 or seconds <= 0:
+        return {}
+    zone_seconds = [0] * ZONE_COUNT
+    zone = model.zone(avg_hr)
+    if zone is not None:
+        zone_seconds[zone] = seconds
+    return _load_fields(zone_seconds, seconds / 60 * model.trimp_per_minute(avg_hr), "avg_hr")
+
+
+def stream_loads(blocks, model: HeartRateModel = DEFAULT_MODEL) -> list[dict]:
+    """
+    Zonas e TRIMP de várias atividades (RecordBlock), em lotes.
+    Atividades sem FC devolvem {}.
+    """
+    results, batch, batch_samples = [], [], 0
+    for block in blocks:
+        batch.append(block)
+        batch_samples += len(block)
+        if batch_samples >= BATCH_SAMPLES:
+            results.extend(_stream_loads_batch(batch, model))
+            batch, batch_samples = [], 0
+    if batch:
+        results.extend(_stream_loads_batch(batch, model))
+    return results
+
+
+def _stream_loads_batch(blocks: list, model: HeartRateModel) -> list[dict]:
+    """
+    A FC do FIT é um inteiro (bpm): um histograma por atividade (segundos em
+    cada bpm, um só np.bincount para o lote) chega para as zonas e o TRIMP,
+    que passam a ser produtos por tabelas de 256 valores.
+    """
+    hr = np.concatenate([block["heart_rate"] for block in blocks])
+    # Duração de cada amostra: até à seguinte, limitada (pausas não contam)
+    seconds = np.concatenate([
+        np.clip(np.diff(block["timestamp"], append=block["timestamp"][-1:] + 1), 0, MAX_SAMPLE_GAP_S)
+        for block in blocks
+    ])
+    owner = np.repeat(np.arange(len(blocks)), [len(block) for block in blocks])
+
+    valid = ~np.isnan(hr)
+    bpm = np.clip(np.rint(hr[valid]), 0, _BPM_LEVELS - 1).astype(np.intp)
+    histogram = np.bincount(
+        owner[valid] * _BPM_LEVELS + bpm,
+        weights=seconds[valid],
+        minlength=len(blocks) * _BPM_LEVELS,
+    ).reshape(len(blocks), _BPM_LEVELS)
+
+    levels = np.arange(_BPM_LEVELS)
+    zone = np.searchsorted(np.asarray(model.zone_floors), levels, side="right") - 1
+    zone_matrix = (zone[:, None] == np.arange(ZONE_COUNT)).astype(np.float64)
+    reserve = np.clip((levels - model.rest_hr) / (model.max_hr - model.rest_hr), 0.0, 1.0)
+    trimp_per_second = reserve * 0.64 * np.exp(model.trimp_k * reserve) / 60
+
+    zone_seconds = histogram @ zone_matrix
+    trimp = histogram @ trimp_per_second
+    samples = np.bincount(owner[valid], minlength=len(blocks))
+    return [
+        _load_fields(zone_seconds[index], trimp[index], "stream") if samples[index] else {}
+        for index in range(len(blocks))
+    ]
+
+
+def activity_load(activity: dict, model: HeartRateModel = DEFAULT_MODEL) -> dict:
+    """Campos de carga da atividade; estima pela FC média se ainda não existirem."""
+    if "trimp" in activity:
+        return {key: activity[key] for key in LOAD_FIELDS if key in activity}
+    avg_hr = next(
+        (activity.get(key) for key in ("avg_hr", "average_heartrate") if activity.get(key)), None
+    )
+    seconds = activity.get("time_seconds")
+    if seconds is None:
+        seconds = activity.get("total_time")
+    return estimate_from_avg_hr(avg_hr, seconds, model)
+
+
+def add_training_load(activity: dict, source: Optional[dict] = None) -> dict:
+    """
+    Acrescenta hr_zones/trimp/hr_source a `activity`: copiados de `source`
+    (ex.: atividade original com análise do stream) ou estimados pela FC média.
+    """
+    if source is not None and "trimp" in source:
+        activity.update(activity_load(source))
+    else:
+        activity.update(activity_load(activity))
+    return activity
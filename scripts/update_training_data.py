@@ -9,20 +9,51 @@ Como usar:
 4. Relaxa! O script faz tudo sozinho 🚀
 """
 
+import argparse
 import json
 import os
-import shutil
 import glob
-import csv
 import subprocess
-from datetime import datetime, timedelta
+from datetime import datetime
+from itertools import islice
 from pathlib import Path
-from typing import Optional, Union
+from typing import Iterator, Optional, Union
+
+from activity_store import ActivityStore
+from api_slices import print_slice_report, write_api_slices
+from backup_store import BackupStore
+from best_efforts import personal_bests
+from csv_columns import iter_csv_fields
+from date_formats import DateParser
+from date_windows import ActivityTimeline, earliest_start
+from duplicate_index import CLOCK_KEY, merge_duplicates
+from fitness_model import FitnessModel
+from parse_cache import ParseCache, file_sha256
+from pipeline_metrics import METRICS_DIR, NullMetrics, PipelineMetrics
+from rollups import Rollups
+from route_index import route_table
+from running_aggregates import RunningAggregates
+from streaming_json import StreamedList, write_json
+from summary_shards import (
+    SHARDS_DIR,
+    print_shard_report,
+    sharding_enabled,
+    write_sharded_summary,
+)
+from training_load import add_training_load
 
 # Configurações
 GARMIN_EXPORTS_DIR = "data/garmin_exports"
 DATA_FILE = "public/data/garmin_summary.json"
 BACKUP_DIR = "data/backups"
+METRICS_FILE = f"{METRICS_DIR}/update_training_data.json"
+# Meta do store com o garmin_summary.json que este script escreveu por último
+SUMMARY_META_KEY = "summary_file"
+# CSV maiores que isto não passam pela cache de parse: são lidos em streaming
+CACHED_CSV_MAX_BYTES = 16 * 1024 * 1024
+
+# Sem main() (ex.: benchmarks) as funções correm sem medição
+NULL_METRICS = NullMetrics()
 
 
 def print_step(step_num, title):
@@ -32,7 +63,7 @@ def print_step(step_num, title):
     print(f"{'='*60}\n")
 
 
-def backup_data():
+def backup_data(metrics=NULL_METRICS):
     """PASSO 1: Cria backup dos dados existentes"""
     print_step(1, "BACKUP DE DADOS")
     
@@ -40,21 +71,20 @@ def backup_data():
         print("⚠️  Nenhum ficheiro de dados encontrado. A criar novo...")
         return False
     
-    # Cria pasta de backups
-    Path(BACKUP_DIR).mkdir(parents=True, exist_ok=True)
-    
-    # Nome do backup com timestamp
-    timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
-    backup_file = f"{BACKUP_DIR}/garmin_backup_{timestamp}.json"
-    
-    # Copia ficheiro
-    shutil.copy2(DATA_FILE, backup_file)
+    # Snapshot deduplicado: se nada mudou, não escreve nada
+    backups = BackupStore(BACKUP_DIR)
+    entry = backups.snapshot(DATA_FILE)
+    if entry["status"] == "new":
+        metrics.count("bytes_written", backups.object_path(entry["sha256"]).stat().st_size)
     
     # Lê stats
     with open(DATA_FILE, 'r', encoding='utf-8') as f:
         data = json.load(f)
     
-    print(f"✅ Backup criado: {backup_file}")
+    if entry["status"] == "unchanged":
+        print(f"ℹ️  Dados iguais ao último backup ({entry['timestamp']}) — nada a guardar.")
+    else:
+        print(f"✅ Backup criado: {entry['timestamp']} ({entry['sha256'][:12]})")
     stats_block = data.get("stats", {}) if isinstance(data, dict) else {}
     total_runs = stats_block.get("total_runs") or data.get("total_runs") if isinstance(data, dict) else None
     total_distance = stats_block.get("total_distance") or data.get("total_distance") if isinstance(data, dict) else None
@@ -102,13 +132,6 @@ def _parse_int(value: NumberLike) -> Optional[int]:
     return int(parsed) if parsed else None
 
 
-def _first_value(row: dict, keys: list[str]) -> Optional[str]:
-    for key in keys:
-        if key in row and row[key] not in (None, ""):
-            return row[key]
-    return None
-
-
 def _parse_time_to_seconds(time_str: str | None) -> int:
     """Normaliza tempo (HH:MM:SS ou segundos) em segundos, aceitando '--'."""
     if not time_str or str(time_str).strip() in {"", "--"}:
@@ -173,27 +196,16 @@ def _format_pace(seconds_per_km: float | int | None) -> str:
     return f"{minutes}:{secs:02d}/km"
 
 
-def _parse_datetime(value: str | None) -> datetime | None:
-    """Tenta interpretar vários formatos de data/hora."""
-    if not value:
-        return None
-
-    value = str(value).strip()
-    formats = [
-        "%Y-%m-%d %H:%M:%S",
-        "%Y-%m-%dT%H:%M:%S",
-        "%Y-%m-%d",
-        "%d/%m/%Y",
-        "%d/%m/%Y %H:%M:%S",
-    ]
-
-    for fmt in formats:
-        try:
-            return datetime.strptime(value, fmt)
-        except ValueError:
-            continue
-
-    return None
+DATE_FORMATS = [
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%d",
+    "%d/%m/%Y",
+    "%d/%m/%Y %H:%M:%S",
+]
+# Um parser por campo: cada um fixa o formato da sua coluna
+_ISO_DATES = DateParser(DATE_FORMATS)
+_RAW_DATES = DateParser(DATE_FORMATS)
 
 
 def _ensure_int(value: NumberLike) -> Optional[int]:
@@ -203,13 +215,22 @@ def _ensure_int(value: NumberLike) -> Optional[int]:
 
 def _normalize_activity(activity: dict) -> dict:
     """Normaliza uma atividade para o formato esperado pelo frontend."""
+    return _normalize_with_sort_key(activity)[0]
+
+
+def _normalize_with_sort_key(activity: dict) -> tuple[dict, float]:
+    """
+    Normaliza e devolve também a chave de ordenação (timestamp do dia),
+    calculada a partir da data já interpretada — não é preciso voltar a
+    fazer parse da data para ordenar.
+    """
     if activity is None:
-        return {}
+        return {}, 0
 
     # Determina data/hora
     raw_date = activity.get("date")
     iso_candidate = activity.get("iso_date") or activity.get("iso_timestamp")
-    dt = _parse_datetime(iso_candidate) or _parse_datetime(raw_date)
+    dt = _ISO_DATES.parse(iso_candidate) or _RAW_DATES.parse(raw_date)
 
     if dt:
         iso_date = dt.strftime("%Y-%m-%d")
@@ -254,7 +275,9 @@ def _normalize_activity(activity: dict) -> dict:
 
     title = activity.get("title") or "Corrida"
 
-    return {
+    sort_ts = datetime(dt.year, dt.month, dt.day).timestamp() if dt else 0
+
+    normalized = {
         "date": display_date,
         "iso_date": iso_date,
         "title": title,
@@ -267,6 +290,20 @@ def _normalize_activity(activity: dict) -> dict:
         "calories": calories,
         "elevation_gain": elevation,
     }
+    # "date" só guarda o dia: a hora de início e o relógio ficam para o duplicate_index
+    start_time = activity.get("start_time")
+    if not start_time and dt and (dt.hour, dt.minute, dt.second) != (0, 0, 0):
+        start_time = dt.strftime("%Y-%m-%dT%H:%M:%S")
+    if start_time:
+        normalized["start_time"] = start_time
+    if activity.get(CLOCK_KEY):
+        normalized[CLOCK_KEY] = activity[CLOCK_KEY]
+    # Melhores marcas, trajeto e percurso vêm do stream dos .FIT (import_garmin_exports --records)
+    for key in ("best_efforts", "track_id", "route_id"):
+        if activity.get(key):
+            normalized[key] = activity[key]
+    add_training_load(normalized, activity)
+    return normalized, sort_ts
 
 
 def _activity_signature(activity: dict) -> tuple:
@@ -278,155 +315,326 @@ def _activity_signature(activity: dict) -> tuple:
     )
 
 
-def _activity_sort_key(activity: dict) -> tuple:
-    dt = _parse_datetime(activity.get("date")) or _parse_datetime(activity.get("iso_date"))
-    timestamp = dt.timestamp() if dt else 0
-    return (timestamp, activity.get("time_seconds", 0))
+# Aliases PT/EN das colunas do export CSV (resolvidos uma vez por ficheiro)
+CSV_FIELDS = {
+    "distance": ['Distance', 'Distância', 'Distância (km)'],
+    "time": ['Time', 'Tempo'],
+    "avg_hr": ['Avg HR', 'FC Média'],
+    "calories": ['Calories', 'Calorias'],
+    "title": ['Title', 'Título'],
+    "date": ['Date', 'Data'],
+}
+
+
+def iter_csv_activities(file_path, metrics=NULL_METRICS) -> Iterator[dict]:
+    """Atividades de um CSV do Garmin, uma a uma (sem carregar o ficheiro todo)."""
+    for distance_raw, time_raw, avg_hr_raw, calories_raw, title, date in iter_csv_fields(file_path, CSV_FIELDS):
+        distance = _parse_float(distance_raw)
+        # Sem data não há como ordenar nem deduplicar (e a hora atual iria para a cache)
+        if distance <= 0 or not date:
+            metrics.count("rows_skipped")
+            continue
+
+        total_seconds = _parse_time_to_seconds(time_raw)
+
+        average_pace = (total_seconds / 60) / distance if distance > 0 else 0
 
+        yield {
+            "date": date,
+            "distance": distance,
+            "total_time": total_seconds,
+            "calories": _parse_int(calories_raw) or 0,
+            "average_heartrate": _parse_int(avg_hr_raw),
+            "average_pace": average_pace,
+            "average_speed": (distance / total_seconds) * 3600 if total_seconds > 0 else 0,
+            "title": title or 'Corrida',
+        }
 
-def parse_csv_file(file_path):
+
+def parse_csv_file(file_path, metrics=NULL_METRICS):
     """Parse ficheiro CSV do Garmin"""
-    activities = []
+    return list(iter_csv_activities(file_path, metrics))
 
-    with open(file_path, 'r', encoding='utf-8') as csvfile:
-        reader = csv.DictReader(csvfile)
 
-        for row in reader:
-            distance_raw = _first_value(row, ['Distance', 'Distância', 'Distância (km)'])
-            distance = _parse_float(distance_raw)
-            if distance <= 0:
-                continue
+def iter_normalized_csv(file_path, metrics=NULL_METRICS) -> Iterator[tuple[dict, float]]:
+    """(atividade normalizada, timestamp de ordenação) para cada linha do CSV."""
+    for activity in iter_csv_activities(file_path, metrics):
+        yield _normalize_with_sort_key(activity)
 
-            time_raw = _first_value(row, ['Time', 'Tempo'])
-            total_seconds = _parse_time_to_seconds(time_raw)
 
-            average_pace = (total_seconds / 60) / distance if distance > 0 else 0
+def parse_normalized_csv(file_path, metrics=NULL_METRICS) -> list:
+    """Linhas normalizadas do CSV como lista (formato guardado na ParseCache)."""
+    return list(iter_normalized_csv(file_path, metrics))
 
-            avg_hr = _parse_int(_first_value(row, ['Avg HR', 'FC Média']))
-            calories = _parse_int(_first_value(row, ['Calories', 'Calorias'])) or 0
-            title = _first_value(row, ['Title', 'Título']) or 'Corrida'
 
-            activity = {
-                "date": _first_value(row, ['Date', 'Data']) or datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                "distance": distance,
-                "total_time": total_seconds,
-                "calories": calories,
-                "average_heartrate": avg_hr,
-                "average_pace": average_pace,
-                "average_speed": (distance / total_seconds) * 3600 if total_seconds > 0 else 0,
-                "title": title,
-            }
+def seed_store_from_summary(store: ActivityStore) -> int:
+    """Migração: preenche o store a partir do garmin_summary.json existente."""
+    existing_data = load_existing_data()
+    inserted = 0
+    for activity in existing_data.get("activities", []):
+        normalized, sort_ts = _normalize_with_sort_key(activity)
+        inserted += store.upsert(normalized, sort_ts)
+    return inserted
 
-            activities.append(activity)
 
-    return activities
+def _summary_fingerprint() -> Optional[dict]:
+    """Tamanho, mtime e hash do garmin_summary.json (None se não existir)."""
+    if not os.path.exists(DATA_FILE):
+        return None
+    stat = os.stat(DATA_FILE)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": file_sha256(DATA_FILE)}
 
 
-def import_new_data():
-    """PASSO 2: Importa novos dados (modo incremental)"""
-    print_step(2, "IMPORTAR NOVOS DADOS")
-    
-    # Carrega dados existentes
-    existing_data = load_existing_data()
-    raw_existing_activities = existing_data.get("activities", [])
-    normalized_existing = []
-    existing_signatures: set[tuple] = set()
-
-    for activity in raw_existing_activities:
-        normalized = _normalize_activity(activity)
-        signature = _activity_signature(normalized)
-        if signature not in existing_signatures:
-            normalized_existing.append(normalized)
-            existing_signatures.add(signature)
-
-    print(f"📦 Dados existentes: {len(normalized_existing)} atividades")
-    
-    # Processa novos ficheiros CSV
-    Path(GARMIN_EXPORTS_DIR).mkdir(parents=True, exist_ok=True)
-    csv_files = glob.glob(f"{GARMIN_EXPORTS_DIR}/*.csv")
-    
-    if not csv_files:
-        print(f"\n⚠️  Nenhum ficheiro CSV encontrado em '{GARMIN_EXPORTS_DIR}'")
-        print(f"💡 Exporta atividades do Garmin Connect e coloca nessa pasta.")
+def summary_changed(store: ActivityStore) -> bool:
+    """
+    True se o garmin_summary.json já não é o que este script escreveu
+    (ex.: reescrito pelo import_garmin_exports ou pelo import_garmin_incremental).
+    Tamanho + mtime iguais dispensam o hash, como na ParseCache.
+    """
+    if not os.path.exists(DATA_FILE):
         return False
-    
-    new_activities = []
-    for csv_file in csv_files:
-        print(f"📁 A processar {os.path.basename(csv_file)}...")
-        activities = parse_csv_file(csv_file)
-        
-        for act in activities:
-            normalized = _normalize_activity(act)
-            signature = _activity_signature(normalized)
-            if signature not in existing_signatures:
-                new_activities.append(normalized)
-                existing_signatures.add(signature)
-                print(f"   ✅ Nova: {normalized['iso_date']} - {normalized['distance']:.2f}km")
-            else:
-                print(f"   ⏭️  Já existe: {normalized['iso_date']}")
-    
-    if not new_activities:
-        print(f"\n⚠️  Nenhuma atividade nova encontrada!")
+    known = store.get_meta(SUMMARY_META_KEY)
+    if not known:
+        return True
+    stat = os.stat(DATA_FILE)
+    if stat.st_size == known["size"] and stat.st_mtime_ns == known["mtime_ns"]:
         return False
-    
-    # Combina atividades antigas + novas
-    all_activities = normalized_existing + new_activities
-    all_activities.sort(key=_activity_sort_key, reverse=True)
-    
-    # Recalcula estatísticas
-    total_distance = sum(a['distance'] for a in all_activities)
-    total_time = sum(a['time_seconds'] for a in all_activities)
-    total_runs = len(all_activities)
-    
-    avg_distance = total_distance / total_runs if total_runs > 0 else 0
-    avg_pace_seconds = (total_time / total_distance) if total_distance > 0 else 0
-
-    today = datetime.now().date()
-    week_start = today - timedelta(days=6)
+    return file_sha256(DATA_FILE) != known["sha256"]
 
-    weekly_runs = []
-    weekly_distance = 0.0
-    weekly_time = 0
 
-    for activity in all_activities:
-        run_dt = _parse_datetime(activity.get("iso_date")) or _parse_datetime(activity.get("date"))
-        if run_dt and run_dt.date() >= week_start:
-            weekly_runs.append(activity)
-            weekly_distance += activity.get("distance", 0.0)
-            weekly_time += activity.get("time_seconds", 0)
+def sync_store_with_summary(store: ActivityStore, rebuild: bool = False) -> int:
+    """
+    Volta a preencher o store a partir do garmin_summary.json se estiver vazio
+    ou se o JSON tiver sido reescrito por outro importador. Devolve quantas
+    atividades foram carregadas (0 se o store já estava em dia).
+    """
+    if not (rebuild or store.is_empty() or summary_changed(store)):
+        return 0
+    # Os agregados, o estado de fitness e as marcas de ficheiros importados
+    # (tabela meta) referem-se ao conteúdo antigo: saem também
+    store.reset()
+    seeded = seed_store_from_summary(store)
+    store.set_meta(SUMMARY_META_KEY, _summary_fingerprint())
+    return seeded
+
+
+def load_aggregates(store: ActivityStore) -> RunningAggregates:
+    """Agregados persistidos no store; recalcula uma vez se ainda não existirem."""
+    aggregates = RunningAggregates.from_dict(store.get_meta("aggregates"))
+    if aggregates is None:
+        aggregates = RunningAggregates.recompute(store.iter_activities())
+        store.set_meta("aggregates", aggregates.to_dict())
+    return aggregates
+
+
+def load_rollups(store: ActivityStore) -> Rollups:
+    """Rollups semanais/mensais/anuais persistidos; recalcula se faltarem."""
+    rollups = Rollups.from_summary(store.get_meta("rollups"))
+    if rollups is None:
+        rollups = Rollups.recompute(store.iter_activities())
+        store.set_meta("rollups", rollups.to_summary())
+    return rollups
+
+
+def load_fitness(store: ActivityStore) -> FitnessModel:
+    """Estado ATL/CTL persistido (com checkpoints); recalcula se faltar."""
+    fitness = FitnessModel.from_dict(store.get_meta("fitness"))
+    if fitness is None:
+        fitness = FitnessModel.recompute(store.iter_activities())
+        store.set_meta("fitness", fitness.to_dict())
+    return fitness
+
+
+def verify_aggregates(store: ActivityStore, repair: bool = True) -> dict:
+    """Compara os agregados incrementais com um recálculo completo do store."""
+    incremental = load_aggregates(store)
+    full = RunningAggregates.recompute(store.iter_activities())
+    drift = incremental.drift(full)
+
+    full_rollups = Rollups.recompute(store.iter_activities()).to_summary()
+    if load_rollups(store).to_summary() != full_rollups:
+        drift["rollups"] = ("incremental", "recálculo")
+
+    fitness = load_fitness(store)
+    full_fitness = FitnessModel.recompute(store.iter_activities(), fitness.computed_until)
+    if fitness.to_dict() != full_fitness.to_dict():
+        drift["fitness"] = ("incremental", "recálculo")
+
+    if not drift:
+        print(f"✅ Agregados consistentes ({full.count} atividades)")
+        return drift
+
+    print("⚠️  Diferenças entre agregados incrementais e recálculo completo:")
+    for key, (stored, expected) in drift.items():
+        print(f"   • {key}: incremental={stored} | completo={expected}")
+    if repair:
+        store.set_meta("aggregates", full.to_dict())
+        store.set_meta("rollups", full_rollups)
+        store.set_meta("fitness", full_fitness.to_dict())
+        print("🔧 Agregados corrigidos com o recálculo completo")
+    return drift
+
+
+def build_summary_from_store(store: ActivityStore, aggregates: RunningAggregates,
+                             rollups: Rollups, fitness: FitnessModel) -> dict:
+    """
+    Gera o garmin_summary.json a partir do store (ordem do índice de data).
+    A lista de atividades é uma StreamedList: é lida do store à medida que
+    é escrita, por isso o store tem de continuar aberto até à escrita.
+    """
+    recent_runs = list(islice(store.iter_activities(newest_first=True), 10))
+
+    # Estatísticas vêm dos agregados incrementais (sem somar o histórico)
+    total_distance = aggregates.total_distance
+    total_time = aggregates.time_seconds
+    total_runs = aggregates.count
+
+    # Janelas (semana, 7/30/90 dias, mês, ano): só o período que precisam, pelo índice de data
+    today = datetime.now().date()
+    timeline = ActivityTimeline.build(
+        store.iter_activities(newest_first=False, since_iso=earliest_start(today).isoformat())
+    )
 
-    summary = {
+    return {
         "generated_at": datetime.now().isoformat(),
         "stats": {
             "total_runs": total_runs,
             "total_distance": round(total_distance, 2),
             "total_time": _format_time_hms(total_time),
             "total_time_seconds": total_time,
-            "avg_pace": _format_pace(avg_pace_seconds),
-            "avg_distance": round(avg_distance, 2),
-            "marathon_progress": round((total_distance / 42.195) * 100, 1) if total_distance else 0,
-        },
-        "latest_run": all_activities[0] if all_activities else None,
-        "this_week": {
-            "runs": len(weekly_runs),
-            "distance": round(weekly_distance, 2),
-            "time": _format_time_hms(weekly_time),
+            "avg_pace": _format_pace(aggregates.avg_pace_seconds),
+            "avg_distance": round(aggregates.avg_distance, 2),
+            "marathon_progress": aggregates.marathon_progress,
         },
-        "recent_runs": all_activities[:10],
-        "activities": all_activities,
+        "latest_run": recent_runs[0] if recent_runs else None,
+        "this_week": timeline.this_week(today),
+        "windows": timeline.windows(today),
+        "rollups": rollups.to_summary(),
+        "fitness": fitness.to_summary(),
+        # Marcas e percursos vêm dos campos de cada atividade (best_efforts, route_id)
+        "personal_bests": personal_bests(store.iter_activities(newest_first=False)),
+        "routes": route_table(store.iter_activities(newest_first=False)),
+        "recent_runs": recent_runs,
+        "activities": StreamedList(lambda: store.iter_activities(newest_first=True)),
         "last_updated": datetime.now().isoformat(),
         "source": "Garmin Connect Export (Auto-update)",
     }
 
-    # Guarda JSON atualizado
-    Path(DATA_FILE).parent.mkdir(parents=True, exist_ok=True)
-    with open(DATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(summary, f, indent=2, ensure_ascii=False)
 
+def import_new_data(rebuild_store: bool = False, verify: bool = False, sharded: bool = False,
+                    metrics=NULL_METRICS):
+    """PASSO 2: Importa novos dados (modo incremental)"""
+    print_step(2, "IMPORTAR NOVOS DADOS")
+
+    with ActivityStore() as store:
+        with metrics.stage("import.load_store"):
+            seeded = sync_store_with_summary(store, rebuild=rebuild_store)
+            if seeded:
+                print(f"🗄️  Store carregado a partir de {DATA_FILE}: {seeded} atividades")
+
+            aggregates = load_aggregates(store)
+            existing_count = aggregates.count
+            print(f"📦 Dados existentes: {existing_count} atividades")
+            if verify:
+                verify_aggregates(store)
+                aggregates = load_aggregates(store)
+            rollups = load_rollups(store)
+            fitness = load_fitness(store)
+
+        # Processa novos ficheiros CSV
+        Path(GARMIN_EXPORTS_DIR).mkdir(parents=True, exist_ok=True)
+        csv_files = glob.glob(f"{GARMIN_EXPORTS_DIR}/*.csv")
+
+        if not csv_files:
+            print(f"\n⚠️  Nenhum ficheiro CSV encontrado em '{GARMIN_EXPORTS_DIR}'")
+            print(f"💡 Exporta atividades do Garmin Connect e coloca nessa pasta.")
+            return False
+
+        # Ficheiros já importados para este store (mesmo conteúdo) são saltados;
+        # os restantes vêm normalizados da cache de parse (ex.: depois de --rebuild-store)
+        new_count = 0
+        replaced = 0
+        cache = ParseCache("update_training_data.csv:v3")
+        for csv_file in csv_files:
+            print(f"📁 A processar {os.path.basename(csv_file)}...")
+            with metrics.stage("import.file", file=os.path.basename(csv_file)):
+                metrics.count("files_read")
+                marker = f"imported_file:{cache.digest(csv_file)}"
+                if cache.enabled and store.get_meta(marker):
+                    metrics.count("files_cached")
+                    print("   ♻️  Conteúdo já importado — ficheiro ignorado")
+                    continue
+
+                if cache.enabled and os.path.getsize(csv_file) <= CACHED_CSV_MAX_BYTES:
+                    parsed_rows = cache.cached_parse(csv_file, lambda path: parse_normalized_csv(path, metrics))
+                else:
+                    # Exports enormes: uma linha de cada vez, sem guardar o ficheiro em memória
+                    parsed_rows = iter_normalized_csv(csv_file, metrics)
+
+                rows = 0
+                for normalized, sort_ts in parsed_rows:
+                    rows += 1
+                    # A mesma corrida vinda de outra fonte (ex.: .FIT com a data em UTC)
+                    duplicate = store.find_duplicate(normalized, sort_ts)
+                    if duplicate is not None:
+                        row_id, existing = duplicate
+                        merged = merge_duplicates(existing, normalized)
+                        metrics.count("duplicates")
+                        merged_ts = _normalize_with_sort_key(merged)[1]
+                        if merged != existing and store.replace(row_id, merged, merged_ts):
+                            replaced += 1
+                            print(f"   🔀 Já existe ({existing['iso_date']}): completada com esta fonte")
+                        else:
+                            print(f"   ⏭️  Já existe: {normalized['iso_date']}")
+                    elif store.upsert(normalized, sort_ts):
+                        new_count += 1
+                        aggregates.add_activity(normalized)
+                        rollups.add(normalized)
+                        fitness.add(normalized)
+                        print(f"   ✅ Nova: {normalized['iso_date']} - {normalized['distance']:.2f}km")
+                    else:
+                        metrics.count("duplicates")
+                        print(f"   ⏭️  Já existe: {normalized['iso_date']}")
+                metrics.count("rows_read", rows)
+                store.set_meta(marker, {"file": os.path.basename(csv_file), "rows": rows})
+        metrics.count("new_activities", new_count)
+        metrics.count("merged_duplicates", replaced)
+        cache.close()
+
+        if not new_count and not replaced:
+            print(f"\n⚠️  Nenhuma atividade nova encontrada!")
+            return False
+
+        with metrics.stage("import.build_summary"):
+            if replaced:
+                # Atividades já contadas mudaram de valores: recalcula em vez de somar
+                aggregates = RunningAggregates.recompute(store.iter_activities())
+                rollups = Rollups.recompute(store.iter_activities())
+                fitness = FitnessModel.recompute(store.iter_activities())
+            store.set_meta("aggregates", aggregates.to_dict())
+            store.set_meta("rollups", rollups.to_summary())
+            # Só recalcula ATL/CTL desde o checkpoint anterior à corrida nova mais antiga
+            fitness.advance(datetime.now().date())
+            store.set_meta("fitness", fitness.to_dict())
+            summary = build_summary_from_store(store, aggregates, rollups, fitness)
+
+        # Guarda JSON atualizado (atividades escritas em streaming a partir do store)
+        with metrics.stage("import.write_json"):
+            metrics.count("bytes_written", write_json(DATA_FILE, summary))
+            # Na próxima execução, um JSON diferente deste foi escrito por outro importador
+            store.set_meta(SUMMARY_META_KEY, _summary_fingerprint())
+        # Respostas da API (?slice=...) com hash para ETag; lidas do store como o JSON
+        with metrics.stage("import.api_slices"):
+            print_slice_report(write_api_slices(summary, DATA_FILE))
+        if sharding_enabled(sharded):
+            with metrics.stage("import.shards"):
+                print_shard_report(write_sharded_summary(summary))
+
+    stats = summary["stats"]
     print(f"\n✅ Dados atualizados!")
-    print(f"📊 Antes: {len(normalized_existing)} corridas")
-    print(f"📊 Novas: {len(new_activities)} corridas")
-    print(f"📊 Total: {total_runs} corridas | {total_distance:.2f}km")
+    print(f"📊 Antes: {existing_count} corridas")
+    print(f"📊 Novas: {new_count} corridas")
+    print(f"📊 Total: {stats['total_runs']} corridas | {stats['total_distance']:.2f}km")
 
     return True
 
@@ -458,6 +666,8 @@ def git_commit():
         # Git add
         subprocess.run(['git', 'add', DATA_FILE], check=True)
         subprocess.run(['git', 'add', BACKUP_DIR], check=True)
+        if Path(SHARDS_DIR).exists():
+            subprocess.run(['git', 'add', SHARDS_DIR], check=True)
         print("✅ Ficheiros adicionados ao Git")
         
         # Git commit
@@ -505,28 +715,52 @@ def cleanup_exports():
         print("\n⏭️  Ficheiros mantidos. Apaga manualmente quando quiseres.")
 
 
-def main():
+def main(rebuild_store: bool = False, verify: bool = False, sharded: bool = False,
+         metrics_file: str = METRICS_FILE, prometheus_file: Optional[str] = None,
+         profile: bool = False):
     """Executa workflow completo"""
     print("=" * 60)
     print("  🏃 ATUALIZADOR AUTOMÁTICO DE DADOS DE TREINO")
     print("  joaofaquino.run - Rumo à Maratona 2026")
     print("=" * 60)
-    
+
+    metrics = PipelineMetrics(
+        "update_training_data",
+        profile_dir=str(Path(METRICS_DIR) / "profiles") if profile else None,
+    )
+    try:
+        run_pipeline(metrics, rebuild_store, verify, sharded)
+    finally:
+        metrics.print_report()
+        print(f"📄 Relatório: {metrics.write_json(metrics_file)}")
+        if prometheus_file:
+            print(f"📈 Prometheus: {metrics.write_prometheus(prometheus_file)}")
+        metrics.close()
+
+
+def run_pipeline(metrics, rebuild_store: bool = False, verify: bool = False, sharded: bool = False):
+    """Backup → Import → Git → Limpeza, cada passo medido como uma fase"""
     # Passo 1: Backup
-    backup_created = backup_data()
+    with metrics.stage("backup"):
+        backup_created = backup_data(metrics)
     
     # Passo 2: Import
-    data_imported = import_new_data()
+    with metrics.stage("import"):
+        data_imported = import_new_data(
+            rebuild_store=rebuild_store, verify=verify, sharded=sharded, metrics=metrics
+        )
     
     if not data_imported:
         print("\n⚠️  Processo interrompido. Nenhum dado novo para importar.")
         return
     
     # Passo 3: Git
-    git_success = git_commit()
+    with metrics.stage("git"):
+        git_success = git_commit()
     
-    # Passo 4: Cleanup
-    cleanup_exports()
+    # Passo 4: Cleanup (inclui o tempo à espera da resposta)
+    with metrics.stage("cleanup"):
+        cleanup_exports()
     
     # Resumo final
     print("\n" + "=" * 60)
@@ -542,4 +776,42 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Backup → Import → Git commit dos dados de treino")
+    parser.add_argument(
+        "--rebuild-store",
+        action="store_true",
+        help=f"reconstrói o store SQLite a partir de {DATA_FILE} antes de importar",
+    )
+    parser.add_argument(
+        "--verify-aggregates",
+        action="store_true",
+        help="recalcula as estatísticas do zero e corrige desvios dos agregados incrementais",
+    )
+    parser.add_argument(
+        "--sharded",
+        action="store_true",
+        help=f"escreve também header + shards mensais em {SHARDS_DIR}",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        default=METRICS_FILE,
+        help="relatório JSON com tempo/CPU/memória por fase e contadores",
+    )
+    parser.add_argument(
+        "--prometheus-file",
+        help="escreve também as métricas em formato textfile do Prometheus (node_exporter)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help=f"corre cada fase sob cProfile (ficheiros .prof em {METRICS_DIR}/profiles)",
+    )
+    args = parser.parse_args()
+    main(
+        rebuild_store=args.rebuild_store,
+        verify=args.verify_aggregates,
+        sharded=args.sharded,
+        metrics_file=args.metrics_file,
+        prometheus_file=args.prometheus_file,
+        profile=args.profile,
+    )
@@ -0,0 +1,289 @@
+"""
+Importação de atividades em GPX e TCX (histórico antigo, provas)
+
+Leitura incremental do XML (ElementTree.iterparse): cada ponto é lido,
+convertido e logo removido da árvore, por isso a memória do XML não cresce
+com o tamanho do ficheiro (ultras de 20+ horas incluídas). Os valores vão
+para array.array (8 bytes por valor) e no fim passam a um RecordBlock com
+as mesmas colunas dos .FIT (fit_records.py).
+
+Cada ficheiro dá:
+- a atividade no mesmo formato do parse_fit_file (serialize_activity trata
+  de a normalizar como as outras);
+- o stream por segundo (RecordBlock), para --records.
+
+GPX: distância acumulada calculada pelas posições (haversine); FC e
+cadência das extensões do Garmin (TrackPointExtension). TCX: totais das
+voltas (Lap) e distância dos próprios pontos. Intervalos entre pontos acima
+de PAUSE_GAP_S contam como pausa (fora do tempo da corrida).
+
+    activity, block = parse_xml_activity("data/garmin_exports/ultra.gpx")
+"""
+
+import math
+from array import array
+from datetime import datetime, timezone
+from pathlib import Path
+from xml.etree.ElementTree import iterparse
+
+import numpy as np
+
+from fit_records import RecordBlock
+
+XML_SUFFIXES = (".gpx", ".tcx")
+PAUSE_GAP_S = 60
+_EARTH_RADIUS_M = 6_371_000
+
+# Nome local do elemento (sem namespace) -> coluna, dentro de cada ponto
+_GPX_POINT_FIELDS = {"time": "timestamp", "ele": "altitude", "hr": "heart_rate", "cad": "cadence"}
+_TCX_POINT_FIELDS = {
+    "Time": "timestamp",
+    "LatitudeDegrees": "lat",
+    "LongitudeDegrees": "lon",
+    "AltitudeMeters": "altitude",
+    "DistanceMeters": "distance",
+    "Value": "heart_rate",  # só existe dentro de HeartRateBpm
+    "Cadence": "cadence",
+    "RunCadence": "cadence",
+    "Speed": "speed",
+}
+_POINT_COLUMNS = ("timestamp", "distance", "speed", "heart_rate", "cadence", "altitude", "lat", "lon")
+# "{namespace}nome" -> "nome" (os mesmos poucos tags repetem-se em cada ponto)
+_LOCAL_NAMES: dict[str, str] = {}
+
+
+def _local(tag: str) -> str:
+    name = _LOCAL_NAMES.get(tag)
+    if name is None:
+        name = _LOCAL_NAMES[tag] = tag.rsplit("}", 1)[-1]
+    return name
+
+
+def parse_timestamp(text: str) -> float:
+    """Segundos Unix de uma data ISO 8601 (sem fuso = UTC)."""
+    moment = datetime.fromisoformat(text.strip())
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+class _PointCollector:
+    """Colunas dos pontos em array.array, preenchidas com NaN onde falta o valor."""
+
+    def __init__(self):
+        self.columns = {name: array("d") for name in _POINT_COLUMNS}
+
+    def add(self, values: dict) -> None:
+        if values.get("timestamp") is None:
+            return  # como nos .FIT: pontos sem hora são descartados
+        for name, column in self.columns.items():
+            column.append(values.get(name, math.nan))
+
+    def block(self) -> RecordBlock:
+        """Bloco de records; sem distância no ficheiro (GPX), é calculada pelas posições."""
+        columns = {name: np.frombuffer(column, dtype=np.float64) for name, column in self.columns.items()}
+        if np.isnan(columns["distance"]).all():
+            columns["distance"] = track_distance(columns["lat"], columns["lon"])
+        else:
+            columns["distance"] = _carry_forward(columns["distance"])
+        if np.isnan(columns["speed"]).all():
+            columns["speed"] = _speed(columns["timestamp"], columns["distance"])
+        columns["timestamp"] = np.floor(columns["timestamp"])
+        return RecordBlock(columns)
+
+
+def _carry_forward(distance: np.ndarray) -> np.ndarray:
+    """Pontos sem distância repetem a anterior (0 antes da primeira)."""
+    filled = np.maximum.accumulate(np.where(np.isnan(distance), -1.0, distance))
+    return np.where(filled < 0, 0.0, filled)
+
+
+def track_distance(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Distância acumulada (m) pelas posições; pontos sem GPS mantêm a anterior."""
+    distance = np.full(len(lat), np.nan)
+    valid = np.flatnonzero(~(np.isnan(lat) | np.isnan(lon)))
+    if len(valid) == 0:
+        return distance
+    phi, lam = np.radians(lat[valid]), np.radians(lon[valid])
+    a = (np.sin(np.diff(phi) / 2) ** 2
+         + np.cos(phi[:-1]) * np.cos(phi[1:]) * np.sin(np.diff(lam) / 2) ** 2)
+    steps = 2 * _EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+    distance[valid] = np.concatenate([[0.0], np.cumsum(steps)])
+    return _carry_forward(distance)
+
+
+def _speed(timestamp: np.ndarray, distance: np.ndarray) -> np.ndarray:
+    """Velocidade (m/s) entre cada ponto e o anterior; NaN no primeiro e sem tempo."""
+    speed = np.full(len(timestamp), np.nan)
+    if len(timestamp) > 1:
+        elapsed = np.diff(timestamp)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            speed[1:] = np.where(elapsed > 0, np.diff(distance) / elapsed, np.nan)
+    return speed
+
+
+def _number(text):
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return None
+
+
+def _point_values(element, fields: dict) -> dict:
+    values = {}
+    for child in element.iter():
+        column = fields.get(_local(child.tag))
+        if column is None or child.text is None:
+            continue
+        if column == "timestamp":
+            values[column] = parse_timestamp(child.text)
+        else:
+            value = _number(child.text)
+            if value is not None:
+                values[column] = value
+    return values
+
+
+def _iter_elements(source, point_tag: str):
+    """
+    (elemento, caminho de nomes locais) no fim de cada elemento fora dos
+    pontos e de cada ponto (`point_tag`, já com os filhos). Os pontos saem
+    da árvore logo depois de processados.
+    """
+    stack, path = [], []
+    depth = 0  # > 0 dentro de um ponto: os filhos são lidos no fim do ponto
+    for event, element in iterparse(source, events=("start", "end")):
+        if event == "start":
+            if depth:
+                depth += 1
+                continue
+            name = _local(element.tag)
+            if name == point_tag:
+                depth = 1
+            stack.append(element)
+            path.append(name)
+            continue
+        if depth > 1:
+            depth -= 1
+            continue
+        depth = 0
+        yield element, path
+        stack.pop()
+        name = path.pop()
+        if stack and name in (point_tag, "Lap", "trkseg"):
+            # Remove o elemento já lido do pai: a árvore fica só com o ramo atual
+            element.clear()
+            stack[-1].remove(element)
+
+
+def _activity(file_name: str, title, start, timestamps, distance_m, seconds,
+              heart_rate, max_hr=None, avg_hr=None, calories=0) -> dict:
+    """Atividade no formato do parse_fit_file."""
+    if avg_hr is None and heart_rate.size and not np.isnan(heart_rate).all():
+        avg_hr = float(np.nanmean(heart_rate))
+    if max_hr is None and heart_rate.size and not np.isnan(heart_rate).all():
+        max_hr = float(np.nanmax(heart_rate))
+    if start is None and len(timestamps):
+        start = float(timestamps[0])
+    return {
+        "distance": distance_m / 1000,
+        "total_time": seconds,
+        "average_heartrate": int(round(avg_hr)) if avg_hr else 0,
+        "max_heart_rate": int(round(max_hr)) if max_hr else 0,
+        "calories": int(calories or 0),
+        "date": (
+            datetime.fromtimestamp(start, timezone.utc).replace(tzinfo=None).isoformat()
+            if start is not None else None
+        ),
+        "title": title or Path(file_name).stem,
+        # "date" sem fuso, em UTC (duplicate_index.py)
+        "clock": "utc",
+    }
+
+
+def _moving_seconds(timestamps: np.ndarray) -> float:
+    """Tempo entre o primeiro e o último ponto, sem as pausas (> PAUSE_GAP_S)."""
+    if len(timestamps) < 2:
+        return 0.0
+    elapsed = np.diff(timestamps)
+    return float(elapsed[(elapsed > 0) & (elapsed <= PAUSE_GAP_S)].sum())
+
+
+def parse_gpx(source, name=None) -> tuple[dict, RecordBlock]:
+    """(atividade, records) de um GPX. `source` é um caminho ou ficheiro aberto."""
+    points = _PointCollector()
+    title = None
+    for element, path in _iter_elements(source, "trkpt"):
+        tag = path[-1]
+        if tag == "trkpt":
+            values = _point_values(element, _GPX_POINT_FIELDS)
+            lat, lon = _number(element.get("lat")), _number(element.get("lon"))
+            if lat is not None and lon is not None:
+                values.update(lat=lat, lon=lon)
+            points.add(values)
+        elif tag == "name" and title is None and "trkpt" not in path and element.text:
+            title = element.text.strip()
+    block = points.block()
+    distance = float(block["distance"][-1]) if len(block) else 0.0
+    activity = _activity(
+        name or str(source), title, None, block["timestamp"], distance,
+        _moving_seconds(block["timestamp"]), block["heart_rate"],
+    )
+    return activity, block
+
+
+def parse_tcx(source, name=None) -> tuple[dict, RecordBlock]:
+    """(atividade, records) de um TCX; os totais vêm das voltas quando existem."""
+    points = _PointCollector()
+    laps = {"seconds": 0.0, "distance": 0.0, "calories": 0.0, "hr_seconds": 0.0, "hr_time": 0.0}
+    max_hr = start = None
+    lap = {}
+    for element, path in _iter_elements(source, "Trackpoint"):
+        tag = path[-1]
+        parent = path[-2] if len(path) > 1 else None
+        if tag == "Trackpoint":
+            points.add(_point_values(element, _TCX_POINT_FIELDS))
+        elif parent == "Lap" and tag in ("TotalTimeSeconds", "DistanceMeters", "Calories"):
+            lap[tag] = _number(element.text) or 0.0
+        elif tag == "Value" and parent in ("AverageHeartRateBpm", "MaximumHeartRateBpm") and path[-3] == "Lap":
+            lap[parent] = _number(element.text)
+        elif tag == "Lap":
+            if start is None and element.get("StartTime"):
+                start = parse_timestamp(element.get("StartTime"))
+            seconds = lap.get("TotalTimeSeconds", 0.0)
+            laps["seconds"] += seconds
+            laps["distance"] += lap.get("DistanceMeters", 0.0)
+            laps["calories"] += lap.get("Calories", 0.0)
+            if lap.get("AverageHeartRateBpm"):
+                laps["hr_seconds"] += lap["AverageHeartRateBpm"] * seconds
+                laps["hr_time"] += seconds
+            if lap.get("MaximumHeartRateBpm"):
+                max_hr = max(max_hr or 0, lap["MaximumHeartRateBpm"])
+            lap = {}
+    block = points.block()
+    stream_distance = float(block["distance"][-1]) if len(block) else 0.0
+    activity = _activity(
+        name or str(source), None, start, block["timestamp"],
+        laps["distance"] or stream_distance,
+        laps["seconds"] or _moving_seconds(block["timestamp"]),
+        block["heart_rate"],
+        max_hr=max_hr,
+        avg_hr=laps["hr_seconds"] / laps["hr_time"] if laps["hr_time"] else None,
+        calories=laps["calories"],
+    )
+    return activity, block
+
+
+XML_PARSERS = {".gpx": parse_gpx, ".tcx": parse_tcx}
+
+
+def parse_xml_activity(source, name=None) -> tuple[dict, RecordBlock]:
+    """(atividade, records) de um .gpx/.tcx; `name` dá a extensão/título se `source` for um ficheiro aberto."""
+    suffix = Path(name or str(source)).suffix.lower()
+    if suffix not in XML_PARSERS:
+        raise ValueError(f"{name or source}: formato não suportado ({suffix})")
+    return XML_PARSERS[suffix](source, name)
+
+
+def decode_xml_records(file_path) -> RecordBlock:
+    return parse_xml_activity(file_path)[1]
@@ -0,0 +1,6 @@
+"""Os scripts importam-se uns aos outros pelo nome (python scripts/<script>.py)."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "scripts"))
@@ -0,0 +1,38 @@
+import hashlib
+import json
+
+from api_slices import load_manifest, write_api_slices
+
+A = {"iso_date": "2025-03-10", "distance": 5.0}
+B = {"iso_date": "2025-03-01", "distance": 8.0}
+N = {"iso_date": "2025-02-14", "distance": 3.0}
+
+
+def _summary(activities):
+    return {"latest_run": activities[0], "activities": activities}
+
+
+def test_month_split_by_out_of_order_input_matches_the_manifest(tmp_path):
+    write_api_slices(_summary([A, B, N]), out_dir=str(tmp_path))
+    write_api_slices(_summary([A, N, B]), out_dir=str(tmp_path))
+
+    entry = load_manifest(str(tmp_path))["slices"]["month/2025-03"]
+    content = (tmp_path / entry["file"]).read_bytes()
+    assert json.loads(content)["activities"] == [A, B]
+    # O ETag do route é o hash do manifest: tem de ser o do ficheiro servido
+    assert entry["sha256"] == hashlib.sha256(content).hexdigest()
+    assert entry["bytes"] == len(content)
+
+
+def test_unchanged_slices_are_not_rewritten(tmp_path):
+    write_api_slices(_summary([A, B, N]), out_dir=str(tmp_path))
+    counts = write_api_slices(_summary([A, B, N]), out_dir=str(tmp_path))
+    assert counts["written"] == 0
+    assert counts["removed"] == 0
+
+
+def test_months_that_disappear_are_removed(tmp_path):
+    write_api_slices(_summary([A, B, N]), out_dir=str(tmp_path))
+    counts = write_api_slices(_summary([A, B]), out_dir=str(tmp_path))
+    assert counts["removed"] == 1
+    assert "month/2025-02" not in load_manifest(str(tmp_path))["slices"]
@@ -0,0 +1,75 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from best_efforts import best_efforts, fastest_segment, personal_bests
+
+
+def _stream(speeds):
+    """Distância acumulada (m) e tempo (s) a 1 Hz para uma lista de velocidades (m/s)."""
+    elapsed = np.arange(len(speeds) + 1, dtype=np.float64)
+    distance = np.concatenate([[0.0], np.cumsum(speeds, dtype=np.float64)])
+    return distance, elapsed
+
+
+def _brute_force(distance, elapsed, target):
+    """Referência O(n²): de cada partida, anda até cobrir `target` e interpola."""
+    best = None
+    for i in range(len(distance)):
+        goal = distance[i] + target
+        for j in range(i + 1, len(distance)):
+            if distance[j] >= goal:
+                fraction = (goal - distance[j - 1]) / (distance[j] - distance[j - 1])
+                seconds = elapsed[j - 1] + fraction * (elapsed[j] - elapsed[j - 1]) - elapsed[i]
+                best = seconds if best is None else min(best, seconds)
+                break
+    return best
+
+
+def test_fast_block_inside_a_steady_run():
+    # 10 min a 3 m/s, 5 min a 5 m/s (1500 m), 10 min a 3 m/s
+    distance, elapsed = _stream([3.0] * 600 + [5.0] * 300 + [3.0] * 600)
+    assert fastest_segment(distance, elapsed, 1000) == pytest.approx(200.0)
+    # 2 km: os 1500 m rápidos (300 s) + 500 m a 3 m/s
+    assert fastest_segment(distance, elapsed, 2000) == pytest.approx(300 + 500 / 3)
+
+
+def test_matches_brute_force_on_an_irregular_stream():
+    rng = np.random.default_rng(15)
+    speeds = rng.uniform(2.0, 5.5, 700)
+    speeds[rng.integers(0, 700, 40)] = 0.0  # paragens: distância repetida
+    distance, elapsed = _stream(speeds)
+    for target in (100.0, 400.0, 1000.0, 1609.0):
+        assert fastest_segment(distance, elapsed, target) == pytest.approx(_brute_force(distance, elapsed, target))
+
+
+def test_too_short_for_the_distance():
+    distance, elapsed = _stream([3.0] * 300)
+    assert fastest_segment(distance, elapsed, 1000) is None
+    assert fastest_segment(distance[:1], elapsed[:1], 1) is None
+
+
+def test_best_efforts_ignores_gps_gaps_and_backtracking():
+    distance, elapsed = _stream([4.0] * 1300)
+    distance[100] = np.nan
+    distance[500] = distance[499] - 0.5  # o GPS recua meio metro
+    block = {"distance": distance, "timestamp": elapsed.astype(np.int64) + 1_700_000_000}
+    efforts = best_efforts(block)
+
+    # Referência: sem o ponto NaN e com a distância forçada a não descer
+    valid = ~np.isnan(distance)
+    clean = np.maximum.accumulate(distance[valid])
+    assert list(efforts) == ["1k", "5k"]  # 5.2 km: sem meia maratona
+    for name, target in (("1k", 1000.0), ("5k", 5000.0)):
+        assert efforts[name] == round(_brute_force(clean, elapsed[valid], target), 1)
+
+
+def test_personal_bests_keeps_the_first_to_set_the_mark():
+    table = personal_bests([
+        {"iso_date": "2025-03-08", "best_efforts": {"1k": 250.0}},
+        {"iso_date": "2025-03-01", "best_efforts": {"1k": 250.0, "5k": 1400.0}},
+        {"iso_date": "2025-03-15", "best_efforts": {"1k": 260.0, "10k": 3000.0}},
+    ])
+    assert list(table) == ["1k", "5k", "10k"]
+    assert table["1k"]["iso_date"] == "2025-03-01"
+    assert table["10k"]["pace_seconds"] == 300.0
@@ -0,0 +1,62 @@
+from datetime import datetime
+
+from date_formats import ISO_ANY, DateParser
+from update_training_data import DATE_FORMATS
+
+VALUES = [
+    "2025-03-10 07:15:00",
+    "2025-03-10T07:15:00",
+    "2025-03-10",
+    "10/03/2025",
+    "10/03/2025 07:15:00",
+    # Sem zeros à esquerda: o caminho rápido falha e cai no strptime do formato
+    "1/2/2025",
+    "2025-3-1",
+    "1/2/2025 7:05:00",
+    "  2025-03-10  ",
+    # Datas impossíveis e lixo não têm formato
+    "31/02/2025",
+    "2025-13-01",
+    "ontem",
+    "",
+    None,
+]
+
+
+def _strptime_loop(value, formats):
+    """Referência: testar a lista de formatos por ordem em cada valor."""
+    if not value:
+        return None
+    value = value.strip()
+    for fmt in formats:
+        try:
+            if fmt == ISO_ANY:
+                return datetime.fromisoformat(value.replace("Z", "+00:00"))
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def test_matches_the_ordered_strptime_loop_in_any_order():
+    # O formato detetado muda a cada valor: o resultado não pode depender dele
+    for values in (VALUES, VALUES[::-1], sorted(VALUES, key=str)):
+        parser = DateParser(DATE_FORMATS)
+        assert [parser.parse(value) for value in values] == [
+            _strptime_loop(value, DATE_FORMATS) for value in values
+        ]
+
+
+def test_iso_any_matches_fromisoformat():
+    formats = [ISO_ANY, "%d/%m/%Y"]
+    values = ["2025-03-10T07:15:00Z", "2025-03-10T07:15:00.250+01:00", "10/03/2025", "2025-03-10"]
+    parser = DateParser(formats)
+    assert [parser.parse(value) for value in values] == [_strptime_loop(value, formats) for value in values]
+
+
+def test_a_uniform_column_detects_its_format_once():
+    parser = DateParser(DATE_FORMATS)
+    for day in range(1, 29):
+        assert parser.parse(f"{day:02d}/03/2025") == datetime(2025, 3, day)
+    assert parser.detected_format == "%d/%m/%Y"
+    assert parser.detections == 1
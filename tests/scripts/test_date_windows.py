@@ -0,0 +1,64 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from date_windows import WINDOWS, ActivityTimeline, window_ranges
+from rollups import activity_day
+
+
+def _history(seed=24, runs=600):
+    rng = random.Random(seed)
+    first = date(2023, 6, 1)
+    activities = []
+    for _ in range(runs):
+        day = first + timedelta(days=rng.randint(0, 900))
+        # Metade no formato do site (DD/MM/YYYY), metade com hora ISO
+        activity = {"distance": round(rng.uniform(3, 25), 2), "time_seconds": rng.randint(900, 9000)}
+        if rng.random() < 0.5:
+            activity["date"] = day.strftime("%d/%m/%Y")
+        else:
+            activity["date"] = f"{day.isoformat()}T{rng.randint(5, 21):02d}:15:00"
+        activities.append(activity)
+    activities.append({"date": "", "distance": 5.0, "time_seconds": 1500})  # sem data: fora
+    return activities
+
+
+def _naive_totals(activities, first, last):
+    """Referência: filtrar a lista inteira e somar."""
+    inside = [a for a in activities if (day := activity_day(a)) is not None and first <= day <= last]
+    seconds = sum(a["time_seconds"] for a in inside)
+    return {
+        "runs": len(inside),
+        "distance": round(sum(int(round(a["distance"] * 1000)) for a in inside) / 1000, 2),
+        "time": f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}",
+        "time_seconds": seconds,
+        "start_date": first.isoformat(),
+        "end_date": last.isoformat(),
+    }
+
+
+@pytest.mark.parametrize("today", [
+    date(2025, 11, 19),   # quarta-feira
+    date(2025, 1, 1),     # ano novo, semana ISO do ano anterior
+    date(2024, 3, 3),     # domingo
+    date(2022, 1, 10),    # antes da primeira corrida
+])
+def test_windows_match_filtering_the_list(today):
+    activities = _history()
+    timeline = ActivityTimeline.build(reversed(activities))
+    windows = timeline.windows(today)
+    ranges = window_ranges(today)
+    assert list(windows) == list(WINDOWS)
+    for name in WINDOWS:
+        assert windows[name] == _naive_totals(activities, *ranges[name])
+
+
+def test_activities_between_matches_filtering_the_list():
+    activities = _history()
+    timeline = ActivityTimeline.build(activities)
+    first, last = date(2024, 2, 1), date(2024, 2, 29)
+    expected = [a for a in activities if (day := activity_day(a)) is not None and first <= day <= last]
+    assert sorted(map(id, timeline.activities_between(first, last))) == sorted(map(id, expected))
+    days = [activity_day(a) for a in timeline.activities_between(first, last)]
+    assert days == sorted(days)
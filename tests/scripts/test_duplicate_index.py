@@ -0,0 +1,63 @@
+import pytest
+
+import duplicate_index
+from duplicate_index import DuplicateIndex, dedupe_activities, run_key, same_run
+
+
+@pytest.fixture(autouse=True)
+def lisbon(monkeypatch):
+    # Horas locais em Lisboa: UTC+0 no inverno, UTC+1 no verão
+    monkeypatch.setattr(duplicate_index, "TIMEZONE", "Europe/Lisbon")
+
+
+def _run(date, distance, seconds, **extra):
+    return {"date": date, "distance": distance, "total_time": seconds, **extra}
+
+
+def _same(a, b):
+    return same_run(run_key(a), run_key(b))
+
+
+def test_two_runs_on_the_same_day_are_kept():
+    morning = _run("2025-03-10T07:00:00", 5.0, 1500)
+    evening = _run("2025-03-10T19:00:00", 5.01, 1508)
+    assert not _same(morning, evening)
+    kept, merged = dedupe_activities([morning, evening])
+    assert (len(kept), merged) == (2, 0)
+
+
+def test_same_source_needs_the_same_start():
+    first = _run("2025-03-10T07:00:00", 5.0, 1500)
+    assert _same(first, _run("2025-03-10T07:00:30", 5.01, 1503))
+    assert not _same(first, _run("2025-03-10T08:00:00", 5.0, 1500))
+
+
+def test_fit_in_utc_matches_csv_in_local_time():
+    # 10 de julho: Lisboa em UTC+1
+    fit = _run("2025-07-10T06:00:05", 10.004, 3000, clock="utc")
+    csv = _run("2025-07-10 07:00:00", 10.0, 3001)
+    assert _same(fit, csv)
+    # Só o desvio do fuso nesse dia: 2 h não é a mesma corrida
+    assert not _same(fit, _run("2025-07-10 08:00:00", 10.0, 3001))
+    # No inverno o desvio é 0
+    assert _same(_run("2025-01-10T07:00:00", 10.0, 3000, clock="utc"), _run("2025-01-10 07:00:00", 10.0, 3000))
+
+
+def test_date_only_records_only_match_within_rounding():
+    fit = _run("2025-03-10T18:30:00", 5.004, 1500, clock="utc")
+    assert _same(fit, _run("10/03/2025", 5.0, 1500))
+    assert not _same(_run("10/03/2025", 5.0, 1500), _run("10/03/2025", 5.01, 1508))
+
+
+def test_dedupe_keeps_the_richer_record_and_fills_gaps():
+    fit = _run("2025-07-10T06:00:05", 10.0, 3000, clock="utc", best_efforts={"1k": 250.0}, calories=0)
+    csv = _run("2025-07-10 07:00:00", 10.0, 3001, calories=640, title="Corrida matinal")
+    kept, merged = dedupe_activities([csv, fit])
+    assert merged == 1
+    assert kept == [{**fit, "calories": 640, "title": "Corrida matinal"}]
+
+
+def test_index_finds_shifted_duplicates_only():
+    index = DuplicateIndex.build([_run(f"2025-07-{day:02d}T06:00:00", 8.0, 2400, clock="utc") for day in range(1, 29)])
+    assert index.find(_run("2025-07-15 07:00:20", 8.0, 2402)) is not None
+    assert index.find(_run("2025-07-15 19:00:00", 8.0, 2400)) is None
@@ -0,0 +1,58 @@
+from datetime import date, timedelta
+
+from fitness_model import FitnessModel
+
+START = date(2025, 1, 1)
+
+
+def _run(day, trimp):
+    return {"iso_date": day.isoformat(), "trimp": trimp}
+
+
+def _history(days=120):
+    # Corridas em 4 de cada 7 dias, com cargas diferentes (duas no dia 10)
+    runs = [_run(START + timedelta(days=i), 30 + (i * 7) % 50) for i in range(days) if i % 7 in (0, 2, 3, 5)]
+    runs.append(_run(START + timedelta(days=10), 25.5))
+    return runs
+
+
+def test_daily_advance_matches_recompute():
+    runs = _history()
+    end = START + timedelta(days=130)
+    model = FitnessModel()
+    # Uma importação por dia: só as corridas desse dia e avanço até ele
+    day = START
+    while day <= end:
+        model.add_many(run for run in runs if run["iso_date"] == day.isoformat())
+        model.advance(day)
+        day += timedelta(days=1)
+
+    full = FitnessModel.recompute(runs, end)
+    assert model.to_dict() == full.to_dict()
+    assert model.to_summary() == full.to_summary()
+
+
+def test_late_old_run_replays_from_the_previous_checkpoint():
+    runs = _history()
+    end = START + timedelta(days=130)
+    model = FitnessModel.recompute(runs, end)
+    late_day = START + timedelta(days=100)
+    late = _run(late_day, 80)
+
+    model.replayed_days = 0
+    model.add(late)
+    model.advance(end)
+
+    assert model.to_dict() == FitnessModel.recompute(runs + [late], end).to_dict()
+    # Desde o domingo anterior ao dia 100, não desde o início
+    assert model.replayed_days <= (end - late_day).days + 7
+
+
+def test_saved_state_only_resumes_for_the_same_source(tmp_path):
+    path = str(tmp_path / "fitness_state.json")
+    model = FitnessModel.recompute(_history(), START + timedelta(days=130))
+    model.save(path, source="abc")
+
+    assert FitnessModel.load(path, source="abc").to_dict() == model.to_dict()
+    assert FitnessModel.load(path, source="outro") is None
+    assert FitnessModel.load(str(tmp_path / "nada.json")) is None
@@ -0,0 +1,54 @@
+import io
+import zipfile
+
+from garmin_archive import iter_archive_results
+
+
+def _parse(name, data):
+    return data.decode("utf-8")
+
+
+def _zip_bytes(members: dict) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def test_nested_zips_are_read_without_extracting(tmp_path):
+    export = tmp_path / "export.zip"
+    export.write_bytes(_zip_bytes({
+        "a.fit": b"a",
+        "inner.zip": _zip_bytes({"b.fit": b"b", "notes.txt": b"x"}),
+    }))
+    results = list(iter_archive_results([export], _parse))
+    assert [(label.split("!", 1)[1], data, error) for label, _, _, data, error in results] == [
+        ("a.fit", "a", None),
+        ("inner.zip!b.fit", "b", None),
+    ]
+
+
+def test_corrupt_inner_zip_is_reported_and_skipped(tmp_path):
+    export = tmp_path / "export.zip"
+    export.write_bytes(_zip_bytes({"a.fit": b"a", "bad.zip": b"not a zip", "c.csv": b"c"}))
+
+    results = list(iter_archive_results([export], _parse))
+
+    assert [label.split("!", 1)[1] for label, *_ in results] == ["a.fit", "bad.zip", "c.csv"]
+    _, digest, _, data, error = results[1]
+    assert (digest, data) == (None, None)
+    assert error.startswith("BadZipFile")
+    assert [result[3] for result in results if result[4] is None] == ["a", "c"]
+
+
+def test_corrupt_archive_does_not_stop_the_others(tmp_path):
+    broken = tmp_path / "broken.zip"
+    broken.write_bytes(b"truncated")
+    good = tmp_path / "good.zip"
+    good.write_bytes(_zip_bytes({"a.fit": b"a"}))
+
+    results = list(iter_archive_results([broken, good], _parse))
+
+    assert results[0][0] == str(broken) and results[0][4].startswith("BadZipFile")
+    assert results[1][3] == "a"
@@ -0,0 +1,72 @@
+from collections import Counter
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from heatmap_tiles import TILE_SIZE, densify, tile_increments, world_pixels
+
+ZOOM = 14
+LISBON = (38.7223, -9.1393)
+
+
+def _track(rng, points=60):
+    """Passeio aleatório de ~10 m por passo a partir de Lisboa."""
+    steps = rng.normal(0, 0.0001, (points, 2)).cumsum(axis=0)
+    return LISBON[0] + steps[:, 0], LISBON[1] + steps[:, 1]
+
+
+def _naive_tiles(tracks, zoom):
+    """Referência: píxeis de cada trajeto num set, somados píxel a píxel num dict."""
+    world = TILE_SIZE * 2 ** zoom
+    counts = Counter()
+    for lat, lon in tracks:
+        x, y = densify(*world_pixels(lat, lon, zoom))
+        counts.update({
+            (min(max(int(px), 0), world - 1), min(max(int(py), 0), world - 1))
+            for px, py in zip(x, y)
+        })
+    tiles = {}
+    for (px, py), hits in counts.items():
+        tile = tiles.setdefault((px // TILE_SIZE, py // TILE_SIZE), np.zeros(TILE_SIZE * TILE_SIZE, np.uint32))
+        tile[(py % TILE_SIZE) * TILE_SIZE + px % TILE_SIZE] += hits
+    return tiles
+
+
+def test_web_mercator_origin_and_edges():
+    x, y = world_pixels(np.array([0.0, 0.0]), np.array([0.0, -180.0]), 0)
+    assert x.tolist() == pytest.approx([128.0, 0.0])
+    assert y.tolist() == pytest.approx([128.0, 128.0])
+
+
+def test_tile_binning_matches_a_pixel_dict():
+    rng = np.random.default_rng(19)
+    tracks = [_track(rng) for _ in range(8)]
+    tiles = tile_increments(tracks, ZOOM)
+    expected = _naive_tiles(tracks, ZOOM)
+    assert tiles.keys() == expected.keys()
+    for key, counts in tiles.items():
+        assert counts.dtype == np.uint32
+        assert np.array_equal(counts, expected[key])
+
+
+def test_each_run_counts_once_per_pixel():
+    lat = np.array([38.7, 38.7001, 38.7, 38.7001])  # vai e volta no mesmo sítio
+    lon = np.array([-9.14, -9.14, -9.14, -9.14])
+    once = tile_increments([(lat, lon)], ZOOM)
+    twice = tile_increments([(lat, lon), (lat, lon)], ZOOM)
+    assert once.keys() == twice.keys()
+    for key in once:
+        assert once[key].max() == 1
+        assert np.array_equal(twice[key], once[key] * 2)
+
+
+def test_a_track_across_a_tile_border_touches_both_tiles():
+    world = TILE_SIZE * 2 ** ZOOM
+    # Longitudes de píxeis dos dois lados da fronteira x = 256 × 4000
+    border = 4000 * TILE_SIZE
+    lon = np.array([(border - 3) / world * 360 - 180, (border + 3) / world * 360 - 180])
+    lat = np.array([LISBON[0], LISBON[0]])
+    tiles = tile_increments([(lat, lon)], ZOOM)
+    assert sorted(x for x, _ in tiles) == [3999, 4000]
+    assert sum(int(counts.sum()) for counts in tiles.values()) == 7
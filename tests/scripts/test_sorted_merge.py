@@ -0,0 +1,46 @@
+import random
+
+import pytest
+
+from sorted_merge import merge_runs
+
+
+def _key(activity):
+    return activity["date"]
+
+
+def _runs(rng, history_size, sizes):
+    # Poucas datas possíveis: muitos empates, para verificar a estabilidade
+    counter = iter(range(10**6))
+
+    def make():
+        return {"date": f"2025-03-{rng.randint(1, 28):02d}", "id": next(counter)}
+
+    return [[make() for _ in range(history_size)]] + [[make() for _ in range(size)] for size in sizes]
+
+
+@pytest.mark.parametrize("reverse", [False, True])
+@pytest.mark.parametrize("history_size, sizes", [
+    (2000, [3, 1]),        # poucas novas: inserção por pesquisa binária
+    (50, [400, 300]),      # muitas novas: junção pelo sort
+    (0, [20, 5]),
+    (30, []),
+])
+def test_matches_sorted_concatenation(reverse, history_size, sizes):
+    rng = random.Random(history_size * 31 + len(sizes))
+    runs = _runs(rng, history_size, sizes)
+    # O histórico vem do ficheiro já ordenado; os ficheiros novos podem vir em qualquer ordem
+    runs[0].sort(key=_key, reverse=reverse)
+    if sizes:
+        runs[1].sort(key=_key, reverse=not reverse)
+
+    expected = sorted([item for run in runs for item in run], key=_key, reverse=reverse)
+    assert merge_runs(runs, _key, reverse=reverse, history_sorted=True) == expected
+    assert merge_runs(runs, _key, reverse=reverse) == expected
+
+
+def test_unsorted_history_is_sorted_unless_trusted():
+    rng = random.Random(7)
+    runs = _runs(rng, 200, [2])
+    expected = sorted([item for run in runs for item in run], key=_key)
+    assert merge_runs(runs, _key) == expected
@@ -0,0 +1,49 @@
+import json
+
+from summary_shards import load_manifest, write_sharded_summary
+
+A = {"iso_date": "2025-03-10", "distance": 5.0}
+B = {"iso_date": "2025-03-01", "distance": 8.0}
+N = {"iso_date": "2025-02-14", "distance": 3.0}
+
+
+def _summary(activities):
+    return {"stats": {"total_runs": len(activities)}, "activities": activities}
+
+
+def _shard(root, month):
+    return json.loads((root / "activities" / f"{month}.json").read_text(encoding="utf-8"))
+
+
+def test_month_split_by_out_of_order_input_is_written_in_full(tmp_path):
+    write_sharded_summary(_summary([A, B, N]), str(tmp_path))
+    assert _shard(tmp_path, "2025-03") == [A, B]
+
+    # Março volta depois de fevereiro: o conteúdo final é igual ao da execução anterior
+    counts = write_sharded_summary(_summary([A, N, B]), str(tmp_path))
+
+    assert _shard(tmp_path, "2025-03") == [A, B]
+    entry = next(shard for shard in load_manifest(str(tmp_path))["shards"] if shard["month"] == "2025-03")
+    assert entry["count"] == 2
+    assert counts["written"] >= 1
+
+
+def test_unchanged_months_are_not_rewritten(tmp_path):
+    write_sharded_summary(_summary([A, B, N]), str(tmp_path))
+    counts = write_sharded_summary(_summary([A, B, N]), str(tmp_path))
+    assert counts == {"written": 0, "unchanged": 2, "removed": 0}
+
+
+def test_months_that_disappear_are_removed(tmp_path):
+    write_sharded_summary(_summary([A, B, N]), str(tmp_path))
+    counts = write_sharded_summary(_summary([A, B]), str(tmp_path))
+    assert counts["removed"] == 1
+    assert not (tmp_path / "activities" / "2025-02.json").exists()
+
+
+def test_header_only_has_the_landing_cards(tmp_path):
+    summary = {**_summary([A]), "latest_run": A, "generated_at": "agora", "rollups": {"monthly": []}}
+    write_sharded_summary(summary, str(tmp_path))
+    header = json.loads((tmp_path / "header.json").read_text(encoding="utf-8"))
+    assert set(header) == {"stats", "latest_run"}
+    assert load_manifest(str(tmp_path))["sections"]["rollups"]["file"] == "sections/rollups.json"
@@ -0,0 +1,89 @@
+import json
+import os
+
+import pytest
+
+import duplicate_index
+import update_training_data
+from activity_store import ActivityStore
+from update_training_data import DATA_FILE, import_new_data, sync_store_with_summary
+
+FAST = {"iso_date": "2025-03-01", "date": "01/03/2025", "distance": 5.0, "time_seconds": 1500,
+        "best_efforts": {"1k": 280.0, "5k": 1500.0}, "route_id": "r1"}
+SLOW = {"iso_date": "2025-03-08", "date": "08/03/2025", "distance": 5.0, "time_seconds": 1620,
+        "best_efforts": {"1k": 300.0, "5k": 1620.0}, "route_id": "r1"}
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(os.path.dirname(DATA_FILE))
+    return tmp_path
+
+
+def _write_summary(activities):
+    with open(DATA_FILE, "w", encoding="utf-8") as f:
+        json.dump({"activities": activities}, f)
+
+
+def _write_csv(rows):
+    os.makedirs(update_training_data.GARMIN_EXPORTS_DIR, exist_ok=True)
+    with open(f"{update_training_data.GARMIN_EXPORTS_DIR}/Activities.csv", "w", encoding="utf-8") as f:
+        f.write("Date,Title,Distance,Time,Avg HR,Calories\n")
+        f.writelines(f"{row}\n" for row in rows)
+
+
+def test_store_reloads_when_another_importer_rewrites_the_summary():
+    _write_summary([FAST])
+    with ActivityStore() as store:
+        assert sync_store_with_summary(store) == 1
+        assert sync_store_with_summary(store) == 0
+
+    # Mesmo conteúdo com outro mtime: o hash confirma que não mudou
+    _write_summary([FAST])
+    with ActivityStore() as store:
+        assert sync_store_with_summary(store) == 0
+
+    _write_summary([SLOW, FAST])
+    with ActivityStore() as store:
+        assert sync_store_with_summary(store) == 2
+        assert store.count() == 2
+
+
+def test_personal_bests_and_routes_follow_the_store():
+    _write_summary([FAST])
+    _write_csv(["2025-03-15 08:00:00,Corrida,5.0,00:26:00,150,400"])
+    assert import_new_data()
+
+    # Outro importador acrescenta uma corrida mais lenta no mesmo percurso
+    with open(DATA_FILE, encoding="utf-8") as f:
+        activities = json.load(f)["activities"]
+    _write_summary(activities + [SLOW])
+    _write_csv(["2025-03-20 08:00:00,Corrida,6.0,00:33:00,150,480"])
+    assert import_new_data()
+
+    with open(DATA_FILE, encoding="utf-8") as f:
+        summary = json.load(f)
+    assert len(summary["activities"]) == 4
+    assert summary["personal_bests"]["1k"]["time_seconds"] == 280.0
+    [route] = summary["routes"]
+    assert route["id"] == "r1"
+    assert route["runs"] == 2
+
+
+def test_two_runs_on_the_same_day_keep_their_start_times(monkeypatch):
+    monkeypatch.setattr(duplicate_index, "TIMEZONE", "Europe/Lisbon")
+    _write_summary([])
+    _write_csv([
+        "2025-03-10 07:00:00,Manhã,5.0,00:25:00,150,400",
+        "2025-03-10 19:00:00,Noite,5.0,00:25:02,150,400",
+        # A mesma corrida da manhã noutro export (hora e tempo arredondados de outra forma)
+        "2025-03-10 07:00:30,Manhã,5.01,00:25:01,150,400",
+    ])
+    assert import_new_data()
+
+    with open(DATA_FILE, encoding="utf-8") as f:
+        activities = json.load(f)["activities"]
+    assert sorted(activity["start_time"] for activity in activities) == [
+        "2025-03-10T07:00:00", "2025-03-10T19:00:00",
+    ]
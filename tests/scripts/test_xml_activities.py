@@ -0,0 +1,114 @@
+import io
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from xml_activities import parse_xml_activity
+
+GPX = b"""<?xml version="1.0" encoding="UTF-8"?>
+<gpx version="1.1" xmlns="http://www.topografix.com/GPX/1/1"
+     xmlns:gpxtpx="http://www.garmin.com/xmlschemas/TrackPointExtension/v1">
+  <metadata><time>2025-03-10T07:00:00Z</time></metadata>
+  <trk>
+    <name>Treino da Marginal</name>
+    <trkseg>
+      <trkpt lat="38.7000" lon="-9.1400"><ele>10</ele><time>2025-03-10T07:00:00Z</time>
+        <extensions><gpxtpx:TrackPointExtension><gpxtpx:hr>140</gpxtpx:hr></gpxtpx:TrackPointExtension></extensions>
+      </trkpt>
+      <trkpt lat="38.7010" lon="-9.1400"><ele>11</ele><time>2025-03-10T07:00:30Z</time>
+        <extensions><gpxtpx:TrackPointExtension><gpxtpx:hr>150</gpxtpx:hr></gpxtpx:TrackPointExtension></extensions>
+      </trkpt>
+      <trkpt lat="38.7020" lon="-9.1400"><time>2025-03-10T07:01:00Z</time></trkpt>
+      <trkpt lat="38.7030" lon="-9.1400"><time>2025-03-10T07:05:00Z</time>
+        <extensions><gpxtpx:TrackPointExtension><gpxtpx:hr>160</gpxtpx:hr></gpxtpx:TrackPointExtension></extensions>
+      </trkpt>
+      <trkpt lat="38.7040" lon="-9.1400"></trkpt>
+    </trkseg>
+  </trk>
+</gpx>
+"""
+
+TCX = b"""<?xml version="1.0" encoding="UTF-8"?>
+<TrainingCenterDatabase xmlns="http://www.garmin.com/xmlschemas/TrainingCenterDatabase/v2">
+  <Activities>
+    <Activity Sport="Running">
+      <Id>2025-07-10T06:00:00Z</Id>
+      <Lap StartTime="2025-07-10T06:00:00Z">
+        <TotalTimeSeconds>300</TotalTimeSeconds>
+        <DistanceMeters>1000</DistanceMeters>
+        <Calories>70</Calories>
+        <AverageHeartRateBpm><Value>150</Value></AverageHeartRateBpm>
+        <MaximumHeartRateBpm><Value>165</Value></MaximumHeartRateBpm>
+        <Track>
+          <Trackpoint><Time>2025-07-10T06:00:00Z</Time><DistanceMeters>0</DistanceMeters>
+            <HeartRateBpm><Value>140</Value></HeartRateBpm></Trackpoint>
+          <Trackpoint><Time>2025-07-10T06:02:30Z</Time>
+            <HeartRateBpm><Value>155</Value></HeartRateBpm></Trackpoint>
+          <Trackpoint><Time>2025-07-10T06:05:00Z</Time><DistanceMeters>1000</DistanceMeters></Trackpoint>
+        </Track>
+      </Lap>
+      <Lap StartTime="2025-07-10T06:05:00Z">
+        <TotalTimeSeconds>100</TotalTimeSeconds>
+        <DistanceMeters>500</DistanceMeters>
+        <Calories>30</Calories>
+        <AverageHeartRateBpm><Value>170</Value></AverageHeartRateBpm>
+        <MaximumHeartRateBpm><Value>178</Value></MaximumHeartRateBpm>
+        <Track>
+          <Trackpoint><Time>2025-07-10T06:06:40Z</Time><DistanceMeters>1500</DistanceMeters></Trackpoint>
+        </Track>
+      </Lap>
+    </Activity>
+  </Activities>
+</TrainingCenterDatabase>
+"""
+
+# 0.001° de latitude ao longo de um meridiano
+LAT_STEP_M = 6_371_000 * math.radians(0.001)
+
+
+def test_gpx_distance_pauses_and_heart_rate():
+    activity, block = parse_xml_activity(io.BytesIO(GPX), name="marginal.gpx")
+
+    # O último ponto não tem hora: fica de fora, como nos .FIT
+    assert len(block) == 4
+    assert block["distance"] == pytest.approx([0, LAT_STEP_M, 2 * LAT_STEP_M, 3 * LAT_STEP_M])
+    assert np.isnan(block["heart_rate"][2])
+    assert block["altitude"][:2].tolist() == [10.0, 11.0]
+    assert activity == {
+        "distance": pytest.approx(3 * LAT_STEP_M / 1000),
+        # 4 minutos parado entre o 3.º e o 4.º ponto: pausa
+        "total_time": 60.0,
+        "average_heartrate": 150,
+        "max_heart_rate": 160,
+        "calories": 0,
+        "date": "2025-03-10T07:00:00",
+        "title": "Treino da Marginal",
+        "clock": "utc",
+    }
+
+
+def test_tcx_totals_come_from_the_laps():
+    activity, block = parse_xml_activity(io.BytesIO(TCX), name="prova.tcx")
+
+    assert len(block) == 4
+    # Ponto sem distância repete a anterior
+    assert block["distance"].tolist() == [0.0, 0.0, 1000.0, 1500.0]
+    assert block["heart_rate"][:2].tolist() == [140.0, 155.0]
+    assert activity == {
+        "distance": 1.5,
+        "total_time": 400.0,
+        # Média das voltas pesada pelo tempo: (150×300 + 170×100) / 400
+        "average_heartrate": 155,
+        "max_heart_rate": 178,
+        "calories": 100,
+        "date": "2025-07-10T06:00:00",
+        "title": "prova",
+        "clock": "utc",
+    }
+
+
+def test_unknown_suffix_is_rejected():
+    with pytest.raises(ValueError):
+        parse_xml_activity(io.BytesIO(GPX), name="treino.kml")